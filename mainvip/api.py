@@ -0,0 +1,458 @@
+"""JSON API для VIP-клиентов, организаций и взаимодействий.
+
+Список отдается страницами по курсору (``cursor``, ``per_page``).
+``fields=id,full_name`` ограничивает набор полей: строки читаются через
+``values()``, и в SELECT попадают только нужные столбцы.
+``include=organization`` встраивает связанный объект — его столбцы
+выбираются тем же запросом через JOIN (поля связанного объекта задаются
+``fields[organization]=``). ETag строится из версий данных (``mainvip.cache``),
+поэтому на ``If-None-Match`` ответ 304 отдается без запросов к БД.
+Массовые создание и изменение — ``POST`` и ``PATCH`` на ``bulk/``.
+
+Доступ — для пользователя, вошедшего в систему (сессия); запросы
+на запись проходят обычную проверку CSRF.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition
+
+from . import audit, cache, counters
+from .models import Interaction, Organization, User, VIPClient
+from .pagination import KeysetPaginator, get_page_size
+from .signals import interactions_bulk_changed, organizations_bulk_changed, vip_clients_bulk_changed
+
+
+class ApiError(Exception):
+    """Ошибка запроса: отдается клиенту JSON-ответом с кодом status"""
+
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.errors = errors
+
+
+class Resource:
+    """Описание ресурса API: модель, поля, связанные объекты и порядок выдачи"""
+    model = None
+    # Публичное имя поля → атрибут модели
+    fields = {}
+    writable = ()
+    # Связанные объекты для include=: имя → (поле модели, ресурс)
+    includes = {}
+    # Параметр запроса → фильтр
+    filters = {}
+    # Порядок выдачи списка; последнее поле уникально (keyset-пагинация)
+    ordering = ()
+    # Версии данных (mainvip.cache), от которых зависит ответ
+    versions = ()
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def defaults(self, request):
+        """Значения полей нового объекта, не переданные клиентом"""
+        return {}
+
+    def bulk_changed(self, instances, previous):
+        """Вызывается после массовой записи (в той же транзакции), previous — прежние значения полей"""
+
+
+class OrganizationResource(Resource):
+    model = Organization
+    fields = {
+        'id': 'organization_id',
+        'name': 'name',
+        'type': 'type',
+        'address': 'address',
+        'website': 'website',
+    }
+    writable = ('name', 'type', 'address', 'website')
+    filters = {'type': 'type'}
+    ordering = ('organization_id',)
+    versions = (cache.ORGANIZATION,)
+
+    def bulk_changed(self, instances, previous):
+        organizations_bulk_changed.send(sender=Organization, pks=[instance.pk for instance in instances])
+
+
+class UserResource(Resource):
+    model = User
+    fields = {
+        'id': 'id',
+        'username': 'username',
+        'full_name': 'full_name',
+    }
+
+
+class ClientResource(Resource):
+    model = VIPClient
+    fields = {
+        'id': 'vip_id',
+        'full_name': 'full_name',
+        'position': 'position',
+        'phone': 'phone',
+        'email': 'email',
+        'organization': 'organization_id',
+        'status': 'status',
+        'notes': 'notes',
+        'last_interaction_date': 'last_interaction_date',
+        'interaction_count': 'interaction_count',
+    }
+    writable = ('full_name', 'position', 'phone', 'email', 'organization', 'status', 'notes')
+    includes = {'organization': ('organization', OrganizationResource())}
+    filters = {'status': 'status', 'organization': 'organization_id'}
+    ordering = ('vip_id',)
+    # Сводка по взаимодействиям меняется вместе со взаимодействиями
+    versions = (cache.VIP_CLIENT, cache.INTERACTION, cache.ORGANIZATION)
+
+    def bulk_changed(self, instances, previous):
+        audit.record_bulk(instances, previous)
+        counter_deltas = None
+        if not previous:
+            # Созданные клиенты: изменения счетчиков известны без пересчета
+            counter_deltas = {
+                counters.TOTAL_CLIENTS: len(instances),
+                counters.ACTIVE_CLIENTS: sum(instance.status == 'active' for instance in instances),
+            }
+        vip_clients_bulk_changed.send(
+            sender=VIPClient, pks=[instance.pk for instance in instances], counter_deltas=counter_deltas,
+        )
+
+
+class InteractionResource(Resource):
+    model = Interaction
+    fields = {
+        'id': 'interaction_id',
+        'client': 'vip_client_id',
+        'user': 'user_id',
+        'date': 'date',
+        'type': 'type',
+        'channel': 'channel',
+        'description': 'description',
+        'result': 'result',
+    }
+    writable = ('client', 'user', 'date', 'type', 'channel', 'description', 'result')
+    includes = {
+        'client': ('vip_client', ClientResource()),
+        'user': ('user', UserResource()),
+    }
+    filters = {'client': 'vip_client_id', 'type': 'type', 'channel': 'channel'}
+    ordering = ('-date', '-interaction_id')
+    versions = (cache.INTERACTION, cache.VIP_CLIENT, cache.USER)
+
+    def defaults(self, request):
+        return {'user_id': request.user.pk}
+
+    def bulk_changed(self, instances, previous):
+        client_ids = {instance.vip_client_id for instance in instances}
+        dates = {instance.date for instance in instances}
+        for values in previous.values():
+            client_ids.add(values['vip_client_id'])
+            dates.add(values['date'])
+        interactions_bulk_changed.send(
+            sender=Interaction, pks=[instance.pk for instance in instances], client_ids=client_ids, dates=dates,
+        )
+
+
+CLIENTS = ClientResource()
+ORGANIZATIONS = OrganizationResource()
+INTERACTIONS = InteractionResource()
+
+
+def api_view(methods):
+    """Проверка входа и метода, ApiError → JSON-ответ"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({'error': 'Требуется вход в систему'}, status=401)
+            if request.method not in methods:
+                response = JsonResponse({'error': 'Метод не поддерживается'}, status=405)
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as e:
+                data = {'error': e.message}
+                if e.errors is not None:
+                    data['errors'] = e.errors
+                return JsonResponse(data, status=e.status)
+        return wrapper
+    return decorator
+
+
+def get_etag(request, resource, pk=None):
+    """ETag ответа: версии данных ресурса и параметры запроса (без обращения к БД)"""
+    versions = cache.get_versions(*resource.versions)
+    return hashlib.md5(f'{versions}:{request.get_full_path()}'.encode()).hexdigest()
+
+
+# Чтение
+
+def _parse_names(request, key, resource):
+    raw = request.GET.get(key, '')
+    if not raw:
+        return list(resource.fields)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise ApiError(400, f"Неизвестные поля в {key}: {', '.join(unknown)}")
+    if 'id' not in names:
+        names.insert(0, 'id')
+    return names
+
+
+def get_columns(request, resource):
+    """Выбираемые столбцы: {имя: столбец} ресурса и {include: {имя: столбец}} связанных объектов"""
+    columns = {name: resource.fields[name] for name in _parse_names(request, 'fields', resource)}
+    includes = {}
+    for name in filter(None, (item.strip() for item in request.GET.get('include', '').split(','))):
+        if name not in resource.includes:
+            raise ApiError(400, f'Неизвестный include: {name}')
+        field, related = resource.includes[name]
+        includes[name] = {
+            related_name: f'{field}__{related.fields[related_name]}'
+            for related_name in _parse_names(request, f'fields[{name}]', related)
+        }
+    return columns, includes
+
+
+def _values(queryset, columns, includes, extra=()):
+    names = list(columns.values())
+    for related in includes.values():
+        names.extend(related.values())
+    names.extend(name for name in extra if name not in names)
+    return queryset.values(*names)
+
+
+def serialize(row, columns, includes):
+    item = {name: row[column] for name, column in columns.items()}
+    for name, related in includes.items():
+        values = {related_name: row[column] for related_name, column in related.items()}
+        item[name] = values if values['id'] is not None else None
+    return item
+
+
+def _read_json(request):
+    try:
+        return json.loads(request.body or b'null')
+    except ValueError:
+        raise ApiError(400, 'Тело запроса — не JSON')
+
+
+def _detail_data(request, resource, pk):
+    columns, includes = get_columns(request, resource)
+    row = _values(resource.get_queryset().filter(pk=pk), columns, includes).first()
+    if row is None:
+        raise ApiError(404, 'Объект не найден')
+    return serialize(row, columns, includes)
+
+
+# Запись
+
+def _field_errors(resource, error):
+    """Ошибки ValidationError с именами полей API"""
+    public = {}
+    for name, attname in resource.fields.items():
+        public[resource.model._meta.get_field(attname).name] = name
+    return {public.get(field, field): messages for field, messages in error.message_dict.items()}
+
+
+def _assign(resource, instance, data):
+    """Переносит данные запроса в объект; возвращает измененные атрибуты и ошибки"""
+    if not isinstance(data, dict):
+        return [], {'__all__': ['Ожидается объект JSON']}
+    errors = {name: ['Поле недоступно для записи'] for name in data if name not in resource.writable and name != 'id'}
+    changed = []
+    for name in resource.writable:
+        if name in data:
+            attname = resource.fields[name]
+            setattr(instance, attname, data[name])
+            changed.append(attname)
+    return changed, errors
+
+
+def _foreign_keys(resource):
+    return [
+        (name, resource.model._meta.get_field(attname))
+        for name, attname in resource.fields.items()
+        if name in resource.writable and resource.model._meta.get_field(attname).is_relation
+    ]
+
+
+def _validate_bulk(resource, instances, items):
+    """Проверка пакета объектов: поля — full_clean, ссылки — одним запросом на каждую связь"""
+    changed_fields = set()
+    errors = {}
+    foreign_keys = _foreign_keys(resource)
+    exclude = [field.name for _, field in foreign_keys]
+    for index, (instance, item) in enumerate(zip(instances, items)):
+        changed, item_errors = _assign(resource, instance, item)
+        if not isinstance(item, dict):
+            errors[index] = item_errors
+            continue
+        changed_fields.update(changed)
+        try:
+            instance.full_clean(exclude=exclude, validate_unique=False, validate_constraints=False)
+        except ValidationError as e:
+            item_errors.update(_field_errors(resource, e))
+        for name, field in foreign_keys:
+            try:
+                value = field.to_python(getattr(instance, field.attname))
+            except ValidationError as e:
+                item_errors[name] = e.messages
+                continue
+            if value is None and not field.null:
+                item_errors[name] = [str(field.error_messages['null'])]
+            setattr(instance, field.attname, value)
+        if item_errors:
+            errors[index] = item_errors
+
+    for name, field in foreign_keys:
+        ids = {getattr(instance, field.attname) for instance in instances} - {None}
+        existing = set(field.related_model._default_manager.filter(pk__in=ids).values_list('pk', flat=True))
+        for index, instance in enumerate(instances):
+            value = getattr(instance, field.attname)
+            if value is not None and value not in existing and name not in errors.get(index, {}):
+                errors.setdefault(index, {})[name] = [f'Объект {value} не найден']
+    return changed_fields, errors
+
+
+# Представления
+
+def _collection(request, resource):
+    if request.method == 'POST':
+        return _create(request, resource)
+
+    columns, includes = get_columns(request, resource)
+    ordering_fields = [name.lstrip('-') for name in resource.ordering]
+    page_size = get_page_size(request, settings.API_PAGE_SIZE, settings.PAGINATION_MAX_PAGE_SIZE)
+    try:
+        queryset = resource.get_queryset()
+        for param, lookup in resource.filters.items():
+            if request.GET.get(param):
+                queryset = queryset.filter(**{lookup: request.GET[param]})
+        paginator = KeysetPaginator(_values(queryset, columns, includes, ordering_fields), resource.ordering, page_size)
+        page = paginator.get_page(request.GET.get('cursor'))
+    except (ValueError, ValidationError):
+        raise ApiError(400, 'Некорректное значение фильтра')
+    return JsonResponse({
+        'results': [serialize(row, columns, includes) for row in page],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    })
+
+
+def _create(request, resource):
+    instance = resource.model(**resource.defaults(request))
+    changed, errors = _assign(resource, instance, _read_json(request))
+    if not errors:
+        try:
+            instance.full_clean()
+        except ValidationError as e:
+            errors = _field_errors(resource, e)
+    if errors:
+        raise ApiError(400, 'Ошибка в данных', errors)
+    with transaction.atomic():
+        instance.save()
+    return JsonResponse(_detail_data(request, resource, instance.pk), status=201)
+
+
+@api_view(['GET', 'HEAD', 'POST'])
+@condition(etag_func=get_etag)
+def collection(request, resource):
+    """Список объектов (GET) и создание объекта (POST)"""
+    return _collection(request, resource)
+
+
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@condition(etag_func=get_etag)
+def detail(request, resource, pk):
+    """Объект (GET), частичное изменение (PATCH), удаление (DELETE)"""
+    if request.method in ('GET', 'HEAD'):
+        return JsonResponse(_detail_data(request, resource, pk))
+
+    instance = resource.get_queryset().filter(pk=pk).first()
+    if instance is None:
+        raise ApiError(404, 'Объект не найден')
+    if request.method == 'DELETE':
+        with transaction.atomic():
+            instance.delete()
+        return HttpResponse(status=204)
+
+    _, errors = _assign(resource, instance, _read_json(request))
+    if not errors:
+        try:
+            instance.full_clean()
+        except ValidationError as e:
+            errors = _field_errors(resource, e)
+    if errors:
+        raise ApiError(400, 'Ошибка в данных', errors)
+    with transaction.atomic():
+        instance.save()
+    return JsonResponse(_detail_data(request, resource, pk))
+
+
+def _valid_id(field, pk):
+    """Целое число в допустимом для ключа диапазоне: списки, строки и переполнение иначе дошли бы до запроса"""
+    # bool в Python — тоже int
+    if not isinstance(pk, int) or isinstance(pk, bool):
+        return False
+    try:
+        field.run_validators(pk)
+    except ValidationError:
+        return False
+    return True
+
+
+@api_view(['POST', 'PATCH'])
+def bulk(request, resource):
+    """Массовое создание (POST) или изменение (PATCH, у каждого объекта есть id) списком объектов"""
+    items = _read_json(request)
+    if not isinstance(items, list) or not items:
+        raise ApiError(400, 'Ожидается непустой список объектов')
+    if len(items) > settings.API_BULK_MAX_SIZE:
+        raise ApiError(400, f'Не больше {settings.API_BULK_MAX_SIZE} объектов за запрос')
+
+    previous = {}
+    if request.method == 'POST':
+        defaults = resource.defaults(request)
+        instances = [resource.model(**defaults) for _ in items]
+    else:
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        invalid = {
+            index: {'id': ['Некорректный id']} for index, pk in enumerate(ids)
+            if not _valid_id(resource.model._meta.pk, pk)
+        }
+        if invalid:
+            raise ApiError(400, 'Некорректный id', invalid)
+        existing = resource.get_queryset().in_bulk(ids)
+        missing = {index: {'id': ['Объект не найден']} for index, pk in enumerate(ids) if pk not in existing}
+        if missing:
+            raise ApiError(400, 'Ошибка в данных', missing)
+        if len(set(ids)) != len(ids):
+            raise ApiError(400, 'Объект встречается в списке несколько раз')
+        instances = [existing[pk] for pk in ids]
+        previous = {instance.pk: dict(getattr(instance, '_loaded_values', {})) for instance in instances}
+
+    changed_fields, errors = _validate_bulk(resource, instances, items)
+    if errors:
+        raise ApiError(400, 'Ошибка в данных', errors)
+
+    try:
+        with transaction.atomic():
+            if request.method == 'POST':
+                resource.model._default_manager.bulk_create(instances)
+            elif changed_fields:
+                resource.model._default_manager.bulk_update(instances, sorted(changed_fields))
+            resource.bulk_changed(instances, previous)
+    except IntegrityError as e:
+        raise ApiError(409, f'Конфликт с существующими данными: {e}')
+    return JsonResponse({'ids': [instance.pk for instance in instances]}, status=201 if request.method == 'POST' else 200)
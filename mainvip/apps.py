@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MainvipConfig(AppConfig):
     name = 'mainvip'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import tasks  # noqa: F401
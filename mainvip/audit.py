@@ -0,0 +1,218 @@
+"""Журнал изменений VIP-клиентов.
+
+Обработчики сигналов (``mainvip.signals``) сравнивают значения полей
+с загруженными из БД (``_loaded_values``) и передают записи ``ClientChange``
+в ``transaction.on_commit``: откат транзакции или точки сохранения отменяет
+и записи журнала. Зафиксированные записи внутри ``audit.collect()``
+(запрос, фоновая задача) копятся и пишутся одним ``bulk_create`` при выходе
+из блока, поэтому сохранение клиентов не платит отдельным INSERT за каждое
+изменение; вне блока запись идет сразу после фиксации.
+
+Автор изменения берется из запроса (``AuditUserMiddleware``), в фоновых
+задачах и командах он задается через ``audit.actor(user)``.
+"""
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import ClientChange, Organization, VIPClient
+
+# Поля клиента, попадающие в журнал (сводка по взаимодействиям не пишется)
+AUDITED_FIELDS = tuple(
+    field.attname for field in VIPClient._meta.concrete_fields
+    if not field.primary_key and field.attname not in VIPClient.SUMMARY_FIELDS
+)
+
+# Сколько записей журнала копится в collect() до промежуточной записи (длинные импорты)
+COLLECT_LIMIT = 1000
+
+logger = logging.getLogger(__name__)
+
+_actor = ContextVar('mainvip_audit_actor', default=None)
+# {база: записи} зафиксированных транзакций внутри collect()
+_pending = ContextVar('mainvip_audit_pending', default=None)
+
+
+@contextmanager
+def actor(user):
+    """Изменения внутри блока записываются в журнал от имени user.
+
+    user может быть функцией, возвращающей пользователя: он загрузится,
+    только если что-то попадет в журнал.
+    """
+    token = _actor.set(user)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+def _actor_id():
+    user = _actor.get()
+    if callable(user):
+        user = user()
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+def _value(name, value):
+    """Значение поля в том виде, в каком оно хранится в БД ('5' из формы — 5)"""
+    value = VIPClient._meta.get_field(name).to_python(value)
+    return None if value == '' else value
+
+
+def diff(instance, previous):
+    """{поле: [было, стало]} по полям, известным в previous"""
+    changes = {}
+    for name in AUDITED_FIELDS:
+        if name not in previous:
+            continue
+        old, new = _value(name, previous[name]), _value(name, getattr(instance, name))
+        if old != new:
+            changes[name] = [old, new]
+    return changes
+
+
+def _snapshot(instance):
+    """Непустые значения полей клиента"""
+    values = {name: _value(name, getattr(instance, name)) for name in AUDITED_FIELDS}
+    return {name: value for name, value in values.items() if value is not None}
+
+
+def _entry(instance, action, changes):
+    return ClientChange(
+        vip_client_id=instance.pk,
+        client_name=instance.full_name,
+        action=action,
+        changes=changes,
+        user_id=_actor_id(),
+    )
+
+
+def record_saved(instance, created, using):
+    """Создание или изменение клиента через save()"""
+    if created:
+        changes = {name: [None, value] for name, value in _snapshot(instance).items()}
+        _add([_entry(instance, ClientChange.CREATE, changes)], using)
+        return
+    changes = diff(instance, getattr(instance, '_loaded_values', {}))
+    if changes:
+        _add([_entry(instance, ClientChange.UPDATE, changes)], using)
+
+
+def record_deleted(instance, using):
+    changes = {name: [value, None] for name, value in _snapshot(instance).items()}
+    _add([_entry(instance, ClientChange.DELETE, changes)], using)
+
+
+def _bulk_entries(instances, previous, update_action, create_action):
+    entries = []
+    for instance in instances:
+        if instance.pk in previous:
+            changes = diff(instance, previous[instance.pk])
+            if changes:
+                entries.append(_entry(instance, update_action, changes))
+        else:
+            changes = {name: [None, value] for name, value in _snapshot(instance).items()}
+            entries.append(_entry(instance, create_action, changes))
+    return entries
+
+
+def record_bulk(instances, previous, using=DEFAULT_DB_ALIAS):
+    """Массовая запись клиентов; previous — {pk: прежние значения полей}, пусто для новых"""
+    _add(_bulk_entries(instances, previous, ClientChange.UPDATE, ClientChange.CREATE), using)
+
+
+def record_imported(clients, previous, using=DEFAULT_DB_ALIAS):
+    """Импорт с обновлением по email; previous — {pk: прежние значения полей}, пусто для новых"""
+    _add(_bulk_entries(clients, previous, ClientChange.IMPORT, ClientChange.IMPORT), using)
+
+
+def _add(entries, using):
+    if entries:
+        # Обработчик точки сохранения, откаченной до фиксации, Django отбрасывает вместе с ее записями;
+        # вне транзакции on_commit выполняет его сразу
+        transaction.on_commit(partial(_committed, entries, using), using=using)
+
+
+def _committed(entries, using):
+    pending = _pending.get()
+    if pending is None:
+        _write(entries, using)
+        return
+    batch = pending.setdefault(using, [])
+    batch.extend(entries)
+    if len(batch) >= COLLECT_LIMIT:
+        _write(pending.pop(using), using)
+
+
+def _write(entries, using):
+    try:
+        ClientChange.objects.using(using).bulk_create(entries)
+    except Exception:
+        # Ошибка записи журнала не должна превращать уже зафиксированное изменение в ошибку запроса
+        logger.exception('Не удалось записать журнал изменений клиентов (%s записей)', len(entries))
+
+
+def _flush(pending):
+    for using, entries in pending.items():
+        _write(entries, using)
+
+
+@contextmanager
+def collect():
+    """Записи журнала, зафиксированные внутри блока, пишутся одним INSERT при выходе из него"""
+    pending = {}
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+        _flush(pending)
+
+
+@asynccontextmanager
+async def acollect():
+    """collect() для async-кода: обработчики on_commit выполняются в потоках sync_to_async
+    с копией контекста и видят тот же буфер, а запись идет через sync_to_async"""
+    pending = {}
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+        await sync_to_async(_flush)(pending)
+
+
+def describe(changes):
+    """Строки для отображения: подписи полей, названия статусов и организаций"""
+    changes = list(changes)
+    organization_ids = {
+        value for change in changes
+        for value in change.changes.get('organization_id', ()) if value is not None
+    }
+    organizations = dict(
+        Organization.objects.filter(pk__in=organization_ids).values_list('pk', 'name')
+    ) if organization_ids else {}
+    statuses = dict(VIPClient.STATUS_CHOICES)
+
+    def display(name, value):
+        if value is None or value == '':
+            return '—'
+        if name == 'organization_id':
+            return organizations.get(value, f'№{value}')
+        if name == 'status':
+            return statuses.get(value, value)
+        return value
+
+    for change in changes:
+        change.rows = [
+            (VIPClient._meta.get_field(name).verbose_name, display(name, old), display(name, new))
+            for name, (old, new) in change.changes.items()
+        ]
+    return changes
@@ -0,0 +1,80 @@
+"""Бэкенд аутентификации с кэшем пользователя в памяти процесса.
+
+``ModelBackend`` на каждом запросе загружает пользователя из сессии
+отдельным запросом к БД (и роль — еще одним, если она нужна странице).
+``CachedModelBackend`` держит пользователя вместе с ролью в памяти
+процесса ``AUTH_USER_CACHE_TTL`` секунд. Запись действительна, пока не
+изменились версии ``USER`` и ``ROLE`` (``mainvip.cache``): их увеличивает
+сохранение и удаление пользователей и ролей, в том числе в другом процессе.
+Смена пароля тоже сохраняет пользователя, поэтому проверка хеша сессии
+не пропускает устаревшую запись.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import cache
+
+_users = {}
+_lock = threading.Lock()
+
+
+def clear():
+    """Сбрасывает кэш пользователей текущего процесса"""
+    with _lock:
+        _users.clear()
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        if ttl <= 0:
+            return super().get_user(user_id)
+        versions = cache.get_versions(cache.USER, cache.ROLE)
+        return self._cached(user_id, versions) or self._load(user_id, versions, ttl)
+
+    async def aget_user(self, user_id):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        if ttl <= 0:
+            return await super().aget_user(user_id)
+        versions = await cache.aget_versions(cache.USER, cache.ROLE)
+        cached = self._cached(user_id, versions)
+        if cached is not None:
+            return cached
+        UserModel = get_user_model()
+        try:
+            user = await UserModel._default_manager.select_related('role').aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return self._store(user_id, user, versions, ttl)
+
+    @staticmethod
+    def _cached(user_id, versions):
+        entry = _users.get(user_id)
+        if entry is None:
+            return None
+        user, entry_versions, expires = entry
+        if entry_versions != versions or expires < time.monotonic():
+            return None
+        # Копия: изменения объекта в одном запросе не должны попасть в другие
+        return copy.deepcopy(user)
+
+    def _load(self, user_id, versions, ttl):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('role').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return self._store(user_id, user, versions, ttl)
+
+    def _store(self, user_id, user, versions, ttl):
+        if not self.user_can_authenticate(user):
+            return None
+        with _lock:
+            _users[user_id] = (copy.deepcopy(user), versions, time.monotonic() + ttl)
+        return user
@@ -0,0 +1,74 @@
+"""Версии данных для ключей кэша.
+
+У каждой модели, данные которой попадают в кэш, есть номер версии.
+Фрагменты шаблонов кэшируются с версиями всех моделей, от которых они
+зависят (``{% cache ... versions %}``), а сигналы ``post_save``/``post_delete``
+увеличивают версию измененной модели (см. ``mainvip.signals``). Старые
+записи кэша после этого не читаются и вытесняются по времени жизни.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'mainvip:version:{}'
+
+ORGANIZATION = 'organization'
+USER = 'user'
+ROLE = 'role'
+VIP_CLIENT = 'vip_client'
+INTERACTION = 'interaction'
+# Отчеты по взаимодействиям (mainvip.reports)
+REPORTS = 'reports'
+
+
+def _initial_version():
+    # Начальное значение от времени: если ключ версии вытеснен из кэша,
+    # новая версия не совпадет ни с одной из прежних
+    return time.time_ns()
+
+
+def get_version_map(*names):
+    """Словарь {имя: версия} для перечисленных имен (один запрос к кэшу)"""
+    keys = {name: VERSION_KEY.format(name) for name in names}
+    versions = cache.get_many(keys.values())
+    for key in keys.values():
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return {name: versions[key] for name, key in keys.items()}
+
+
+def get_versions(*names):
+    """Строка с версиями перечисленных моделей (один запрос к кэшу)"""
+    versions = get_version_map(*names)
+    return '.'.join(str(versions[name]) for name in names)
+
+
+async def aget_versions(*names):
+    """Асинхронный вариант get_versions"""
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _initial_version(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def _bump(names):
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+
+
+def bump(*names):
+    """Делает устаревшими все записи кэша, зависящие от перечисленных моделей"""
+    _bump(names)
+    # Пока транзакция не зафиксирована, другой запрос может закэшировать
+    # прежние данные под новой версией — после фиксации версия меняется еще раз
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(names))
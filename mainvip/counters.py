@@ -0,0 +1,57 @@
+"""Счетчики дашборда, поддерживаемые инкрементально.
+
+Значения хранятся в таблице ``counters`` и обновляются обработчиками
+сигналов в той же транзакции, что и изменение данных, поэтому дашборд
+читает готовые числа одним запросом вместо нескольких COUNT(*).
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import F
+
+from .models import Counter, Organization, VIPClient
+
+TOTAL_CLIENTS = 'total_clients'
+ACTIVE_CLIENTS = 'active_clients'
+TOTAL_ORGANIZATIONS = 'total_organizations'
+
+# Как посчитать каждый счетчик с нуля
+SOURCES = {
+    TOTAL_CLIENTS: lambda: VIPClient.objects.all(),
+    ACTIVE_CLIENTS: lambda: VIPClient.objects.filter(status='active'),
+    TOTAL_ORGANIZATIONS: lambda: Organization.objects.all(),
+}
+
+
+def rebuild(names=None, progress=None):
+    """Пересчитывает счетчики по данным таблиц; progress(done, total) — после каждого счетчика"""
+    names = list(names or SOURCES)
+    for done, name in enumerate(names, start=1):
+        Counter.objects.update_or_create(name=name, defaults={'value': SOURCES[name]().count()})
+        if progress is not None:
+            progress(done, len(names))
+
+
+def increment(name, delta=1):
+    """Изменяет счетчик на delta; отсутствующий счетчик пересчитывается"""
+    if not delta:
+        return
+    if not Counter.objects.filter(name=name).update(value=F('value') + delta):
+        rebuild([name])
+
+
+def get_counters():
+    """Словарь {название: значение} со всеми счетчиками"""
+    values = dict(Counter.objects.filter(name__in=SOURCES).values_list('name', 'value'))
+    missing = [name for name in SOURCES if name not in values]
+    if missing:
+        rebuild(missing)
+        values.update(Counter.objects.filter(name__in=missing).values_list('name', 'value'))
+    return values
+
+
+async def aget_counters():
+    """Асинхронный вариант get_counters"""
+    rows = Counter.objects.filter(name__in=SOURCES).values_list('name', 'value')
+    values = {name: value async for name, value in rows}
+    if any(name not in values for name in SOURCES):
+        return await sync_to_async(get_counters)()
+    return values
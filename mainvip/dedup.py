@@ -0,0 +1,343 @@
+"""Поиск дубликатов VIP-клиентов.
+
+Сравнивать каждого клиента со всеми остальными — O(n²). Вместо этого
+для клиента строятся ключи блокировки (таблица ``ClientDedupKey``):
+нормализованный email, номер телефона без кода страны и фонетические
+коды слов ФИО — всех слов вместе и каждой пары слов, поэтому порядок
+слов, латиница вместо кириллицы и пропущенное отчество не мешают.
+Сравниваются только клиенты с общим ключом, блоки больше
+``DEDUP_MAX_BLOCK_SIZE`` (распространенные ФИО) пропускаются.
+
+Общий email или телефон — достаточный признак дубликата. Общий ключ ФИО
+проверяется сходством имен (``name_similarity``) не ниже
+``DEDUP_NAME_THRESHOLD``.
+
+Ключи обновляются сигналами ``VIPClient`` (см. ``mainvip.signals``).
+Пакетный поиск групп — ``find_groups`` (команда ``find_duplicates`` и
+фоновая задача), проверка при сохранении клиента — ``find_candidates``.
+"""
+import itertools
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import ClientDedupKey, VIPClient
+from .queries import pk_batches
+from .search import normalize_phone, normalize_text
+
+EMAIL = 'email'
+PHONE = 'phone'
+NAME = 'name'
+KIND_LABELS = dict(ClientDedupKey.KIND_CHOICES)
+
+# Поля клиента, из которых строятся ключи
+KEY_FIELDS = ('full_name', 'phone', 'email')
+KEY_MAX_LENGTH = ClientDedupKey._meta.get_field('key').max_length
+# Номера короче не сравниваются: слишком много случайных совпадений
+PHONE_MIN_DIGITS = 7
+# Сколько слов ФИО участвует в ключах по парам слов
+NAME_MAX_WORDS = 4
+# Почтовые сервисы, которые не различают точки в имени ящика
+DOTLESS_EMAIL_DOMAINS = {'gmail.com': 'gmail.com', 'googlemail.com': 'gmail.com'}
+
+BATCH_SIZE = 2000
+# Ограничение числа параметров в запросе (SQLite)
+LOOKUP_CHUNK_SIZE = 500
+
+_WORD_RE = re.compile(r'\w+')
+_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'i',
+    'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '',
+    'э': 'e', 'ю': 'yu', 'я': 'ya',
+})
+# Сочетания букв латиницы, которые звучат как одна согласная (порядок важен)
+_SOUNDS = [(re.compile(pattern), code) for pattern, code in (
+    ('shch|sch', 'X'), ('zh|sh', 'X'), ('t?ch', '4'), ('kh', 'H'), ('ph', 'F'), ('th', 'T'), ('t[sz]', 'C'),
+    ('ck', 'K'), ('x', 'KS'), ('c(?=[eiy])', 'S'), ('c', 'K'), ('q', 'K'), ('w', 'F'),
+)]
+# Звонкие и глухие пары не различаются: на конце слова они звучат одинаково
+_CONSONANTS = str.maketrans({
+    'b': 'P', 'p': 'P', 'v': 'F', 'f': 'F', 'g': 'K', 'k': 'K', 'd': 'T', 't': 'T', 'z': 'S', 's': 'S',
+    'l': 'L', 'm': 'M', 'n': 'N', 'r': 'R', 'h': 'H',
+})
+_VOWELS = 'aeiouy'
+
+
+def transliterate(value):
+    """Нормализованный текст латиницей: кириллица транслитерируется, прочие знаки удаляются"""
+    return re.sub(r'[^a-z0-9\s]', '', normalize_text(value).translate(_TRANSLIT))
+
+
+# Слова ФИО часто повторяются (имена, отчества): коды кэшируются
+@lru_cache(maxsize=65536)
+def phonetic_code(word):
+    """Фонетический код слова (кириллица или латиница).
+
+    Согласные сводятся к классам по звучанию, гласные отбрасываются
+    (кроме первой буквы), повторы схлопываются: «Иванов», «Ivanoff»
+    и «Иваноф» получают один код.
+    """
+    word = transliterate(word).replace('j', 'i')
+    if not word:
+        return ''
+    first = 'A' if word[0] in _VOWELS else ''
+    for pattern, code in _SOUNDS:
+        word = pattern.sub(code, word)
+    word = word.translate(_CONSONANTS)
+    code = first + ''.join(char for char in word if char not in _VOWELS)
+    return ''.join(char for char, _ in itertools.groupby(code))
+
+
+def name_codes(full_name):
+    """Фонетические коды слов ФИО без повторов, по алфавиту"""
+    words = _WORD_RE.findall(normalize_text(full_name))
+    return sorted({code for code in map(phonetic_code, words) if code})
+
+
+def email_key(email):
+    """Email без регистра, метки после «+» и точек в ящиках Gmail"""
+    local, _, domain = (email or '').strip().lower().rpartition('@')
+    if not local or not domain:
+        return ''
+    local = local.split('+', 1)[0]
+    if domain in DOTLESS_EMAIL_DOMAINS:
+        local, domain = local.replace('.', ''), DOTLESS_EMAIL_DOMAINS[domain]
+    return f'{local}@{domain}'
+
+
+def phone_key(phone):
+    """Цифры номера; у российских номеров — без кода страны (7 или 8)"""
+    digits = normalize_phone(phone)
+    if len(digits) == 11 and digits[0] in '78':
+        digits = digits[1:]
+    return digits if len(digits) >= PHONE_MIN_DIGITS else ''
+
+
+def name_keys(full_name):
+    """Ключи ФИО: коды всех слов и коды каждой пары слов"""
+    codes = name_codes(full_name)[:NAME_MAX_WORDS]
+    if not codes:
+        return set()
+    keys = {' '.join(codes)}
+    if len(codes) > 2:
+        keys.update(' '.join(pair) for pair in itertools.combinations(codes, 2))
+    return keys
+
+
+def build_keys(full_name, phone, email):
+    """Ключи блокировки клиента: множество пар (вид, ключ)"""
+    keys = {(NAME, key[:KEY_MAX_LENGTH]) for key in name_keys(full_name)}
+    for kind, key in ((EMAIL, email_key(email)), (PHONE, phone_key(phone))):
+        if key:
+            keys.add((kind, key[:KEY_MAX_LENGTH]))
+    return keys
+
+
+def _trigrams(full_name):
+    value = f" {' '.join(sorted(transliterate(full_name).split()))} "
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def name_features(full_name):
+    """Фонетические коды и триграммы ФИО для сравнения (см. name_similarity)"""
+    return set(name_codes(full_name)), _trigrams(full_name)
+
+
+def features_similarity(first, second):
+    """Сходство ФИО по заранее посчитанным name_features"""
+    (codes_first, grams_first), (codes_second, grams_second) = first, second
+    if not codes_first or not codes_second:
+        return 0.0
+    contained = len(codes_first & codes_second) / min(len(codes_first), len(codes_second))
+    if contained == 1:
+        return 1.0
+    return max(contained, len(grams_first & grams_second) / len(grams_first | grams_second))
+
+
+def name_similarity(first, second):
+    """Сходство двух ФИО от 0 до 1.
+
+    Большее из двух значений: доля фонетических кодов более короткого имени,
+    найденных в другом (пропущенное отчество не снижает сходство), и мера
+    Жаккара по триграммам транслитерации (опечатки).
+    """
+    return features_similarity(name_features(first), name_features(second))
+
+
+def is_name_match(first, second):
+    return name_similarity(first, second) >= settings.DEDUP_NAME_THRESHOLD
+
+
+def index_rows(rows, replace=True):
+    """Записывает ключи для кортежей (pk, full_name, phone, email).
+
+    Вставка — executemany без создания объектов моделей: при перестроении
+    миллионов ключей это в несколько раз быстрее bulk_create.
+    """
+    rows = list(rows)
+    params = [(pk, kind, key) for pk, *values in rows for kind, key in sorted(build_keys(*values))]
+    quote = connection.ops.quote_name
+    table, columns = quote(ClientDedupKey._meta.db_table), ', '.join(map(quote, ('vip_client_id', 'kind', 'key')))
+    with transaction.atomic():
+        if replace:
+            ClientDedupKey.objects.filter(vip_client_id__in=[row[0] for row in rows]).delete()
+        with connection.cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES (%s, %s, %s)', params)
+
+
+def index(client):
+    """Обновляет ключи клиента"""
+    index_rows([(client.pk, *(getattr(client, name) for name in KEY_FIELDS))])
+
+
+def index_pks(pks):
+    """Обновляет ключи клиентов с указанными идентификаторами"""
+    pks = list(pks)
+    for start in range(0, len(pks), LOOKUP_CHUNK_SIZE):
+        chunk = pks[start:start + LOOKUP_CHUNK_SIZE]
+        index_rows(VIPClient.objects.filter(pk__in=chunk).values_list('pk', *KEY_FIELDS))
+
+
+def rebuild(progress=None):
+    """Перестраивает ключи всех клиентов.
+
+    Ключи заменяются пакетами, каждый в своей транзакции; progress(done, total)
+    вызывается после каждого пакета.
+    """
+    total = VIPClient.objects.count() if progress is not None else None
+    done = 0
+    for batch in pk_batches(VIPClient.objects.values_list('pk', *KEY_FIELDS), BATCH_SIZE):
+        index_rows(batch)
+        done += len(batch)
+        if progress is not None:
+            progress(done, total)
+
+
+def find_candidates(client, limit=None):
+    """Возможные дубликаты клиента: список пар (клиент, виды совпавших ключей).
+
+    Сначала клиенты с общим email или телефоном, затем по сходству ФИО.
+    """
+    keys = build_keys(*(getattr(client, name) for name in KEY_FIELDS))
+    if not keys:
+        return []
+    condition = Q()
+    for kind, key in keys:
+        condition |= Q(kind=kind, key=key)
+    matches = (
+        ClientDedupKey.objects.filter(condition).exclude(vip_client_id=client.pk)
+        .values_list('vip_client_id', 'kind')[:settings.DEDUP_MAX_BLOCK_SIZE * len(keys)]
+    )
+    kinds = defaultdict(set)
+    for pk, kind in matches:
+        kinds[pk].add(kind)
+
+    candidates = []
+    for other in VIPClient.objects.filter(pk__in=list(kinds)).order_by('pk'):
+        reasons = kinds[other.pk] - {NAME}
+        if NAME in kinds[other.pk] and is_name_match(client.full_name, other.full_name):
+            reasons.add(NAME)
+        if reasons:
+            candidates.append((other, sorted(reasons)))
+    candidates.sort(key=lambda item: item[1] == [NAME])
+    return candidates[:limit]
+
+
+class DuplicateGroups:
+    """Итог пакетного поиска: группы дубликатов и пропущенные блоки"""
+
+    def __init__(self):
+        self.groups = []
+        self.keys = 0
+        self.blocks = 0
+        self.skipped_blocks = 0
+        self.compared = 0
+
+    @property
+    def clients(self):
+        return sum(len(pks) for pks, _ in self.groups)
+
+
+def find_groups(max_block=None, progress=None):
+    """Группы возможных дубликатов среди всех клиентов.
+
+    Ключи читаются одним проходом по индексу в порядке (вид, ключ),
+    группы собираются объединением пар (система непересекающихся
+    множеств). В ``groups`` — пары (идентификаторы клиентов, виды
+    совпавших ключей), самые большие группы первыми. progress(result)
+    вызывается каждые ``BATCH_SIZE`` прочитанных ключей.
+    """
+    max_block = max_block or settings.DEDUP_MAX_BLOCK_SIZE
+    result = DuplicateGroups()
+    parent = {}
+
+    def find(pk):
+        root = pk
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while pk != root:
+            parent[pk], pk = root, parent[pk]
+        return root
+
+    edges = []
+
+    def union(first, second, kind):
+        edges.append((first, kind))
+        parent.setdefault(first, first)
+        parent.setdefault(second, second)
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[max(root_first, root_second)] = min(root_first, root_second)
+
+    def counted(rows):
+        for row in rows:
+            result.keys += 1
+            if progress and result.keys % BATCH_SIZE == 0:
+                progress(result)
+            yield row
+
+    name_pairs = set()
+    rows = ClientDedupKey.objects.order_by('kind', 'key', 'vip_client_id').values_list('kind', 'key', 'vip_client_id')
+    for (kind, _), block in itertools.groupby(counted(rows.iterator(chunk_size=BATCH_SIZE)),
+                                              key=lambda row: row[:2]):
+        pks = [row[2] for row in block]
+        if len(pks) < 2:
+            continue
+        result.blocks += 1
+        if len(pks) > max_block:
+            result.skipped_blocks += 1
+            continue
+        if kind == NAME:
+            name_pairs.update(itertools.combinations(pks, 2))
+        else:
+            for other in pks[1:]:
+                union(pks[0], other, kind)
+
+    # Признаки ФИО считаются один раз на клиента, а не на каждую пару
+    features = {}
+    pks = list({pk for pair in name_pairs for pk in pair})
+    for start in range(0, len(pks), LOOKUP_CHUNK_SIZE):
+        rows = VIPClient.objects.filter(pk__in=pks[start:start + LOOKUP_CHUNK_SIZE]).values_list('pk', 'full_name')
+        features.update((pk, name_features(full_name)) for pk, full_name in rows)
+    result.compared = len(name_pairs)
+    threshold = settings.DEDUP_NAME_THRESHOLD
+    empty = (set(), set())
+    for first, second in sorted(name_pairs):
+        if features_similarity(features.get(first, empty), features.get(second, empty)) >= threshold:
+            union(first, second, NAME)
+
+    members, reasons = defaultdict(list), defaultdict(set)
+    for pk in parent:
+        members[find(pk)].append(pk)
+    for pk, kind in edges:
+        reasons[find(pk)].add(kind)
+    result.groups = sorted(
+        ((sorted(group), sorted(reasons[root])) for root, group in members.items()),
+        key=lambda item: (-len(item[0]), item[0][0]),
+    )
+    return result
@@ -0,0 +1,228 @@
+"""Потоковая выгрузка данных в CSV и XLSX.
+
+Строки берутся из ``QuerySet.iterator()`` и сразу отдаются клиенту,
+поэтому расход памяти не зависит от объема выгрузки. XLSX собирается
+без сторонних библиотек: лист пишется в zip-архив по мере поступления строк.
+"""
+import csv
+import re
+import zipfile
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .models import Interaction, VIPClient
+
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Сколько строк XLSX накапливать перед отправкой очередной порции
+XLSX_FLUSH_ROWS = 500
+
+# Управляющие символы, недопустимые в XML
+_ILLEGAL_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Символы, с которых табличный редактор начинает формулу при открытии CSV
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    """Значение ячейки CSV; текст, который Excel принял бы за формулу, начинается с апострофа"""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def unescape_csv_cell(value):
+    """Текст ячейки CSV без апострофа, добавленного _csv_cell (для импорта выгрузки)"""
+    if value.startswith("'") and value[1:].startswith(_FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def stream_csv(header, rows):
+    """Генератор CSV-строк в UTF-8 с BOM (чтобы Excel распознал кириллицу)"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff'.encode('utf-8')
+    for row in chain([header], rows):
+        yield writer.writerow([_csv_cell(value) for value in row]).encode('utf-8')
+
+
+class _ChunkBuffer:
+    """Поток без поддержки seek: собирает байты, записанные zipfile"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML_RE.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(header, rows, sheet_name='Лист1'):
+    """Генератор байтов XLSX-файла с одним листом"""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31])))
+        yield buffer.pop()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode('utf-8'))
+            for number, row in enumerate(chain([header], rows), start=1):
+                cells = ''.join(_xlsx_cell(value) for value in row)
+                sheet.write(f'<row>{cells}</row>'.encode('utf-8'))
+                if number % XLSX_FLUSH_ROWS == 0:
+                    chunk = buffer.pop()
+                    if chunk:
+                        yield chunk
+            sheet.write(_SHEET_TAIL.encode('utf-8'))
+    yield buffer.pop()
+
+
+def export_stream(export_format, header, rows, sheet_name='Лист1'):
+    """Генератор байтов выгрузки в формате csv или xlsx, расширение файла и тип содержимого"""
+    if export_format == 'xlsx':
+        return stream_xlsx(header, rows, sheet_name), 'xlsx', XLSX_CONTENT_TYPE
+    return stream_csv(header, rows), 'csv', CSV_CONTENT_TYPE
+
+
+def export_response(export_format, filename, header, rows, sheet_name='Лист1'):
+    """StreamingHttpResponse с выгрузкой в формате csv или xlsx"""
+    chunks, extension, content_type = export_stream(export_format, header, rows, sheet_name)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+CLIENT_HEADER = ['ID', 'ФИО', 'Должность', 'Организация', 'Телефон', 'Email', 'Статус', 'Примечания']
+DUPLICATE_HEADER = ['Группа', 'Совпадения', 'ID', 'ФИО', 'Телефон', 'Email', 'Организация', 'Статус']
+INTERACTION_HEADER = ['ID', 'Дата', 'VIP-клиент', 'Тип', 'Канал', 'Пользователь', 'Описание', 'Результат']
+
+
+def client_rows(queryset):
+    """Строки выгрузки клиентов; читаются порциями без создания объектов моделей"""
+    statuses = dict(VIPClient.STATUS_CHOICES)
+    rows = queryset.values_list(
+        'vip_id', 'full_name', 'position', 'organization__name', 'phone', 'email', 'status', 'notes',
+    )
+    for vip_id, full_name, position, organization, phone, email, status, notes in rows.iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield [vip_id, full_name, position, organization or '', phone, email, statuses.get(status, status), notes or '']
+
+
+def interaction_rows(queryset):
+    """Строки выгрузки взаимодействий"""
+    types = dict(Interaction.TYPE_CHOICES)
+    channels = dict(Interaction.CHANNEL_CHOICES)
+    rows = queryset.values_list(
+        'interaction_id', 'date', 'vip_client__full_name', 'type', 'channel',
+        'user__full_name', 'user__username', 'description', 'result',
+    )
+    for (interaction_id, date, client, interaction_type, channel,
+         user_full_name, username, description, result) in rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield [
+            interaction_id, date.isoformat(), client, types.get(interaction_type, interaction_type),
+            channels.get(channel, channel or ''), user_full_name or username or '', description, result or '',
+        ]
+
+
+def duplicate_rows(groups, labels):
+    """Строки выгрузки групп дубликатов: groups — пары (идентификаторы клиентов, виды совпадений).
+
+    Клиенты загружаются одним запросом на несколько групп.
+    """
+    statuses = dict(VIPClient.STATUS_CHOICES)
+    groups = list(groups)
+    start = 0
+    while start < len(groups):
+        end, size = start, 0
+        while end < len(groups) and (end == start or size + len(groups[end][0]) <= settings.EXPORT_CHUNK_SIZE):
+            size += len(groups[end][0])
+            end += 1
+        pks = [pk for group_pks, _ in groups[start:end] for pk in group_pks]
+        clients = {
+            row[0]: row for row in VIPClient.objects.filter(pk__in=pks).values_list(
+                'vip_id', 'full_name', 'phone', 'email', 'organization__name', 'status',
+            )
+        }
+        for number, (group_pks, kinds) in enumerate(groups[start:end], start=start + 1):
+            matched = ', '.join(labels.get(kind, kind) for kind in kinds)
+            for pk in group_pks:
+                if pk in clients:
+                    vip_id, full_name, phone, email, organization, status = clients[pk]
+                    yield [number, matched, vip_id, full_name, phone, email, organization or '',
+                           statuses.get(status, status)]
+        start = end
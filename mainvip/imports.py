@@ -0,0 +1,181 @@
+"""Массовый импорт VIP-клиентов из CSV.
+
+Файл читается потоково, строки проверяются и записываются пакетами:
+клиенты пакета ищутся одним запросом по ``LOWER(email)`` (индекс
+уникальности email без учета регистра), найденные обновляются
+``bulk_update``, новые создаются ``bulk_create``. Организации
+сопоставляются по названию через словарь, загруженный один раз перед импортом.
+
+Необязательные колонки (организация, статус, примечания) обновляются, только
+если они есть в файле, а пустая ячейка оставляет у найденного клиента прежнее
+значение — импорт не сбрасывает данные, которых в файле нет.
+"""
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from . import audit, counters
+from .exports import unescape_csv_cell
+from .models import Organization, VIPClient, normalize_email
+from .signals import vip_clients_bulk_changed
+
+# Заголовки колонок: внутреннее имя и русские названия из выгрузки (mainvip.exports)
+COLUMN_ALIASES = {
+    'full_name': ('full_name', 'фио'),
+    'position': ('position', 'должность'),
+    'phone': ('phone', 'телефон'),
+    'email': ('email', 'электронная почта'),
+    'organization': ('organization', 'организация'),
+    'status': ('status', 'статус'),
+    'notes': ('notes', 'примечания'),
+}
+REQUIRED_COLUMNS = ('full_name', 'position', 'phone', 'email')
+# Необязательные колонки: поле модели для каждой
+OPTIONAL_FIELDS = {'organization': 'organization_id', 'status': 'status', 'notes': 'notes'}
+
+# Ошибок в отчете хранится не больше этого числа, остальные только считаются
+MAX_REPORTED_ERRORS = 10_000
+
+
+class ImportResult:
+    """Итог импорта: число обработанных и записанных строк и ошибки по строкам"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, email, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'email': email, 'error': message})
+
+    def write_report(self, fileobj):
+        """Записывает отчет об ошибках в CSV"""
+        writer = csv.DictWriter(fileobj, fieldnames=['line', 'email', 'error'])
+        writer.writeheader()
+        writer.writerows(self.errors)
+
+
+def _column_map(fieldnames):
+    """Сопоставляет заголовки файла с полями модели"""
+    columns = {}
+    for header in fieldnames or []:
+        key = (header or '').strip().lower()
+        for field, aliases in COLUMN_ALIASES.items():
+            if key in aliases:
+                columns[field] = header
+    return columns
+
+
+def import_clients(fileobj, batch_size=1000, encoding='utf-8-sig', progress=None):
+    """Импортирует клиентов из CSV-файла (текстового или бинарного).
+
+    progress — необязательная функция, которая вызывается с ImportResult
+    после записи каждого пакета.
+    """
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+    reader = csv.DictReader(fileobj)
+    result = ImportResult()
+
+    columns = _column_map(reader.fieldnames)
+    missing = [field for field in REQUIRED_COLUMNS if field not in columns]
+    if missing:
+        result.add_error(1, '', f"Нет обязательных колонок: {', '.join(missing)}")
+        return result
+
+    # Обновляются только поля, колонки которых есть в файле
+    update_fields = ['full_name', 'position', 'phone', *(field for field in OPTIONAL_FIELDS if field in columns)]
+    organizations = {
+        name.strip().lower(): pk for name, pk in Organization.objects.values_list('name', 'pk')
+    }
+    statuses = {}
+    for value, label in VIPClient.STATUS_CHOICES:
+        statuses[value] = statuses[label.lower()] = value
+
+    batch = {}
+    for line, row in enumerate(reader, start=2):
+        result.rows += 1
+        values = {field: unescape_csv_cell((row.get(header) or '').strip()) for field, header in columns.items()}
+        email = normalize_email(values['email'])
+
+        organization_id = None
+        organization_name = values.get('organization', '')
+        if organization_name:
+            organization_id = organizations.get(organization_name.lower())
+            if organization_id is None:
+                result.add_error(line, email, f'Организация не найдена: {organization_name}')
+                continue
+
+        status = values.get('status', '')
+        client = VIPClient(
+            full_name=values['full_name'],
+            position=values['position'],
+            phone=values['phone'],
+            email=email,
+            organization_id=organization_id,
+            status=statuses.get(status.lower(), status) or 'active',
+            notes=values.get('notes') or None,
+        )
+        # Пустые ячейки: у найденного клиента остается прежнее значение
+        client._import_kept = [attname for field, attname in OPTIONAL_FIELDS.items() if not values.get(field)]
+        try:
+            client.full_clean(exclude=['organization'], validate_unique=False, validate_constraints=False)
+        except ValidationError as e:
+            messages = '; '.join(f'{field}: {" ".join(errors)}' for field, errors in e.message_dict.items())
+            result.add_error(line, email, messages)
+            continue
+
+        # Повтор email в одном пакете: побеждает последняя строка
+        batch[email] = client
+        if len(batch) >= batch_size:
+            result.imported += _save_batch(batch.values(), update_fields)
+            batch = {}
+            if progress is not None:
+                progress(result)
+    if batch:
+        result.imported += _save_batch(batch.values(), update_fields)
+    return result
+
+
+def _save_batch(clients, update_fields):
+    clients = list(clients)
+    with transaction.atomic():
+        # Строки блокируются до конца транзакции: прежние значения нужны для пустых ячеек, счетчиков и журнала
+        existing = {
+            row.pop('email_lower'): row for row in
+            VIPClient.objects.select_for_update().annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=[client.email for client in clients])
+            .values('email_lower', 'pk', *audit.AUDITED_FIELDS)
+        }
+        created = [client for client in clients if client.email not in existing]
+        updated = [client for client in clients if client.email in existing]
+        active_delta = sum(client.status == 'active' for client in created)
+        for client in updated:
+            previous = existing[client.email]
+            # email не обновляется: у клиента остается записанный в БД
+            client.pk, client.email = previous['pk'], previous['email']
+            for attname in client._import_kept:
+                setattr(client, attname, previous[attname])
+            active_delta += (client.status == 'active') - (previous['status'] == 'active')
+        VIPClient.objects.bulk_create(created)
+        VIPClient.objects.bulk_update(updated, update_fields)
+        if any(client.pk is None for client in created):
+            # СУБД без RETURNING: ключи созданных клиентов читаются заново
+            pks = dict(
+                VIPClient.objects.filter(email__in=[client.email for client in created]).values_list('email', 'pk')
+            )
+            for client in created:
+                client.pk = pks.get(client.email)
+        audit.record_imported(clients, {row['pk']: row for row in existing.values()})
+        # bulk_create и bulk_update не вызывают post_save — сообщаем об изменениях одним сигналом
+        vip_clients_bulk_changed.send(
+            sender=VIPClient, pks=[client.pk for client in clients],
+            counter_deltas={counters.TOTAL_CLIENTS: len(created), counters.ACTIVE_CLIENTS: active_delta},
+        )
+    return len(clients)
@@ -0,0 +1,171 @@
+"""Фоновые задачи без внешнего брокера.
+
+Задача ставится в очередь записью ``Job`` в БД (``enqueue``), а команда
+``runworker`` забирает задачи из таблицы и выполняет их в пуле процессов.
+Обработчик задачи регистрируется декоратором ``@task`` (см. ``mainvip.tasks``),
+получает объект ``Job`` и параметры, сообщает о ходе работы через
+``set_progress`` и возвращает результат — словарь, который сохраняется
+в ``Job.result``; файл результата записывается через ``save_result_file``.
+Упавшая задача повторяется с растущей задержкой, пока не исчерпаны попытки.
+"""
+import logging
+import tempfile
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import audit
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+# Сколько задач из начала очереди пробовать захватить за один проход
+CLAIM_CANDIDATES = 10
+
+# Не чаще одного обновления прогресса в секунду (если процент не изменился)
+PROGRESS_INTERVAL = 1.0
+
+
+def task(name, title, max_attempts=None):
+    """Регистрирует обработчик фоновой задачи под именем name"""
+    def decorator(func):
+        func.job_name = name
+        func.title = title
+        func.max_attempts = max_attempts
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def get_title(name):
+    """Название задачи для пользователя"""
+    handler = TASKS.get(name)
+    return handler.title if handler else name
+
+
+def enqueue(name, user=None, max_attempts=None, **params):
+    """Ставит задачу в очередь и возвращает ее Job.
+
+    При ``JOBS_IMMEDIATE`` задача выполняется сразу в текущем процессе
+    (после фиксации транзакции) — для разработки без запущенного runworker.
+    """
+    handler = TASKS[name]
+    job = Job.objects.create(
+        name=name,
+        params=params,
+        user=user,
+        max_attempts=max_attempts or handler.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if settings.JOBS_IMMEDIATE:
+        transaction.on_commit(lambda: claim('immediate', job_id=job.pk) and execute(job.pk))
+    return job
+
+
+def claim(worker, job_id=None):
+    """Захватывает задачу из очереди и возвращает ее ключ (или None, если очередь пуста).
+
+    Захват — условный UPDATE по статусу: из нескольких обработчиков задачу
+    получит только тот, чей UPDATE изменил строку.
+    """
+    now = timezone.now()
+    if job_id is None:
+        candidates = (Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+                      .order_by('run_after', 'job_id').values_list('pk', flat=True)[:CLAIM_CANDIDATES])
+    else:
+        candidates = [job_id]
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            heartbeat_at=now,
+            finished_at=None,
+        )
+        if claimed:
+            return pk
+    return None
+
+
+def execute(job_id):
+    """Выполняет захваченную задачу и сохраняет результат или ошибку"""
+    job = Job.objects.get(pk=job_id)
+    logger.info('Задача %s #%s: попытка %s из %s', job.name, job.pk, job.attempts, job.max_attempts)
+    try:
+        handler = TASKS[job.name]
+        with audit.actor(job.user), audit.collect():
+            result = handler(job, **job.params)
+    except Exception:
+        logger.exception('Задача %s #%s завершилась ошибкой', job.name, job.pk)
+        fail(job_id, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job_id).update(
+        status=Job.DONE,
+        progress=100,
+        result=result,
+        error='',
+        heartbeat_at=timezone.now(),
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def fail(job_id, error):
+    """Возвращает задачу в очередь с задержкой или, если попытки исчерпаны, отмечает ошибку"""
+    job = Job.objects.only('attempts', 'max_attempts').get(pk=job_id)
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = settings.JOBS_RETRY_DELAY * 2 ** max(0, job.attempts - 1)
+        Job.objects.filter(pk=job_id).update(
+            status=Job.QUEUED,
+            error=error,
+            run_after=now + timedelta(seconds=delay),
+            message=f'Повтор через {delay} с',
+        )
+    else:
+        Job.objects.filter(pk=job_id).update(status=Job.FAILED, error=error, finished_at=now)
+
+
+def requeue_stale(timeout):
+    """Задачи, от которых обработчик не отчитывался дольше timeout секунд (процесс умер), — снова в очередь"""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = list(Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff).values_list('pk', flat=True))
+    for job_id in stale:
+        fail(job_id, 'Обработчик перестал отвечать')
+    return stale
+
+
+def set_progress(job, done, total=None, message=None):
+    """Сообщает о ходе выполнения: done из total (или done — уже в процентах)"""
+    percent = done if total is None else (100 * done // total if total else 100)
+    percent = max(0, min(99, int(percent)))
+    now = time.monotonic()
+    if (percent == job.progress and message is None
+            and now - getattr(job, '_progress_reported', 0) < PROGRESS_INTERVAL):
+        return
+    job._progress_reported = now
+    job.progress = percent
+    fields = {'progress': percent, 'heartbeat_at': timezone.now()}
+    if message is not None:
+        job.message = fields['message'] = message[:255]
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+def save_result_file(job, filename, chunks):
+    """Записывает файл результата из последовательности байтовых порций"""
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in chunks:
+            tmp.write(chunk)
+        tmp.seek(0)
+        if job.result_file:
+            job.result_file.delete(save=False)
+        job.result_file.save(filename, File(tmp), save=False)
+    Job.objects.filter(pk=job.pk).update(result_file=job.result_file.name)
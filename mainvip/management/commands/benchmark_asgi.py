@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from io import BytesIO, StringIO
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from mainvip.models import User, VIPClient
+
+BENCHMARK_USERNAME = 'benchmark_user'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Сравнение пропускной способности WSGI и ASGI при большом числе одновременных запросов '
+            'к дашборду, списку и карточке клиента. Запросы подаются напрямую в обработчики Django '
+            '(WSGIHandler в пуле потоков и ASGIHandler в цикле событий), без сетевого сервера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100_000, help='Размер набора данных в числе взаимодействий')
+        parser.add_argument('--interactions-per-client', type=int, default=10)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 200],
+                            help='Число одновременных запросов')
+        parser.add_argument('--requests', type=int, default=500, help='Число запросов на страницу')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        logging.getLogger('mainvip.metrics').setLevel(logging.WARNING)
+
+        settings_dict = connection.settings_dict
+        old_name = settings_dict['NAME']
+        old_test = deepcopy(settings_dict['TEST'])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            if connection.vendor == 'sqlite':
+                # База в памяти доступна только одному потоку — нужна база в файле
+                settings_dict['TEST'] = {**old_test, 'NAME': str(Path(tmpdir) / 'benchmark.sqlite3')}
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self.seed(options)
+                urls, cookie = self.prepare()
+                connection.close()
+                for concurrency in options['concurrency']:
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"\nОдновременных запросов: {concurrency}"))
+                    for name, url in urls.items():
+                        wsgi = self.run_wsgi(url, cookie, concurrency, options['requests'])
+                        asgi = asyncio.run(self.run_asgi(url, cookie, concurrency, options['requests']))
+                        self.report(name, wsgi, asgi)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                settings_dict['TEST'] = old_test
+        self.stdout.write(self.style.SUCCESS("\n✓ Замер завершен"))
+
+    def seed(self, options):
+        per_client = options['interactions_per_client']
+        call_command(
+            'populate_data',
+            scale=max(1, options['size'] // max(1, per_client)),
+            interactions_per_client=per_client,
+            seed=options['seed'],
+            stdout=StringIO(),
+        )
+        User.objects.create_user(BENCHMARK_USERNAME, f'{BENCHMARK_USERNAME}@example.com', BENCHMARK_USERNAME,
+                                 full_name='Нагрузочный тест', is_staff=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def prepare(self):
+        """Адреса страниц и cookie сессии пользователя"""
+        client_pk = (VIPClient.objects.annotate(total=Count('interaction'))
+                     .order_by('-total').values_list('pk', flat=True).first())
+        urls = {
+            'dashboard': reverse('dashboard'),
+            'vip_clients_list': reverse('vip_clients_list'),
+            'vip_clients_list:search': f"{reverse('vip_clients_list')}?{urlencode({'search': 'петров'})}",
+            'vip_client_detail': reverse('vip_client_detail', args=[client_pk]),
+        }
+        client = Client()
+        client.force_login(User.objects.get(username=BENCHMARK_USERNAME))
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        return urls, f'{settings.SESSION_COOKIE_NAME}={session_key}'
+
+    def run_wsgi(self, url, cookie, concurrency, requests):
+        """WSGI: каждый запрос занимает поток пула на все время обработки"""
+        handler = WSGIHandler()
+        parts = urlsplit(url)
+
+        def request():
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': parts.path,
+                'QUERY_STRING': parts.query,
+                'SERVER_NAME': 'testserver',
+                'SERVER_PORT': '80',
+                'HTTP_HOST': 'testserver',
+                'HTTP_COOKIE': cookie,
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': StringIO(),
+            }
+            started = time.perf_counter()
+            statuses = []
+            response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            for _ in response:
+                pass
+            response.close()
+            return (time.perf_counter() - started) * 1000, int(statuses[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            results = list(executor.map(lambda _: request(), range(requests)))
+            elapsed = time.perf_counter() - started
+        return self.summary(results, elapsed)
+
+    async def run_asgi(self, url, cookie, concurrency, requests):
+        """ASGI: запросы обрабатываются в цикле событий, ограничение — семафор"""
+        handler = ASGIHandler()
+        parts = urlsplit(url)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': parts.path,
+                'raw_path': parts.path.encode(),
+                'query_string': parts.query.encode(),
+                'root_path': '',
+                'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': ('testserver', 80),
+            }
+            disconnected = asyncio.Event()
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            async with semaphore:
+                started = time.perf_counter()
+                await handler(scope, receive, send)
+                disconnected.set()
+                return (time.perf_counter() - started) * 1000, status[0]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        return self.summary(results, elapsed)
+
+    @staticmethod
+    def summary(results, elapsed):
+        latencies = [latency for latency, _ in results]
+        return {
+            'rps': len(results) / elapsed,
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': percentile(latencies, 0.95),
+            'errors': sum(1 for _, status in results if status >= 400),
+        }
+
+    def report(self, name, wsgi, asgi):
+        gain = asgi['rps'] / wsgi['rps'] if wsgi['rps'] else 0.0
+        self.stdout.write(
+            f"  {name:<26} WSGI {wsgi['rps']:7.1f} з/с (p50 {wsgi['p50_ms']:7.1f}, p95 {wsgi['p95_ms']:7.1f} мс, "
+            f"ошибок {wsgi['errors']})  ASGI {asgi['rps']:7.1f} з/с (p50 {asgi['p50_ms']:7.1f}, "
+            f"p95 {asgi['p95_ms']:7.1f} мс, ошибок {asgi['errors']})  x{gain:.2f}"
+        )
@@ -0,0 +1,103 @@
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from mainvip import auth
+from mainvip.metrics import QueryRecorder, RequestMetrics
+from mainvip.models import Role, User
+
+BENCHMARK_USERNAME = 'benchmark_auth'
+
+# Профили: (название, хранилище сессий, бэкенд аутентификации)
+PROFILES = [
+    ('db + ModelBackend', 'django.contrib.sessions.backends.db', 'django.contrib.auth.backends.ModelBackend'),
+    ('cached_db + CachedModelBackend', 'django.contrib.sessions.backends.cached_db', 'mainvip.auth.CachedModelBackend'),
+    ('signed_cookies + CachedModelBackend', 'django.contrib.sessions.backends.signed_cookies',
+     'mainvip.auth.CachedModelBackend'),
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Замер накладных расходов на сессию и аутентификацию: число SQL-запросов и задержка '
+            'запроса вошедшего пользователя при разных SESSION_ENGINE и бэкендах аутентификации')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Число замеров на каждую страницу')
+        parser.add_argument('--warmup', type=int, default=5, help='Число прогревочных запросов')
+        parser.add_argument('--url-names', nargs='+', default=['jobs_list', 'vip_clients_list'],
+                            help='Страницы для замера (имена URL без аргументов)')
+
+    def handle(self, *args, **options):
+        logging.getLogger('mainvip.metrics').setLevel(logging.WARNING)
+
+        # Замеры выполняются на отдельной тестовой базе, рабочие данные не затрагиваются
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            role = Role.objects.create(role_name='Менеджер')
+            user = User.objects.create_user(BENCHMARK_USERNAME, f'{BENCHMARK_USERNAME}@example.com',
+                                            BENCHMARK_USERNAME, full_name='Нагрузочный тест', role=role)
+            results = {}
+            for name, engine, backend in PROFILES:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+                with override_settings(SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend]):
+                    auth.clear()
+                    results[name] = self.run_profile(user, backend, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        base_name = PROFILES[0][0]
+        self.stdout.write('')
+        for name, cases in results.items():
+            if name == base_name:
+                continue
+            for url_name, row in cases.items():
+                base = results[base_name][url_name]
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ {name}, {url_name}: SQL {base['queries']} → {row['queries']}, "
+                    f"p50 {base['p50_ms']:.2f} → {row['p50_ms']:.2f} мс"
+                ))
+
+    def run_profile(self, user, backend, options):
+        client = Client()
+        client.force_login(user, backend=backend)
+        results = {}
+        for url_name in options['url_names']:
+            url = reverse(url_name)
+            for _ in range(options['warmup']):
+                client.get(url)
+
+            latencies, query_counts = [], []
+            status = None
+            for _ in range(options['requests']):
+                request_metrics = RequestMetrics()
+                with connection.execute_wrapper(QueryRecorder(request_metrics)):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                status = response.status_code
+                query_counts.append(request_metrics.queries)
+
+            results[url_name] = {
+                'status': status,
+                'p50_ms': round(statistics.median(latencies), 3),
+                'p95_ms': round(percentile(latencies, 0.95), 3),
+                'queries': max(query_counts),
+            }
+            row = results[url_name]
+            self.stdout.write(
+                f"  {url_name:<24} {status}  p50 {row['p50_ms']:7.2f} мс  p95 {row['p95_ms']:7.2f} мс  "
+                f"SQL {row['queries']:3d}"
+            )
+        return results
@@ -0,0 +1,183 @@
+import random
+import statistics
+import tempfile
+import threading
+import time
+from copy import deepcopy
+from datetime import date
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, transaction
+
+from mainvip.models import Interaction, Organization, User, VIPClient
+
+# Параметры подключения, которые задают настройку СУБД под конкурентную нагрузку
+TUNING_OPTIONS = ('init_command', 'timeout', 'transaction_mode', 'pool')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Замер пропускной способности БД при одновременной записи взаимодействий из нескольких потоков: '
+            'настройки подключения из settings.DATABASES сравниваются с базовыми '
+            '(без постоянных соединений, пула и PRAGMA для SQLite)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Число потоков записи')
+        parser.add_argument('--writes', type=int, default=200, help='Число записей на поток')
+        parser.add_argument('--readers', type=int, default=2, help='Число потоков чтения во время записи')
+        parser.add_argument('--clients', type=int, default=50, help='Число VIP-клиентов в тестовой базе')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        configured = {key: deepcopy(settings_dict.get(key)) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+        baseline = {
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False,
+            'OPTIONS': {key: value for key, value in configured['OPTIONS'].items() if key not in TUNING_OPTIONS},
+        }
+        old_name = settings_dict['NAME']
+        old_test = deepcopy(settings_dict['TEST'])
+
+        results = {}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, profile in (('baseline', baseline), ('configured', configured)):
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\nПрофиль {name}: {profile}"))
+                connection.close()
+                settings_dict.update(deepcopy(profile))
+                if connection.vendor == 'sqlite':
+                    # Тестовая база SQLite по умолчанию в памяти — для замера нужна база в файле
+                    settings_dict['TEST'] = {**old_test, 'NAME': str(Path(tmpdir) / f'{name}.sqlite3')}
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    results[name] = self.run_profile(options)
+                finally:
+                    if 'pool' in settings_dict['OPTIONS']:
+                        connection.close_pool()
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        settings_dict.update(configured)
+        settings_dict['TEST'] = old_test
+
+        base, current = results['baseline'], results['configured']
+        if base['writes_per_sec']:
+            gain = current['writes_per_sec'] / base['writes_per_sec']
+            self.stdout.write(self.style.SUCCESS(
+                f"\n✓ Пропускная способность записи: {base['writes_per_sec']:.0f} → "
+                f"{current['writes_per_sec']:.0f} записей/с (x{gain:.2f})"
+            ))
+
+    def seed(self, options):
+        user = User.objects.create_user('benchmark_writer', 'benchmark_writer@example.com', 'benchmark_writer',
+                                        full_name='Нагрузочный тест')
+        organization = Organization.objects.create(name='Нагрузочный тест', type='Тест')
+        clients = VIPClient.objects.bulk_create([
+            VIPClient(full_name=f'Клиент {i}', position='Директор', phone=f'+7 900 {i:07d}',
+                      email=f'writer{i}@example.com', organization=organization)
+            for i in range(options['clients'])
+        ])
+        return user.pk, [client.pk for client in clients]
+
+    def run_profile(self, options):
+        user_id, client_ids = self.seed(options)
+        connection.close()
+
+        writers = options['writers']
+        barrier = threading.Barrier(writers + options['readers'] + 1)
+        done = threading.Event()
+        write_results, read_results = [], []
+        threads = [
+            threading.Thread(target=self.write_worker,
+                             args=(barrier, user_id, client_ids, options['writes'], options['seed'] + i, write_results))
+            for i in range(writers)
+        ] + [
+            threading.Thread(target=self.read_worker,
+                             args=(barrier, done, client_ids, options['seed'] + writers + i, read_results))
+            for i in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads[:writers]:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in threads[writers:]:
+            thread.join()
+
+        latencies = [value for values, _ in write_results for value in values]
+        errors = sum(count for _, count in write_results)
+        reads = sum(count for count, _ in read_results)
+        read_errors = sum(count for _, count in read_results)
+        row = {
+            'writes': len(latencies),
+            'errors': errors,
+            'elapsed_s': round(elapsed, 3),
+            'writes_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': statistics.median(latencies) if latencies else 0.0,
+            'p95_ms': percentile(latencies, 0.95) if latencies else 0.0,
+            'reads': reads,
+            'read_errors': read_errors,
+        }
+        self.stdout.write(
+            f"  Записей {row['writes']} за {row['elapsed_s']:.2f} с ({row['writes_per_sec']:.0f}/с), "
+            f"ошибок блокировки {row['errors']}; p50 {row['p50_ms']:.2f} мс, p95 {row['p95_ms']:.2f} мс; "
+            f"чтений {row['reads']}, ошибок чтения {row['read_errors']}"
+        )
+        return row
+
+    def write_worker(self, barrier, user_id, client_ids, writes, seed, results):
+        """Поток записи: каждая запись — отдельный «HTTP-запрос» со своим жизненным циклом соединения"""
+        rng = random.Random(seed)
+        latencies, errors = [], 0
+        barrier.wait()
+        try:
+            for _ in range(writes):
+                close_old_connections()
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        client_id = VIPClient.objects.filter(pk=rng.choice(client_ids)).values_list('pk', flat=True).get()
+                        Interaction.objects.create(
+                            vip_client_id=client_id,
+                            user_id=user_id,
+                            date=date.today(),
+                            type='call',
+                            description='Нагрузочный тест',
+                        )
+                except OperationalError:
+                    errors += 1
+                else:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                finally:
+                    close_old_connections()
+        finally:
+            connection.close()
+        results.append((latencies, errors))
+
+    def read_worker(self, barrier, done, client_ids, seed, results):
+        """Поток чтения: лента взаимодействий клиента, пока идет запись"""
+        rng = random.Random(seed)
+        reads, errors = 0, 0
+        barrier.wait()
+        try:
+            while not done.is_set():
+                close_old_connections()
+                try:
+                    list(Interaction.objects.filter(vip_client_id=rng.choice(client_ids)).order_by('-date')[:20])
+                except OperationalError:
+                    errors += 1
+                else:
+                    reads += 1
+                finally:
+                    close_old_connections()
+        finally:
+            connection.close()
+        results.append((reads, errors))
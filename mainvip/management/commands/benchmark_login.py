@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from mainvip import throttle
+from mainvip.models import User
+
+BENCHMARK_USERNAME = 'benchmark_login'
+
+# Отдельный кэш в памяти: счетчики и блокировки замера не попадают в рабочий кэш
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark_login',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест входа при подборе паролей: несколько потоков с нескольких IP-адресов '
+            'перебирают пароли к нескольким учетным записям. Сравниваются процессорное время, '
+            'число проверок пароля и задержка входа настоящего пользователя без ограничения попыток '
+            'и с ограничением (mainvip.throttle)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attackers', type=int, default=8, help='Число потоков атакующего')
+        parser.add_argument('--ips', type=int, default=2, help='Число IP-адресов атакующего')
+        parser.add_argument('--usernames', type=int, default=20, help='Число перебираемых имен пользователей')
+        parser.add_argument('--duration', type=float, default=20.0, help='Длительность атаки, с')
+        # Окно и лимиты уменьшены, чтобы ограничение сработало за время замера
+        parser.add_argument('--window', type=int, default=10, help='LOGIN_THROTTLE_WINDOW для замера, с')
+        parser.add_argument('--ip-limit', type=int, default=3, help='LOGIN_THROTTLE_IP_LIMIT для замера')
+        parser.add_argument('--user-limit', type=int, default=3, help='LOGIN_THROTTLE_USER_LIMIT для замера')
+        parser.add_argument('--lockout', type=int, default=60, help='LOGIN_THROTTLE_LOCKOUT для замера, с')
+
+    def handle(self, *args, **options):
+        logging.getLogger('mainvip.metrics').setLevel(logging.WARNING)
+        logging.getLogger('mainvip.security').setLevel(logging.ERROR)
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        # Замеры выполняются на отдельной тестовой базе, рабочие данные не затрагиваются
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            User.objects.create_user(BENCHMARK_USERNAME, f'{BENCHMARK_USERNAME}@example.com', BENCHMARK_USERNAME,
+                                     full_name='Нагрузочный тест')
+            results = {}
+            profiles = (
+                ('без ограничения', {'LOGIN_THROTTLE_IP_LIMIT': 0, 'LOGIN_THROTTLE_USER_LIMIT': 0}),
+                ('с ограничением', {
+                    'LOGIN_THROTTLE_WINDOW': options['window'],
+                    'LOGIN_THROTTLE_IP_LIMIT': options['ip_limit'],
+                    'LOGIN_THROTTLE_USER_LIMIT': options['user_limit'],
+                    'LOGIN_THROTTLE_LOCKOUT': options['lockout'],
+                }),
+            )
+            for name, overrides in profiles:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\nВход {name}"))
+                with override_settings(CACHES=BENCHMARK_CACHES, **overrides):
+                    results[name] = self.run_attack(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        base, current = results['без ограничения'], results['с ограничением']
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ Процессорное время на попытку: {base['cpu_ms_per_attempt']:.1f} → "
+            f"{current['cpu_ms_per_attempt']:.1f} мс, проверок пароля: {base['hashes']} → {current['hashes']}, "
+            f"вход пользователя во время атаки: {base['login_ms']:.0f} → {current['login_ms']:.0f} мс"
+        ))
+
+    def run_attack(self, options):
+        throttle.reset_metrics()
+        usernames = [BENCHMARK_USERNAME] + [f'user{i}' for i in range(options['usernames'] - 1)]
+        stop = threading.Event()
+        statuses = []
+        threads = [
+            threading.Thread(target=self.attacker, args=(i, options['ips'], usernames, stop, statuses))
+            for i in range(options['attackers'])
+        ]
+
+        cpu_started, started = time.process_time(), time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'] / 2)
+        # Настоящий пользователь входит со своего адреса посреди атаки
+        login_started = time.perf_counter()
+        response = Client(REMOTE_ADDR='198.51.100.1').post(
+            reverse('login'), {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_USERNAME},
+        )
+        login_ms = (time.perf_counter() - login_started) * 1000
+        time.sleep(options['duration'] / 2)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+
+        metrics = throttle.get_metrics()
+        attempts = [value for values in statuses for value in values]
+        row = {
+            'attempts': len(attempts),
+            'rejected': sum(1 for status in attempts if status == 429),
+            # Без ограничения счетчики не ведутся: пароль проверяется при каждой попытке
+            'hashes': metrics[throttle.ALLOWED] if metrics[throttle.ALLOWED] else len(attempts) + 1,
+            'cpu_seconds': round(cpu, 2),
+            'cpu_cores': round(cpu / elapsed, 2),
+            # Включает и работу потоков атакующего (тестовый клиент в том же процессе)
+            'cpu_ms_per_attempt': round(cpu * 1000 / max(1, len(attempts)), 2),
+            'login_status': response.status_code,
+            'login_ms': round(login_ms, 1),
+        }
+        self.stdout.write(
+            f"  Попыток: {row['attempts']} ({row['attempts'] / elapsed:.0f}/с), отклонено: {row['rejected']}, "
+            f"проверок пароля: {row['hashes']}, блокировок: {metrics[throttle.LOCKOUTS]}"
+        )
+        self.stdout.write(
+            f"  Процессорное время: {row['cpu_seconds']} с за {elapsed:.1f} с ({row['cpu_cores']} ядра, "
+            f"{row['cpu_ms_per_attempt']} мс на попытку), "
+            f"вход пользователя: {row['login_status']} за {row['login_ms']} мс"
+        )
+        return row
+
+    @staticmethod
+    def attacker(index, ips, usernames, stop, statuses):
+        client = Client(REMOTE_ADDR=f'203.0.113.{index % ips + 1}')
+        url = reverse('login')
+        results = []
+        attempt = 0
+        try:
+            while not stop.is_set():
+                username = usernames[(index + attempt) % len(usernames)]
+                response = client.post(url, {'username': username, 'password': f'guess{attempt}'})
+                results.append(response.status_code)
+                attempt += 1
+        finally:
+            statuses.append(results)
+            close_old_connections()
+            connection.close()
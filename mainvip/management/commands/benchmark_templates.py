@@ -0,0 +1,111 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+
+from mainvip.models import Interaction, Organization, User, VIPClient
+
+# Строки таблиц так, как их выводят страницы: цикл с {% include %} шаблона строки
+CASES = [
+    ('Список клиентов', "{% for client in clients %}{% include 'projects/includes/vip_client_row.html' %}{% endfor %}"),
+    ('Лента взаимодействий',
+     "{% for interaction in interactions %}{% include 'projects/includes/interaction_row.html' %}{% endfor %}"),
+]
+
+# Шаблоны страницы списка клиентов, которые загружаются при каждом ее рендеринге
+PAGE_TEMPLATES = ['projects/vip_clients_list.html', 'base.html', 'projects/includes/vip_client_row.html']
+
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', PLAIN_LOADERS)]
+
+
+def timed(func, repeat):
+    """Медиана времени выполнения func в миллисекундах"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = ('Замер рендеринга шаблонов: строки длинных таблиц (цикл с {% include %} шаблона строки) '
+            'на 1 000 и 10 000 строк и загрузка шаблонов страницы — с кэширующим загрузчиком и без него. '
+            'Данные строятся в памяти, БД не используется')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000], help='Число строк таблицы')
+        parser.add_argument('--repeat', type=int, default=5, help='Число замеров на каждый вариант')
+        parser.add_argument('--loads', type=int, default=200, help='Число загрузок шаблонов страницы')
+
+    def handle(self, *args, **options):
+        default = Engine.get_default()
+        engines = {
+            name: Engine(dirs=default.dirs, loaders=loaders, libraries=default.libraries, builtins=default.builtins)
+            for name, loaders in (('без кэша', PLAIN_LOADERS), ('cached.Loader', CACHED_LOADERS))
+        }
+        summary = []
+        for rows in options['rows']:
+            context = Context(self.build_data(rows))
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nСтрок: {rows}"))
+            for title, code in CASES:
+                timings = {}
+                for name, engine in engines.items():
+                    template = engine.from_string(code)
+                    timings[name] = timed(lambda: template.render(context), options['repeat'])
+                plain_ms, cached_ms = timings['без кэша'], timings['cached.Loader']
+                self.stdout.write(
+                    f"  {title:<22} без кэша {plain_ms:8.1f} мс  cached.Loader {cached_ms:8.1f} мс  "
+                    f"({plain_ms / cached_ms:.1f}x)"
+                )
+                summary.append(f"{title.lower()}, {rows} строк: {plain_ms:.1f} → {cached_ms:.1f} мс")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nЗагрузка шаблонов страницы'))
+        loads = {}
+        for name, engine in engines.items():
+            def load():
+                for _ in range(options['loads']):
+                    for template_name in PAGE_TEMPLATES:
+                        engine.get_template(template_name)
+
+            loads[name] = timed(load, options['repeat']) / options['loads']
+            self.stdout.write(f"  {name:<22} {loads[name]:.3f} мс на страницу")
+        summary.append(f"загрузка шаблонов страницы: {loads['без кэша']:.2f} → {loads['cached.Loader']:.3f} мс")
+
+        self.stdout.write('')
+        for line in summary:
+            self.stdout.write(self.style.SUCCESS(f"✓ {line}"))
+
+    @staticmethod
+    def build_data(rows):
+        """Клиенты и взаимодействия в памяти, без записи в БД"""
+        statuses = [value for value, _ in VIPClient.STATUS_CHOICES]
+        types = [value for value, _ in Interaction.TYPE_CHOICES]
+        channels = [value for value, _ in Interaction.CHANNEL_CHOICES] + ['']
+        organizations = [Organization(pk=i, name=f'ООО "Организация {i}"') for i in range(1, 51)] + [None]
+        users = [User(pk=1, username='manager', full_name='Менеджер <отдела>'), User(pk=2, username='assistant'), None]
+        today = date.today()
+        clients = [
+            VIPClient(
+                pk=i, full_name=f'Иванов Иван {i}', position='Директор & учредитель', phone=f'+7 900 {i:07d}',
+                email=f'client{i}@example.com', organization=organizations[i % len(organizations)],
+                status=statuses[i % len(statuses)], interaction_count=i % 40,
+                last_interaction_date=today - timedelta(days=i % 365) if i % 7 else None,
+            )
+            for i in range(1, rows + 1)
+        ]
+        interactions = [
+            Interaction(
+                pk=i, vip_client=clients[0], date=today - timedelta(days=i % 365), type=types[i % len(types)],
+                channel=channels[i % len(channels)], user=users[i % len(users)],
+                description=f'Обсуждение "проекта" №{i}', result='Договорились' if i % 3 else '',
+            )
+            for i in range(1, rows + 1)
+        ]
+        return {'clients': clients, 'interactions': interactions}
@@ -0,0 +1,198 @@
+import json
+import logging
+import statistics
+import time
+from io import StringIO
+from urllib.parse import urlencode
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import URLPattern, reverse
+
+from mainvip import urls as mainvip_urls
+from mainvip.metrics import QueryRecorder, RequestMetrics
+from mainvip.models import User, VIPClient
+
+BENCHMARK_USERNAME = 'benchmark_user'
+
+# Дополнительные варианты запросов к страницам, кроме запроса без параметров
+EXTRA_CASES = [
+    ('vip_clients_list:search', 'vip_clients_list', {'search': 'петров'}),
+    ('vip_clients_list:status', 'vip_clients_list', {'status': 'active', 'sort': 'new'}),
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер всех страниц mainvip на наборах данных разного размера: '
+            'задержки, число SQL-запросов и время в БД. Результат сохраняется в JSON, '
+            'режим --compare завершается ошибкой при регрессии относительно базового файла')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Размеры набора данных в числе взаимодействий',
+        )
+        parser.add_argument('--interactions-per-client', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=20, help='Число замеров на каждую страницу')
+        parser.add_argument('--warmup', type=int, default=2, help='Число прогревочных запросов')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='benchmark.json', help='Файл для записи результатов')
+        parser.add_argument('--compare', metavar='BASELINE', help='Сравнить с базовым JSON-файлом')
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Допустимый относительный рост медианной задержки (0.25 = 25%%)',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=2.0,
+            help='Рост задержки меньше этого значения не считается регрессией (шум измерений)',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу после замеров',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Не удалось прочитать базовый файл: {e}')
+
+        # Построчный лог каждого запроса здесь не нужен, предупреждения N+1 остаются
+        logging.getLogger('mainvip.metrics').setLevel(logging.WARNING)
+
+        # Замеры выполняются на отдельной тестовой базе, рабочие данные не затрагиваются
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            results = {}
+            for size in options['sizes']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\nНабор данных: {size} взаимодействий"))
+                self.seed(size, options)
+                results[str(size)] = self.run_cases(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        report = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'vendor': connection.vendor,
+                'requests': options['requests'],
+                'interactions_per_client': options['interactions_per_client'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"\n✓ Результаты записаны в {options['output']}"))
+
+        if baseline is not None:
+            self.compare(baseline, report, options)
+
+    def seed(self, size, options):
+        """Заполняет тестовую базу данными заданного размера"""
+        started = time.perf_counter()
+        call_command('flush', interactive=False, verbosity=0)
+        per_client = options['interactions_per_client']
+        call_command(
+            'populate_data',
+            scale=max(1, size // max(1, per_client)),
+            interactions_per_client=per_client,
+            seed=options['seed'],
+            stdout=StringIO(),
+        )
+        User.objects.create_user(BENCHMARK_USERNAME, f'{BENCHMARK_USERNAME}@example.com', BENCHMARK_USERNAME,
+                                 full_name='Нагрузочный тест', is_staff=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f"  Данные подготовлены за {time.perf_counter() - started:.1f} с")
+
+    def get_cases(self):
+        """Список (название, URL) для всех страниц mainvip"""
+        # Клиент с наибольшим числом взаимодействий — худший случай для страницы клиента
+        client = (VIPClient.objects.annotate(total=Count('interaction'))
+                  .order_by('-total').values_list('pk', flat=True).first())
+        sample_kwargs = {'pk': client, 'client_pk': client}
+
+        cases = {}
+        for pattern in mainvip_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in cases:
+                continue
+            converters = pattern.pattern.converters
+            if any(sample_kwargs.get(name) is None for name in converters):
+                self.stdout.write(self.style.WARNING(f"  Пропуск {pattern.name}: нет тестовых аргументов"))
+                continue
+            cases[pattern.name] = reverse(pattern.name, kwargs={name: sample_kwargs[name] for name in converters})
+        for case_name, url_name, params in EXTRA_CASES:
+            cases[case_name] = f'{reverse(url_name)}?{urlencode(params)}'
+        return cases
+
+    def run_cases(self, options):
+        client = Client()
+        client.force_login(User.objects.get(username=BENCHMARK_USERNAME))
+        results = {}
+        for name, url in self.get_cases().items():
+            for _ in range(options['warmup']):
+                client.get(url)
+
+            latencies, query_counts, query_times = [], [], []
+            status = None
+            for _ in range(options['requests']):
+                request_metrics = RequestMetrics()
+                with connection.execute_wrapper(QueryRecorder(request_metrics)):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                status = response.status_code
+                query_counts.append(request_metrics.queries)
+                query_times.append(request_metrics.db_time * 1000)
+
+            results[name] = {
+                'url': url,
+                'status': status,
+                'p50_ms': round(statistics.median(latencies), 3),
+                'p95_ms': round(percentile(latencies, 0.95), 3),
+                'p99_ms': round(percentile(latencies, 0.99), 3),
+                'mean_ms': round(statistics.fmean(latencies), 3),
+                'queries': max(query_counts),
+                'query_ms': round(statistics.median(query_times), 3),
+            }
+            row = results[name]
+            self.stdout.write(
+                f"  {name:<32} {status}  p50 {row['p50_ms']:8.2f} мс  p95 {row['p95_ms']:8.2f} мс  "
+                f"p99 {row['p99_ms']:8.2f} мс  SQL {row['queries']:3d} / {row['query_ms']:7.2f} мс"
+            )
+        return results
+
+    def compare(self, baseline, report, options):
+        """Сравнение с базовыми результатами; регрессия завершает команду с ошибкой"""
+        regressions = []
+        for size, cases in report['results'].items():
+            base_cases = baseline.get('results', {}).get(size, {})
+            for name, current in cases.items():
+                base = base_cases.get(name)
+                if base is None:
+                    continue
+                delta = current['p50_ms'] - base['p50_ms']
+                if delta > options['min_delta_ms'] and current['p50_ms'] > base['p50_ms'] * (1 + options['threshold']):
+                    regressions.append(f"{size}/{name}: p50 {base['p50_ms']:.2f} → {current['p50_ms']:.2f} мс")
+                if current['queries'] > base['queries']:
+                    regressions.append(f"{size}/{name}: SQL-запросов {base['queries']} → {current['queries']}")
+
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(f"  ✗ {line}"))
+            raise CommandError(f'Обнаружены регрессии производительности: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS("✓ Регрессий относительно базовых результатов не обнаружено"))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mainvip import dedup
+from mainvip.models import VIPClient
+
+
+class Command(BaseCommand):
+    help = ('Ищет группы возможных дубликатов VIP-клиентов (общий email, телефон или похожее ФИО) '
+            'по ключам блокировки mainvip.dedup')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Перед поиском перестроить ключи всех клиентов')
+        parser.add_argument('--max-block', type=int, help='Наибольший сравниваемый блок (по умолчанию DEDUP_MAX_BLOCK_SIZE)')
+        parser.add_argument('--shown', type=int, default=20, help='Сколько групп вывести')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            started = time.perf_counter()
+            dedup.rebuild()
+            self.stdout.write(f"Ключи перестроены за {time.perf_counter() - started:.1f} с")
+
+        started = time.perf_counter()
+        result = dedup.find_groups(max_block=options['max_block'])
+        elapsed = time.perf_counter() - started
+
+        shown = result.groups[:options['shown']]
+        names = VIPClient.objects.in_bulk([pk for pks, _ in shown for pk in pks])
+        for number, (pks, kinds) in enumerate(shown, start=1):
+            matched = ', '.join(dedup.KIND_LABELS[kind] for kind in kinds)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Группа {number} (совпадает: {matched})"))
+            for pk in pks:
+                client = names.get(pk)
+                if client:
+                    self.stdout.write(f"  №{pk} {client.full_name}, {client.phone}, {client.email}")
+
+        self.stdout.write(
+            f"Ключей: {result.keys}, блоков: {result.blocks} (пропущено больших: {result.skipped_blocks}), "
+            f"сравнено пар по ФИО: {result.compared}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Найдено групп: {len(result.groups)}, клиентов в них: {result.clients} за {elapsed:.1f} с"
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mainvip.imports import import_clients
+
+
+class Command(BaseCommand):
+    help = 'Импортирует VIP-клиентов из CSV-файла (существующие клиенты обновляются по email)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к CSV-файлу')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пакета записи')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Кодировка файла')
+        parser.add_argument('--report', help='Куда записать отчет об ошибках (CSV)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], encoding=options['encoding'], newline='') as f:
+                result = import_clients(f, batch_size=options['batch_size'])
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть файл: {e}')
+        except UnicodeDecodeError as e:
+            raise CommandError(f'Неверная кодировка файла: {e}')
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Обработано строк: {result.rows}, записано: {result.imported} за {elapsed:.1f} с "
+            f"({result.rows / elapsed if elapsed else 0:,.0f} строк/с)"
+        ))
+        if result.error_count:
+            self.stdout.write(self.style.WARNING(f"  Строк с ошибками: {result.error_count}"))
+            if options['report']:
+                with open(options['report'], 'w', encoding='utf-8', newline='') as f:
+                    result.write_report(f)
+                self.stdout.write(f"  Отчет об ошибках: {options['report']}")
+            else:
+                for error in result.errors[:20]:
+                    self.stdout.write(f"  Строка {error['line']}: {error['error']}")
@@ -1,302 +1,460 @@
-from django.core.management.base import BaseCommand
-from django.contrib.auth.hashers import make_password
-from datetime import date, timedelta
-import random
-from mainvip.models import Organization, VIPClient, Interaction, User, Role
-
-
-class Command(BaseCommand):
-    help = 'Заполняет базу данных тестовыми данными'
-
-    def handle(self, *args, **options):
-        self.stdout.write("Начало заполнения базы данных...\n")
-        
-        # Создаем роли
-        roles = self.create_roles()
-        self.stdout.write("")
-        
-        # Создаем организации
-        organizations = self.create_organizations()
-        self.stdout.write("")
-        
-        # Создаем пользователей
-        user2 = self.create_users(roles)
-        all_users = list(User.objects.filter(is_active=True))
-        self.stdout.write("")
-        
-        # Создаем VIP-клиентов
-        clients = self.create_vip_clients(organizations)
-        self.stdout.write("")
-        
-        # Создаем взаимодействия
-        self.create_interactions(clients, all_users)
-        self.stdout.write("")
-        
-        self.stdout.write(self.style.SUCCESS("\n✓ Заполнение базы данных завершено!"))
-        self.stdout.write(f"\nСоздано:")
-        self.stdout.write(f"  - Организаций: {len(organizations)}")
-        self.stdout.write(f"  - VIP-клиентов: {len(clients)}")
-        self.stdout.write(f"  - Пользователей: {len(all_users)}")
-        self.stdout.write(f"\nДля входа используйте:")
-        self.stdout.write(f"  Логин: test_user2")
-        self.stdout.write(f"  Пароль: test_user2")
-
-    def create_roles(self):
-        """Создание ролей"""
-        roles_data = [
-            {'role_name': 'Администратор', 'permissions': 'Полный доступ к системе'},
-            {'role_name': 'Менеджер по работе с клиентами', 'permissions': 'Управление VIP-клиентами и взаимодействиями'},
-            {'role_name': 'Аналитик', 'permissions': 'Просмотр данных и формирование отчетов'},
-        ]
-        
-        roles = []
-        for role_data in roles_data:
-            role, created = Role.objects.get_or_create(
-                role_name=role_data['role_name'],
-                defaults=role_data
-            )
-            roles.append(role)
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"✓ Роль: {role.role_name}"))
-        
-        return roles
-
-    def create_organizations(self):
-        """Создание организаций"""
-        organizations = [
-            {
-                'name': 'ООО "Технологические Решения"',
-                'type': 'Партнерская организация',
-                'address': 'г. Москва, ул. Ленина, д. 10',
-                'website': 'https://tech-solutions.ru'
-            },
-            {
-                'name': 'АНО "Научно-Исследовательский Центр"',
-                'type': 'Научная организация',
-                'address': 'г. Санкт-Петербург, пр. Невский, д. 25',
-                'website': 'https://research-center.org'
-            },
-            {
-                'name': 'ГБУ "Инновационный Парк"',
-                'type': 'Государственная организация',
-                'address': 'г. Казань, ул. Баумана, д. 58',
-                'website': 'https://innopark.gov.ru'
-            },
-            {
-                'name': 'ООО "Цифровые Технологии"',
-                'type': 'IT-компания',
-                'address': 'г. Новосибирск, ул. Красный проспект, д. 15',
-                'website': 'https://digital-tech.com'
-            },
-            {
-                'name': 'ФГБОУ ВО "Университет Инноваций"',
-                'type': 'Образовательная организация',
-                'address': 'г. Екатеринбург, ул. Мира, д. 19',
-                'website': 'https://university-innov.ru'
-            },
-            {
-                'name': 'ООО "Бизнес Консалтинг Групп"',
-                'type': 'Консалтинговая компания',
-                'address': 'г. Москва, ул. Тверская, д. 7',
-                'website': 'https://bcg-consulting.ru'
-            },
-        ]
-        
-        created_orgs = []
-        for org_data in organizations:
-            org, created = Organization.objects.get_or_create(
-                name=org_data['name'],
-                defaults=org_data
-            )
-            created_orgs.append(org)
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"✓ Организация: {org.name}"))
-        
-        return created_orgs
-
-    def create_users(self, roles):
-        """Создание пользователей"""
-        user2, created = User.objects.get_or_create(
-            username='test_user2',
-            defaults={
-                'email': 'test_user2@example.com',
-                'full_name': 'Иванов Иван Иванович',
-                'password': make_password('test_user2'),
-                'is_staff': True,
-                'is_active': True,
-                'role': roles[1] if len(roles) > 1 else None,
-            }
-        )
-        if created:
-            self.stdout.write(self.style.SUCCESS(f"✓ Пользователь: {user2.username} ({user2.full_name})"))
-        
-        return user2
-
-    def create_vip_clients(self, organizations):
-        """Создание VIP-клиентов"""
-        vip_clients_data = [
-            {
-                'full_name': 'Петров Петр Петрович',
-                'position': 'Генеральный директор',
-                'phone': '+7 (495) 123-45-67',
-                'email': 'petrov@tech-solutions.ru',
-                'organization': organizations[0] if organizations else None,
-                'status': 'active',
-                'notes': 'Ключевой партнер по совместным проектам в области IT-разработки. Руководитель стратегических инициатив.'
-            },
-            {
-                'full_name': 'Сидорова Анна Владимировна',
-                'position': 'Руководитель научных проектов',
-                'phone': '+7 (812) 234-56-78',
-                'email': 'sidorova@research-center.org',
-                'organization': organizations[1] if len(organizations) > 1 else None,
-                'status': 'active',
-                'notes': 'Ответственное лицо за координацию научно-исследовательских проектов. Эксперт в области инновационных технологий.'
-            },
-            {
-                'full_name': 'Козлов Дмитрий Сергеевич',
-                'position': 'Директор инновационного парка',
-                'phone': '+7 (843) 345-67-89',
-                'email': 'kozlov@innopark.gov.ru',
-                'organization': organizations[2] if len(organizations) > 2 else None,
-                'status': 'active',
-                'notes': 'Руководитель государственного инновационного парка. Координатор совместных программ развития.'
-            },
-            {
-                'full_name': 'Морозова Елена Александровна',
-                'position': 'Технический директор',
-                'phone': '+7 (383) 456-78-90',
-                'email': 'morozova@digital-tech.com',
-                'organization': organizations[3] if len(organizations) > 3 else None,
-                'status': 'active',
-                'notes': 'Руководитель технических проектов. Партнер по разработке программного обеспечения.'
-            },
-            {
-                'full_name': 'Волков Сергей Николаевич',
-                'position': 'Проректор по научной работе',
-                'phone': '+7 (343) 567-89-01',
-                'email': 'volkov@university-innov.ru',
-                'organization': organizations[4] if len(organizations) > 4 else None,
-                'status': 'active',
-                'notes': 'Руководитель совместных образовательных и научных программ. Координатор академических проектов.'
-            },
-            {
-                'full_name': 'Новикова Мария Игоревна',
-                'position': 'Руководитель отдела партнерств',
-                'phone': '+7 (495) 678-90-12',
-                'email': 'novikova@bcg-consulting.ru',
-                'organization': organizations[5] if len(organizations) > 5 else None,
-                'status': 'active',
-                'notes': 'Ответственное лицо за развитие партнерских отношений. Эксперт по стратегическому планированию.'
-            },
-            {
-                'full_name': 'Лебедев Алексей Викторович',
-                'position': 'Заместитель генерального директора',
-                'phone': '+7 (495) 789-01-23',
-                'email': 'lebedev@tech-solutions.ru',
-                'organization': organizations[0] if organizations else None,
-                'status': 'active',
-                'notes': 'Куратор совместных проектов. Ответственное лицо за координацию взаимодействия.'
-            },
-            {
-                'full_name': 'Соколова Ольга Дмитриевна',
-                'position': 'Начальник отдела инноваций',
-                'phone': '+7 (812) 890-12-34',
-                'email': 'sokolova@research-center.org',
-                'organization': organizations[1] if len(organizations) > 1 else None,
-                'status': 'potential',
-                'notes': 'Потенциальный партнер по инновационным проектам. Эксперт в области исследований и разработок.'
-            },
-            {
-                'full_name': 'Федоров Игорь Борисович',
-                'position': 'Руководитель проектного офиса',
-                'phone': '+7 (843) 901-23-45',
-                'email': 'fedorov@innopark.gov.ru',
-                'organization': organizations[2] if len(organizations) > 2 else None,
-                'status': 'active',
-                'notes': 'Координатор проектных инициатив. Ответственное лицо за реализацию совместных программ.'
-            },
-            {
-                'full_name': 'Орлова Татьяна Сергеевна',
-                'position': 'Директор по развитию',
-                'phone': '+7 (383) 012-34-56',
-                'email': 'orlova@digital-tech.com',
-                'organization': organizations[3] if len(organizations) > 3 else None,
-                'status': 'active',
-                'notes': 'Руководитель стратегических направлений развития. Партнер по долгосрочным проектам.'
-            },
-            {
-                'full_name': 'Григорьев Владимир Петрович',
-                'position': 'Декан факультета информационных технологий',
-                'phone': '+7 (343) 123-45-67',
-                'email': 'grigoriev@university-innov.ru',
-                'organization': organizations[4] if len(organizations) > 4 else None,
-                'status': 'active',
-                'notes': 'Руководитель образовательных программ. Координатор академического сотрудничества.'
-            },
-        ]
-        
-        created_clients = []
-        for client_data in vip_clients_data:
-            client, created = VIPClient.objects.get_or_create(
-                email=client_data['email'],
-                defaults=client_data
-            )
-            created_clients.append(client)
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"✓ VIP-клиент: {client.full_name} ({client.position})"))
-        
-        return created_clients
-
-    def create_interactions(self, clients, users):
-        """Создание взаимодействий"""
-        interaction_types = ['meeting', 'email', 'call', 'project', 'agreement', 'other']
-        channels = ['phone', 'email', 'in_person', 'online', 'other']
-        
-        descriptions = [
-            'Обсуждение перспектив сотрудничества и совместных проектов',
-            'Согласование условий партнерского соглашения',
-            'Презентация новых технологических решений',
-            'Координация работы по совместному проекту',
-            'Обсуждение результатов проведенных исследований',
-            'Планирование дальнейших шагов взаимодействия',
-            'Согласование технических требований к проекту',
-            'Обсуждение вопросов финансирования и ресурсов',
-            'Презентация результатов работы',
-            'Координация встречи с ключевыми участниками проекта',
-        ]
-        
-        results = [
-            'Достигнута договоренность о дальнейшем сотрудничестве',
-            'Согласованы основные параметры проекта',
-            'Определены сроки реализации инициативы',
-            'Подготовлен план совместных действий',
-            'Получено одобрение на продолжение работы',
-            'Согласованы детали технического задания',
-            'Определены приоритетные направления',
-            'Достигнуто взаимопонимание по ключевым вопросам',
-            'Подготовлены материалы для следующего этапа',
-            'Согласована стратегия развития партнерства',
-        ]
-        
-        # Создаем несколько взаимодействий для разных клиентов
-        for i, client in enumerate(clients[:8]):  # Для первых 8 клиентов
-            num_interactions = random.randint(2, 5)
-            for j in range(num_interactions):
-                interaction_date = date.today() - timedelta(days=random.randint(1, 90))
-                interaction_type = random.choice(interaction_types)
-                channel = random.choice(channels) if interaction_type in ['meeting', 'call'] else None
-                
-                Interaction.objects.create(
-                    vip_client=client,
-                    user=random.choice(users) if users else None,
-                    date=interaction_date,
-                    type=interaction_type,
-                    channel=channel,
-                    description=random.choice(descriptions),
-                    result=random.choice(results),
-                )
-        
-        self.stdout.write(self.style.SUCCESS(f"✓ Создано взаимодействий для VIP-клиентов"))
-
-
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from datetime import date, timedelta
+import random
+import time
+from mainvip import cache, counters, dedup, summary
+from mainvip.models import Organization, VIPClient, Interaction, User, Role
+from mainvip.search import get_search_backend
+
+
+SURNAMES = [
+    'Иванов', 'Петров', 'Сидоров', 'Козлов', 'Волков', 'Новиков', 'Морозов', 'Лебедев',
+    'Соколов', 'Федоров', 'Орлов', 'Григорьев', 'Кузнецов', 'Попов', 'Смирнов', 'Васильев',
+]
+FIRST_NAMES = [
+    'Александр', 'Дмитрий', 'Сергей', 'Андрей', 'Алексей', 'Игорь', 'Владимир', 'Михаил',
+    'Анна', 'Елена', 'Мария', 'Ольга', 'Татьяна', 'Наталья', 'Ирина', 'Светлана',
+]
+PATRONYMICS = ['Александров', 'Дмитриев', 'Сергеев', 'Петров', 'Иванов', 'Викторов', 'Борисов', 'Игорев']
+POSITIONS = [
+    'Генеральный директор', 'Технический директор', 'Директор по развитию', 'Руководитель проектов',
+    'Заместитель директора', 'Начальник отдела', 'Проректор по научной работе', 'Ведущий эксперт',
+]
+ORGANIZATION_TYPES = [
+    'Партнерская организация', 'Научная организация', 'Государственная организация',
+    'IT-компания', 'Образовательная организация', 'Консалтинговая компания',
+]
+ORGANIZATION_FORMS = ['ООО', 'АО', 'АНО', 'ГБУ', 'ФГБОУ ВО']
+CITIES = ['Москва', 'Санкт-Петербург', 'Казань', 'Новосибирск', 'Екатеринбург', 'Нижний Новгород']
+STATUSES = ['active', 'active', 'active', 'potential', 'inactive', 'archived']
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу данных тестовыми данными'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=0,
+            help='Сгенерировать указанное число VIP-клиентов через bulk_create (нагрузочные данные)',
+        )
+        parser.add_argument(
+            '--organizations', type=int, default=None,
+            help='Число организаций в режиме --scale (по умолчанию — один на 50 клиентов)',
+        )
+        parser.add_argument(
+            '--interactions-per-client', type=int, default=10,
+            help='Среднее число взаимодействий на клиента в режиме --scale',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пакета для bulk_create')
+        parser.add_argument('--seed', type=int, default=42, help='Начальное значение генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        if options['scale']:
+            self.populate_scale(options)
+            return
+
+        self.stdout.write("Начало заполнения базы данных...\n")
+        
+        # Создаем роли
+        roles = self.create_roles()
+        self.stdout.write("")
+        
+        # Создаем организации
+        organizations = self.create_organizations()
+        self.stdout.write("")
+        
+        # Создаем пользователей
+        user2 = self.create_users(roles)
+        all_users = list(User.objects.filter(is_active=True))
+        self.stdout.write("")
+        
+        # Создаем VIP-клиентов
+        clients = self.create_vip_clients(organizations)
+        self.stdout.write("")
+        
+        # Создаем взаимодействия
+        self.create_interactions(clients, all_users)
+        self.stdout.write("")
+        
+        self.stdout.write(self.style.SUCCESS("\n✓ Заполнение базы данных завершено!"))
+        self.stdout.write(f"\nСоздано:")
+        self.stdout.write(f"  - Организаций: {len(organizations)}")
+        self.stdout.write(f"  - VIP-клиентов: {len(clients)}")
+        self.stdout.write(f"  - Пользователей: {len(all_users)}")
+        self.stdout.write(f"\nДля входа используйте:")
+        self.stdout.write(f"  Логин: test_user2")
+        self.stdout.write(f"  Пароль: test_user2")
+
+    def create_roles(self):
+        """Создание ролей"""
+        roles_data = [
+            {'role_name': 'Администратор', 'permissions': 'Полный доступ к системе'},
+            {'role_name': 'Менеджер по работе с клиентами', 'permissions': 'Управление VIP-клиентами и взаимодействиями'},
+            {'role_name': 'Аналитик', 'permissions': 'Просмотр данных и формирование отчетов'},
+        ]
+        
+        roles = []
+        for role_data in roles_data:
+            role, created = Role.objects.get_or_create(
+                role_name=role_data['role_name'],
+                defaults=role_data
+            )
+            roles.append(role)
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"✓ Роль: {role.role_name}"))
+        
+        return roles
+
+    def create_organizations(self):
+        """Создание организаций"""
+        organizations = [
+            {
+                'name': 'ООО "Технологические Решения"',
+                'type': 'Партнерская организация',
+                'address': 'г. Москва, ул. Ленина, д. 10',
+                'website': 'https://tech-solutions.ru'
+            },
+            {
+                'name': 'АНО "Научно-Исследовательский Центр"',
+                'type': 'Научная организация',
+                'address': 'г. Санкт-Петербург, пр. Невский, д. 25',
+                'website': 'https://research-center.org'
+            },
+            {
+                'name': 'ГБУ "Инновационный Парк"',
+                'type': 'Государственная организация',
+                'address': 'г. Казань, ул. Баумана, д. 58',
+                'website': 'https://innopark.gov.ru'
+            },
+            {
+                'name': 'ООО "Цифровые Технологии"',
+                'type': 'IT-компания',
+                'address': 'г. Новосибирск, ул. Красный проспект, д. 15',
+                'website': 'https://digital-tech.com'
+            },
+            {
+                'name': 'ФГБОУ ВО "Университет Инноваций"',
+                'type': 'Образовательная организация',
+                'address': 'г. Екатеринбург, ул. Мира, д. 19',
+                'website': 'https://university-innov.ru'
+            },
+            {
+                'name': 'ООО "Бизнес Консалтинг Групп"',
+                'type': 'Консалтинговая компания',
+                'address': 'г. Москва, ул. Тверская, д. 7',
+                'website': 'https://bcg-consulting.ru'
+            },
+        ]
+        
+        created_orgs = []
+        for org_data in organizations:
+            org, created = Organization.objects.get_or_create(
+                name=org_data['name'],
+                defaults=org_data
+            )
+            created_orgs.append(org)
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"✓ Организация: {org.name}"))
+        
+        return created_orgs
+
+    def create_users(self, roles):
+        """Создание пользователей"""
+        user2, created = User.objects.get_or_create(
+            username='test_user2',
+            defaults={
+                'email': 'test_user2@example.com',
+                'full_name': 'Иванов Иван Иванович',
+                'password': make_password('test_user2'),
+                'is_staff': True,
+                'is_active': True,
+                'role': roles[1] if len(roles) > 1 else None,
+            }
+        )
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"✓ Пользователь: {user2.username} ({user2.full_name})"))
+        
+        return user2
+
+    def create_vip_clients(self, organizations):
+        """Создание VIP-клиентов"""
+        vip_clients_data = [
+            {
+                'full_name': 'Петров Петр Петрович',
+                'position': 'Генеральный директор',
+                'phone': '+7 (495) 123-45-67',
+                'email': 'petrov@tech-solutions.ru',
+                'organization': organizations[0] if organizations else None,
+                'status': 'active',
+                'notes': 'Ключевой партнер по совместным проектам в области IT-разработки. Руководитель стратегических инициатив.'
+            },
+            {
+                'full_name': 'Сидорова Анна Владимировна',
+                'position': 'Руководитель научных проектов',
+                'phone': '+7 (812) 234-56-78',
+                'email': 'sidorova@research-center.org',
+                'organization': organizations[1] if len(organizations) > 1 else None,
+                'status': 'active',
+                'notes': 'Ответственное лицо за координацию научно-исследовательских проектов. Эксперт в области инновационных технологий.'
+            },
+            {
+                'full_name': 'Козлов Дмитрий Сергеевич',
+                'position': 'Директор инновационного парка',
+                'phone': '+7 (843) 345-67-89',
+                'email': 'kozlov@innopark.gov.ru',
+                'organization': organizations[2] if len(organizations) > 2 else None,
+                'status': 'active',
+                'notes': 'Руководитель государственного инновационного парка. Координатор совместных программ развития.'
+            },
+            {
+                'full_name': 'Морозова Елена Александровна',
+                'position': 'Технический директор',
+                'phone': '+7 (383) 456-78-90',
+                'email': 'morozova@digital-tech.com',
+                'organization': organizations[3] if len(organizations) > 3 else None,
+                'status': 'active',
+                'notes': 'Руководитель технических проектов. Партнер по разработке программного обеспечения.'
+            },
+            {
+                'full_name': 'Волков Сергей Николаевич',
+                'position': 'Проректор по научной работе',
+                'phone': '+7 (343) 567-89-01',
+                'email': 'volkov@university-innov.ru',
+                'organization': organizations[4] if len(organizations) > 4 else None,
+                'status': 'active',
+                'notes': 'Руководитель совместных образовательных и научных программ. Координатор академических проектов.'
+            },
+            {
+                'full_name': 'Новикова Мария Игоревна',
+                'position': 'Руководитель отдела партнерств',
+                'phone': '+7 (495) 678-90-12',
+                'email': 'novikova@bcg-consulting.ru',
+                'organization': organizations[5] if len(organizations) > 5 else None,
+                'status': 'active',
+                'notes': 'Ответственное лицо за развитие партнерских отношений. Эксперт по стратегическому планированию.'
+            },
+            {
+                'full_name': 'Лебедев Алексей Викторович',
+                'position': 'Заместитель генерального директора',
+                'phone': '+7 (495) 789-01-23',
+                'email': 'lebedev@tech-solutions.ru',
+                'organization': organizations[0] if organizations else None,
+                'status': 'active',
+                'notes': 'Куратор совместных проектов. Ответственное лицо за координацию взаимодействия.'
+            },
+            {
+                'full_name': 'Соколова Ольга Дмитриевна',
+                'position': 'Начальник отдела инноваций',
+                'phone': '+7 (812) 890-12-34',
+                'email': 'sokolova@research-center.org',
+                'organization': organizations[1] if len(organizations) > 1 else None,
+                'status': 'potential',
+                'notes': 'Потенциальный партнер по инновационным проектам. Эксперт в области исследований и разработок.'
+            },
+            {
+                'full_name': 'Федоров Игорь Борисович',
+                'position': 'Руководитель проектного офиса',
+                'phone': '+7 (843) 901-23-45',
+                'email': 'fedorov@innopark.gov.ru',
+                'organization': organizations[2] if len(organizations) > 2 else None,
+                'status': 'active',
+                'notes': 'Координатор проектных инициатив. Ответственное лицо за реализацию совместных программ.'
+            },
+            {
+                'full_name': 'Орлова Татьяна Сергеевна',
+                'position': 'Директор по развитию',
+                'phone': '+7 (383) 012-34-56',
+                'email': 'orlova@digital-tech.com',
+                'organization': organizations[3] if len(organizations) > 3 else None,
+                'status': 'active',
+                'notes': 'Руководитель стратегических направлений развития. Партнер по долгосрочным проектам.'
+            },
+            {
+                'full_name': 'Григорьев Владимир Петрович',
+                'position': 'Декан факультета информационных технологий',
+                'phone': '+7 (343) 123-45-67',
+                'email': 'grigoriev@university-innov.ru',
+                'organization': organizations[4] if len(organizations) > 4 else None,
+                'status': 'active',
+                'notes': 'Руководитель образовательных программ. Координатор академического сотрудничества.'
+            },
+        ]
+        
+        created_clients = []
+        for client_data in vip_clients_data:
+            client, created = VIPClient.objects.get_or_create(
+                email=client_data['email'],
+                defaults=client_data
+            )
+            created_clients.append(client)
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"✓ VIP-клиент: {client.full_name} ({client.position})"))
+        
+        return created_clients
+
+    def create_interactions(self, clients, users):
+        """Создание взаимодействий"""
+        interaction_types = ['meeting', 'email', 'call', 'project', 'agreement', 'other']
+        channels = ['phone', 'email', 'in_person', 'online', 'other']
+        
+        descriptions = [
+            'Обсуждение перспектив сотрудничества и совместных проектов',
+            'Согласование условий партнерского соглашения',
+            'Презентация новых технологических решений',
+            'Координация работы по совместному проекту',
+            'Обсуждение результатов проведенных исследований',
+            'Планирование дальнейших шагов взаимодействия',
+            'Согласование технических требований к проекту',
+            'Обсуждение вопросов финансирования и ресурсов',
+            'Презентация результатов работы',
+            'Координация встречи с ключевыми участниками проекта',
+        ]
+        
+        results = [
+            'Достигнута договоренность о дальнейшем сотрудничестве',
+            'Согласованы основные параметры проекта',
+            'Определены сроки реализации инициативы',
+            'Подготовлен план совместных действий',
+            'Получено одобрение на продолжение работы',
+            'Согласованы детали технического задания',
+            'Определены приоритетные направления',
+            'Достигнуто взаимопонимание по ключевым вопросам',
+            'Подготовлены материалы для следующего этапа',
+            'Согласована стратегия развития партнерства',
+        ]
+        
+        # Создаем несколько взаимодействий для разных клиентов
+        for i, client in enumerate(clients[:8]):  # Для первых 8 клиентов
+            num_interactions = random.randint(2, 5)
+            for j in range(num_interactions):
+                interaction_date = date.today() - timedelta(days=random.randint(1, 90))
+                interaction_type = random.choice(interaction_types)
+                channel = random.choice(channels) if interaction_type in ['meeting', 'call'] else None
+                
+                Interaction.objects.create(
+                    vip_client=client,
+                    user=random.choice(users) if users else None,
+                    date=interaction_date,
+                    type=interaction_type,
+                    channel=channel,
+                    description=random.choice(descriptions),
+                    result=random.choice(results),
+                )
+        
+        self.stdout.write(self.style.SUCCESS(f"✓ Создано взаимодействий для VIP-клиентов"))
+
+    def populate_scale(self, options):
+        """Генерация больших объемов данных для нагрузочного тестирования"""
+        scale = options['scale']
+        batch_size = options['batch_size']
+        per_client = options['interactions_per_client']
+        if scale < 0 or batch_size < 1 or per_client < 0:
+            raise CommandError('Параметры --scale, --batch-size и --interactions-per-client должны быть положительными')
+        organizations_count = options['organizations'] or max(1, scale // 50)
+        rng = random.Random(options['seed'])
+
+        self.stdout.write(f"Генерация данных: {scale} клиентов, {organizations_count} организаций, "
+                          f"~{scale * per_client} взаимодействий (пакет {batch_size}, seed {options['seed']})\n")
+        started = time.perf_counter()
+
+        roles = self.create_roles()
+        self.create_users(roles)
+        user_ids = list(User.objects.filter(is_active=True).values_list('pk', flat=True))
+
+        organization_ids = self.bulk_organizations(rng, organizations_count, batch_size)
+        clients_created, interactions_created = self.bulk_clients(
+            rng, scale, organization_ids, user_ids, per_client, batch_size,
+        )
+
+        self.stdout.write("Пересчет счетчиков, сводки по взаимодействиям, поискового индекса и ключей дубликатов...")
+        counters.rebuild()
+        summary.rebuild()
+        get_search_backend().rebuild()
+        dedup.rebuild()
+        # bulk_create не отправляет сигналы — сбрасываем кэш вручную
+        cache.bump(cache.ORGANIZATION, cache.VIP_CLIENT, cache.INTERACTION, cache.REPORTS)
+
+        elapsed = time.perf_counter() - started
+        total = organizations_count + clients_created + interactions_created
+        self.stdout.write(self.style.SUCCESS(f"\n✓ Создано строк: {total} за {elapsed:.1f} с ({total / elapsed:,.0f} строк/с)"))
+        self.stdout.write(f"  - Организаций: {organizations_count}")
+        self.stdout.write(f"  - VIP-клиентов: {clients_created}")
+        self.stdout.write(f"  - Взаимодействий: {interactions_created}")
+
+    def report_progress(self, message, rows, started):
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f"  {message} ({rate:,.0f} строк/с)")
+
+    def bulk_organizations(self, rng, count, batch_size):
+        """Пакетное создание организаций, возвращает их идентификаторы"""
+        started = time.perf_counter()
+        first_number = (Organization.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        ids = []
+        for offset in range(0, count, batch_size):
+            batch = []
+            for number in range(first_number + offset, first_number + min(offset + batch_size, count)):
+                batch.append(Organization(
+                    name=f'{rng.choice(ORGANIZATION_FORMS)} "Организация {number}"',
+                    type=rng.choice(ORGANIZATION_TYPES),
+                    address=f'г. {rng.choice(CITIES)}, ул. Центральная, д. {rng.randint(1, 200)}',
+                    website=f'https://org{number}.example.ru',
+                ))
+            with transaction.atomic():
+                ids += [organization.pk for organization in Organization.objects.bulk_create(batch)]
+            self.report_progress(f'Организации: {len(ids)}/{count}', len(ids), started)
+        return ids
+
+    def bulk_clients(self, rng, count, organization_ids, user_ids, per_client, batch_size):
+        """Пакетное создание клиентов и их взаимодействий"""
+        interaction_types = [value for value, _ in Interaction.TYPE_CHOICES]
+        channels = [value for value, _ in Interaction.CHANNEL_CHOICES]
+        today = date.today()
+        first_number = (VIPClient.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+        started = time.perf_counter()
+        clients_created = interactions_created = 0
+        for offset in range(0, count, batch_size):
+            batch = []
+            for number in range(first_number + offset, first_number + min(offset + batch_size, count)):
+                first_name = rng.choice(FIRST_NAMES)
+                female = first_name.endswith('а') or first_name.endswith('я')
+                surname = rng.choice(SURNAMES) + ('а' if female else '')
+                patronymic = rng.choice(PATRONYMICS) + ('на' if female else 'ич')
+                batch.append(VIPClient(
+                    full_name=f'{surname} {first_name} {patronymic}',
+                    position=rng.choice(POSITIONS),
+                    phone=f'+7 ({rng.randint(300, 999)}) {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}',
+                    email=f'client{number}@example.ru',
+                    organization_id=rng.choice(organization_ids) if organization_ids else None,
+                    status=rng.choice(STATUSES),
+                ))
+
+            # Клиенты пакета и их взаимодействия записываются одной транзакцией
+            with transaction.atomic():
+                VIPClient.objects.bulk_create(batch)
+                interactions = []
+                for client in batch:
+                    for _ in range(rng.randint(0, per_client * 2)):
+                        interaction_type = rng.choice(interaction_types)
+                        interactions.append(Interaction(
+                            vip_client_id=client.pk,
+                            user_id=rng.choice(user_ids) if user_ids else None,
+                            date=today - timedelta(days=rng.randint(0, 730)),
+                            type=interaction_type,
+                            channel=rng.choice(channels) if interaction_type in ('meeting', 'call') else None,
+                            description=f'Взаимодействие по проекту {rng.randint(1, 1000)}',
+                            result=f'Результат этапа {rng.randint(1, 10)}',
+                        ))
+                Interaction.objects.bulk_create(interactions, batch_size=batch_size)
+            clients_created += len(batch)
+            interactions_created += len(interactions)
+            self.report_progress(
+                f'VIP-клиенты: {clients_created}/{count}, взаимодействия: {interactions_created}',
+                clients_created + interactions_created, started,
+            )
+        return clients_created, interactions_created
+
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from mainvip import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики дашборда с нуля'
+
+    def handle(self, *args, **options):
+        counters.rebuild()
+        for name, value in counters.get_counters().items():
+            self.stdout.write(f"  - {name}: {value}")
+        self.stdout.write(self.style.SUCCESS("✓ Счетчики пересчитаны"))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mainvip import summary
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводку по взаимодействиям клиентов (дата последнего контакта, число по типам)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('client_ids', nargs='*', type=int, help='Идентификаторы клиентов (по умолчанию все)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summary.rebuild(options['client_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"✓ Сводка по взаимодействиям пересчитана за {time.perf_counter() - started:.1f} с"))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mainvip.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс VIP-клиентов'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        get_search_backend().rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✓ Поисковый индекс перестроен за {elapsed:.1f} с"))
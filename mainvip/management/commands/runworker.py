@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from mainvip import jobs, worker
+
+# Как часто искать задачи, брошенные аварийно завершившимися обработчиками, с
+STALE_CHECK_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = ('Обработчик фоновых задач: забирает задачи из таблицы jobs и выполняет их в пуле процессов. '
+            'Останавливается по SIGINT/SIGTERM, дождавшись выполняемых задач')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOBS_WORKERS,
+                            help='Число процессов (по умолчанию JOBS_WORKERS или число ядер)')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help='Пауза между проверками пустой очереди, с')
+        parser.add_argument('--burst', action='store_true', help='Выполнить задачи из очереди и завершиться')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or os.cpu_count() or 1
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Обработчик {self.name} запущен, процессов: {workers}"))
+        processed = 0
+        while not self.stopping:
+            # Новые процессы запускаются через spawn: унаследованное соединение с БД
+            # нельзя использовать в дочернем процессе
+            connection.close()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=worker.init,
+                max_tasks_per_child=settings.JOBS_MAX_TASKS_PER_CHILD,
+            ) as pool:
+                processed += self.serve(pool, workers, options)
+        self.stdout.write(self.style.SUCCESS(f"✓ Обработчик остановлен, выполнено задач: {processed}"))
+
+    def stop(self, signum, frame):
+        if not self.stopping:
+            self.stdout.write("Остановка: новые задачи не берутся, ожидание выполняемых...")
+        self.stopping = True
+
+    def serve(self, pool, workers, options):
+        """Раздает задачи процессам пула, пока не остановлен (или пул не сломался)"""
+        running = {}
+        processed = 0
+        last_stale_check = 0.0
+        while True:
+            close_old_connections()
+            if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL:
+                for job_id in jobs.requeue_stale(settings.JOBS_STALE_TIMEOUT):
+                    self.stdout.write(self.style.WARNING(f"  Задача #{job_id} брошена обработчиком, возвращена в очередь"))
+                last_stale_check = time.monotonic()
+
+            while not self.stopping and len(running) < workers:
+                job_id = jobs.claim(self.name)
+                if job_id is None:
+                    break
+                running[pool.submit(worker.run, job_id)] = job_id
+                self.stdout.write(f"  Задача #{job_id} запущена")
+
+            if not running:
+                if self.stopping or options['burst']:
+                    self.stopping = True
+                    return processed
+                time.sleep(options['poll_interval'])
+                continue
+
+            done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job_id = running.pop(future)
+                processed += 1
+                try:
+                    succeeded = future.result()
+                except BrokenProcessPool as e:
+                    # Процесс пула завершился аварийно (например, нехватка памяти)
+                    broken = True
+                    jobs.fail(job_id, f'Процесс обработчика завершился аварийно: {e}')
+                    succeeded = False
+                except Exception as e:
+                    jobs.fail(job_id, repr(e))
+                    succeeded = False
+                status = self.style.SUCCESS('выполнена') if succeeded else self.style.ERROR('ошибка')
+                self.stdout.write(f"  Задача #{job_id}: {status}")
+            if broken:
+                for future, job_id in running.items():
+                    jobs.fail(job_id, 'Процесс обработчика завершился аварийно')
+                return processed
@@ -0,0 +1,116 @@
+"""Сбор метрик запроса: время в БД, число SQL-запросов, время рендеринга шаблонов.
+
+Метрики текущего запроса хранятся в ContextVar, чтобы их могли дополнять
+обертка ``connection.execute_wrapper`` и бэкенд шаблонов, не зная
+ничего о middleware (см. ``mainvip.middleware.RequestMetricsMiddleware``).
+
+Обертка ``record_query`` ставится на каждое соединение один раз, при его
+открытии (сигнал ``connection_created``). Соединения потока общие для всех
+запросов, которые он обслуживает (в том числе для одновременных async-запросов),
+а ContextVar у каждого запроса свой, поэтому запросы не учитываются чужими метриками.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates
+
+_current_metrics = ContextVar('mainvip_request_metrics', default=None)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Форма запроса без конкретных значений — для поиска повторов (N+1)"""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """Метрики одного запроса"""
+
+    def __init__(self, track_shapes=False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.shapes = Counter() if track_shapes else None
+
+    def repeated_queries(self, threshold):
+        """Формы запросов, выполненных не менее threshold раз"""
+        if self.shapes is None:
+            return []
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def get_current_metrics():
+    return _current_metrics.get()
+
+
+def activate(metrics):
+    """Делает metrics текущими; возвращает токен для deactivate"""
+    return _current_metrics.set(metrics)
+
+
+def deactivate(token):
+    _current_metrics.reset(token)
+
+
+class QueryRecorder:
+    """Обертка для ``connection.execute_wrapper``: учитывает каждый SQL-запрос"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.db_time += time.perf_counter() - started
+            self.metrics.queries += 1
+            if self.metrics.shapes is not None:
+                self.metrics.shapes[normalize_sql(sql)] += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """Постоянная обертка соединения: учитывает SQL-запрос в метриках текущего запроса, если они есть"""
+    metrics = get_current_metrics()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return QueryRecorder(metrics)(execute, sql, params, many, context)
+
+
+class TimedTemplate:
+    """Шаблон, засекающий время своего рендеринга"""
+
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        metrics = get_current_metrics()
+        if metrics is None:
+            return self._template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Стандартный бэкенд шаблонов Django с учетом времени рендеринга"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,138 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import audit, metrics
+
+logger = logging.getLogger('mainvip.metrics')
+
+
+class RequestMetricsMiddleware:
+    """Замер времени запроса, SQL-запросов и рендеринга шаблонов.
+
+    Результат пишется в лог ``mainvip.metrics`` одной JSON-строкой с уровнем
+    DEBUG, а при ``REQUEST_METRICS_SERVER_TIMING`` отдается и заголовком
+    ``Server-Timing``. Если одинаковый по форме запрос повторяется не меньше
+    ``REQUEST_METRICS_NPLUSONE_THRESHOLD`` раз, в лог пишется предупреждение
+    о вероятной проблеме N+1.
+
+    Потоковый ответ (выгрузки) формирует тело уже после выхода из middleware,
+    поэтому его метрики собираются во время отправки тела и пишутся в лог
+    после нее; заголовок ``Server-Timing`` у такого ответа не ставится.
+    Асинхронный потоковый ответ замеряется только до начала отправки тела.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.nplusone_threshold = settings.REQUEST_METRICS_NPLUSONE_THRESHOLD
+        self.server_timing = settings.REQUEST_METRICS_SERVER_TIMING
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics = metrics.RequestMetrics(track_shapes=self.nplusone_threshold > 0)
+        token = metrics.activate(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self.finish(request, response, request_metrics, started)
+
+    async def __acall__(self, request):
+        # SQL-запросы учитывает metrics.record_query, постоянно установленная на соединениях:
+        # потоки sync_to_async получают копию контекста, а с ней и метрики этого запроса
+        request_metrics = metrics.RequestMetrics(track_shapes=self.nplusone_threshold > 0)
+        token = metrics.activate(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self.finish(request, response, request_metrics, started)
+
+    def finish(self, request, response, request_metrics, started):
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, request_metrics, started,
+            )
+        else:
+            self.report(request, response, request_metrics, time.perf_counter() - started)
+        return response
+
+    def stream(self, content, request, response, request_metrics, started):
+        """Тело потокового ответа: запросы к БД при его формировании учитываются в метриках запроса"""
+        chunks = iter(content)
+        try:
+            while True:
+                token = metrics.activate(request_metrics)
+                try:
+                    chunk = next(chunks, None)
+                finally:
+                    metrics.deactivate(token)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.report(request, response, request_metrics, time.perf_counter() - started)
+
+    def report(self, request, response, request_metrics, total):
+        if self.server_timing and not response.streaming:
+            response['Server-Timing'] = ', '.join([
+                f'total;dur={total * 1000:.1f}',
+                f'db;dur={request_metrics.db_time * 1000:.1f};desc="{request_metrics.queries} queries"',
+                f'tpl;dur={request_metrics.template_time * 1000:.1f}',
+            ])
+
+        logger.debug(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(request_metrics.db_time * 1000, 2),
+            'queries': request_metrics.queries,
+            'template_ms': round(request_metrics.template_time * 1000, 2),
+        }, ensure_ascii=False))
+
+        if self.nplusone_threshold > 0:
+            for shape, count in request_metrics.repeated_queries(self.nplusone_threshold):
+                logger.warning(json.dumps({
+                    'event': 'n_plus_one',
+                    'path': request.path,
+                    'count': count,
+                    'sql': shape,
+                }, ensure_ascii=False))
+
+
+class AuditUserMiddleware:
+    """Изменения, сделанные при обработке запроса, записываются в журнал от имени его пользователя,
+    одним INSERT в конце запроса"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Пользователь передается функцией: asgiref сравнивает значения контекстных
+        # переменных и вычислил бы ленивый request.user в async-контексте
+        with audit.actor(lambda: request.user), audit.collect():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with audit.actor(lambda: request.user):
+            async with audit.acollect():
+                return await self.get_response(request)
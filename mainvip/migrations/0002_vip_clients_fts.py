@@ -0,0 +1,68 @@
+import re
+
+from django.db import migrations
+
+# Копия функций mainvip.search на момент миграции: миграция не должна
+# зависеть от того, как индекс заполняется в текущей версии кода
+FTS_TABLE = 'vip_clients_fts'
+
+
+def normalize_text(value):
+    return (value or '').lower().replace('ё', 'е')
+
+
+def phone_tokens(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    if not digits:
+        return []
+    tokens = [digits]
+    if len(digits) == 11 and digits[0] in '78':
+        national = digits[1:]
+        tokens += ['7' + national, '8' + national, national]
+    if len(digits) > 7:
+        tokens.append(digits[-7:])
+    return list(dict.fromkeys(tokens))
+
+
+def build_document(full_name, email, position, phone):
+    return (
+        normalize_text(full_name),
+        normalize_text(email),
+        normalize_text(position),
+        ' '.join(phone_tokens(phone)),
+    )
+
+
+def create_fts_table(apps, schema_editor):
+    """Создает индекс FTS5 и заполняет его существующими клиентами (только SQLite)"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    VIPClient = apps.get_model('mainvip', 'VIPClient')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(full_name, email, position, phone, tokenize='unicode61 remove_diacritics 0')"
+        )
+        rows = VIPClient.objects.values_list('pk', 'full_name', 'email', 'position', 'phone')
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, full_name, email, position, phone) VALUES (%s, %s, %s, %s, %s)',
+            [(pk, *build_document(*values)) for pk, *values in rows.iterator()],
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
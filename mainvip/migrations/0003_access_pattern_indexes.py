@@ -0,0 +1,29 @@
+# Generated by Django 6.0.9 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0002_vip_clients_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['vip_client', '-date'], name='interactions_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['-date'], name='interactions_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vipclient',
+            index=models.Index(fields=['status', 'vip_id'], name='vip_clients_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vipclient',
+            index=models.Index(fields=['full_name', 'vip_id'], name='vip_clients_name_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.9 on 2026-10-18 05:50
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    Counter = apps.get_model('mainvip', 'Counter')
+    VIPClient = apps.get_model('mainvip', 'VIPClient')
+    Organization = apps.get_model('mainvip', 'Organization')
+    Counter.objects.bulk_create([
+        Counter(name='total_clients', value=VIPClient.objects.count()),
+        Counter(name='active_clients', value=VIPClient.objects.filter(status='active').count()),
+        Counter(name='total_organizations', value=Organization.objects.count()),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0003_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Название')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'Счетчик',
+                'verbose_name_plural': 'Счетчики',
+                'db_table': 'counters',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
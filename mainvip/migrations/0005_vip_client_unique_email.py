@@ -0,0 +1,49 @@
+# Generated by Django 6.0.9 on 2026-10-18 05:56
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+# Сколько повторяющихся email показывать в сообщении об ошибке
+SHOWN_EMAILS = 20
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """Останавливает миграцию, если email клиентов повторяются без учета регистра.
+
+    Клиенты с одинаковым email не объединяются автоматически: это деловые
+    записи, и решать, какие данные оставить, должен человек.
+    """
+    VIPClient = apps.get_model('mainvip', 'VIPClient')
+    duplicates = list(
+        VIPClient.objects.annotate(email_lower=Lower('email')).order_by('email_lower')
+        .values('email_lower').annotate(total=Count('pk')).filter(total__gt=1)
+        .values_list('email_lower', 'total')
+    )
+    if duplicates:
+        shown = ', '.join(f'{email} ({total})' for email, total in duplicates[:SHOWN_EMAILS])
+        more = f' и еще {len(duplicates) - SHOWN_EMAILS}' if len(duplicates) > SHOWN_EMAILS else ''
+        raise RuntimeError(
+            f'Нельзя добавить уникальный email VIP-клиентов: email повторяется у нескольких клиентов '
+            f'без учета регистра — {shown}{more}. Объедините или исправьте этих клиентов вручную '
+            f'и повторите migrate.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0004_counters'),
+    ]
+
+    operations = [
+        # Без этой проверки ограничение падает на первом же повторе с малопонятной ошибкой БД
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='vipclient',
+            constraint=models.UniqueConstraint(
+                Lower('email'), name='unique_vip_client_email_ci',
+                violation_error_message='VIP-клиент с таким email уже существует',
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.9 on 2026-10-18 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0005_vip_client_unique_email'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['vip_client', '-date', '-interaction_id'], name='interactions_timeline_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='interaction',
+            name='interactions_client_date_idx',
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.9 on 2026-10-18 06:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_summary(apps, schema_editor):
+    VIPClient = apps.get_model('mainvip', 'VIPClient')
+    Interaction = apps.get_model('mainvip', 'Interaction')
+    InteractionTypeCount = apps.get_model('mainvip', 'InteractionTypeCount')
+    interactions = Interaction.objects.filter(vip_client=OuterRef('pk'))
+    VIPClient.objects.update(
+        interaction_count=Coalesce(Subquery(
+            interactions.order_by().values('vip_client').annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ), 0),
+        last_interaction_date=Subquery(interactions.order_by('-date').values('date')[:1]),
+    )
+    rows = Interaction.objects.order_by().values_list('vip_client_id', 'type').annotate(total=Count('pk'))
+    InteractionTypeCount.objects.bulk_create(
+        (InteractionTypeCount(vip_client_id=client_id, type=interaction_type, count=total)
+         for client_id, interaction_type, total in rows.iterator()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0006_interaction_timeline_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InteractionTypeCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('meeting', 'Встреча'), ('email', 'Письмо'), ('call', 'Звонок'), ('project', 'Участие в проекте'), ('agreement', 'Согласование'), ('other', 'Другое')], max_length=50, verbose_name='Тип взаимодействия')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Число взаимодействий по типу',
+                'verbose_name_plural': 'Число взаимодействий по типам',
+                'db_table': 'interaction_type_counts',
+            },
+        ),
+        migrations.AddField(
+            model_name='vipclient',
+            name='interaction_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число взаимодействий'),
+        ),
+        migrations.AddField(
+            model_name='vipclient',
+            name='last_interaction_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Дата последнего взаимодействия'),
+        ),
+        migrations.AddIndex(
+            model_name='vipclient',
+            index=models.Index(fields=['last_interaction_date', 'vip_id'], name='vip_clients_last_contact_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vipclient',
+            index=models.Index(fields=['interaction_count', 'vip_id'], name='vip_clients_interactions_idx'),
+        ),
+        migrations.AddField(
+            model_name='interactiontypecount',
+            name='vip_client',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='type_counts', to='mainvip.vipclient', verbose_name='VIP-клиент'),
+        ),
+        migrations.AddConstraint(
+            model_name='interactiontypecount',
+            constraint=models.UniqueConstraint(fields=('vip_client', 'type'), name='unique_interaction_type_count'),
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
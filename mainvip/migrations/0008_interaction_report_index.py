@@ -0,0 +1,21 @@
+# Generated by Django 6.0.9 on 2026-10-18 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0007_interaction_summary'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='interaction',
+            name='interactions_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['date', 'type', 'channel', 'user', 'vip_client'], name='interactions_report_idx'),
+        ),
+    ]
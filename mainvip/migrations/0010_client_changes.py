@@ -0,0 +1,36 @@
+# Generated by Django 6.0.9 on 2026-10-18 06:33
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0009_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientChange',
+            fields=[
+                ('change_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('vip_client_id', models.IntegerField(verbose_name='Клиент')),
+                ('client_name', models.CharField(max_length=200, verbose_name='ФИО клиента')),
+                ('action', models.CharField(choices=[('create', 'Создание'), ('update', 'Изменение'), ('delete', 'Удаление'), ('import', 'Импорт')], max_length=20, verbose_name='Действие')),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Изменения')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время изменения')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Изменение клиента',
+                'verbose_name_plural': 'Журнал изменений клиентов',
+                'db_table': 'client_changes',
+                'ordering': ['-changed_at', '-change_id'],
+                'indexes': [models.Index(fields=['vip_client_id', 'changed_at'], name='client_changes_client_idx'), models.Index(fields=['changed_at'], name='client_changes_date_idx')],
+            },
+        ),
+    ]
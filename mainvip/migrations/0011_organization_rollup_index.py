@@ -0,0 +1,23 @@
+# Generated by Django 6.0.9 on 2026-10-18 06:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0010_client_changes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vipclient',
+            name='organization',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='mainvip.organization', verbose_name='Организация'),
+        ),
+        migrations.AddIndex(
+            model_name='vipclient',
+            index=models.Index(fields=['organization', 'status', 'last_interaction_date'], name='vip_clients_org_rollup_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.9 on 2026-10-18 06:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from mainvip.dedup import BATCH_SIZE, build_keys
+
+
+def fill_dedup_keys(apps, schema_editor):
+    """Строит ключи поиска дубликатов для существующих клиентов"""
+    VIPClient = apps.get_model('mainvip', 'VIPClient')
+    ClientDedupKey = apps.get_model('mainvip', 'ClientDedupKey')
+    rows = VIPClient.objects.values_list('pk', 'full_name', 'phone', 'email')
+    keys = (
+        ClientDedupKey(vip_client_id=pk, kind=kind, key=key)
+        for pk, *values in rows.iterator(chunk_size=BATCH_SIZE)
+        for kind, key in sorted(build_keys(*values))
+    )
+    ClientDedupKey.objects.bulk_create(keys, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainvip', '0011_organization_rollup_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientDedupKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('email', 'Email'), ('phone', 'Телефон'), ('name', 'ФИО')], max_length=10, verbose_name='Вид ключа')),
+                ('key', models.CharField(max_length=100, verbose_name='Ключ')),
+                ('vip_client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dedup_keys', to='mainvip.vipclient', verbose_name='VIP-клиент')),
+            ],
+            options={
+                'verbose_name': 'Ключ поиска дубликатов',
+                'verbose_name_plural': 'Ключи поиска дубликатов',
+                'db_table': 'client_dedup_keys',
+                'indexes': [models.Index(fields=['kind', 'key', 'vip_client'], name='client_dedup_keys_block_idx')],
+            },
+        ),
+        migrations.RunPython(fill_dedup_keys, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 
 class Role(models.Model):
@@ -52,7 +55,29 @@ class Organization(models.Model):
         return self.name
 
 
-class VIPClient(models.Model):
+class LoadedValuesMixin:
+    """Запоминает значения полей на момент загрузки из БД (``_loaded_values``).
+
+    Нужны обработчикам сигналов, чтобы понять, какие поля изменились при сохранении.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+
+def normalize_email(value):
+    """Email в том виде, в котором он хранится: без пробелов по краям, в нижнем регистре"""
+    return (value or '').strip().lower()
+
+
+class VIPClient(LoadedValuesMixin, models.Model):
     """VIP-клиент"""
     STATUS_CHOICES = [
         ('active', 'Активный'),
@@ -66,20 +91,85 @@ class VIPClient(models.Model):
     position = models.CharField(max_length=200, verbose_name='Должность')
     phone = models.CharField(max_length=20, verbose_name='Контактный телефон')
     email = models.EmailField(max_length=100, verbose_name='Электронная почта')
-    organization = models.ForeignKey(Organization, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Организация')
+    # Отдельный индекс внешнего ключа не нужен: organization_id — первый столбец vip_clients_org_rollup_idx
+    organization = models.ForeignKey(Organization, on_delete=models.SET_NULL, null=True, blank=True, db_index=False,
+                                     verbose_name='Организация')
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='active', verbose_name='Статус')
     notes = models.TextField(blank=True, null=True, verbose_name='Дополнительная информация')
+    # Сводка по взаимодействиям, поддерживается mainvip.summary
+    last_interaction_date = models.DateField(blank=True, null=True, editable=False, verbose_name='Дата последнего взаимодействия')
+    interaction_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Число взаимодействий')
+
+    SUMMARY_FIELDS = ('last_interaction_date', 'interaction_count')
+
+    def clean(self):
+        super().clean()
+        self.email = normalize_email(self.email)
+
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        # Сводка обновляется атомарными UPDATE из mainvip.summary — обычное
+        # сохранение клиента не должно перезаписать ее устаревшими значениями
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in self.SUMMARY_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = 'VIP-клиент'
         verbose_name_plural = 'VIP-клиенты'
         db_table = 'vip_clients'
+        indexes = [
+            # Фильтр по статусу со стабильной сортировкой по ключу
+            models.Index(fields=['status', 'vip_id'], name='vip_clients_status_idx'),
+            # Сортировка списка по ФИО (keyset-пагинация)
+            models.Index(fields=['full_name', 'vip_id'], name='vip_clients_name_idx'),
+            # Сортировка и фильтр по дате последнего контакта («давно не общались»)
+            models.Index(fields=['last_interaction_date', 'vip_id'], name='vip_clients_last_contact_idx'),
+            # Сортировка по числу взаимодействий
+            models.Index(fields=['interaction_count', 'vip_id'], name='vip_clients_interactions_idx'),
+            # Сводка по организациям (mainvip.views.organizations_with_rollups) читается только из индекса
+            models.Index(fields=['organization', 'status', 'last_interaction_date'], name='vip_clients_org_rollup_idx'),
+        ]
+        # Email — естественный ключ клиента, по нему выполняется импорт с обновлением.
+        # Регистр не различается: индекс построен по LOWER(email)
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='unique_vip_client_email_ci',
+                                    violation_error_message='VIP-клиент с таким email уже существует')
+        ]
 
     def __str__(self):
         return self.full_name
 
 
-class Interaction(models.Model):
+class ClientDedupKey(models.Model):
+    """Ключ поиска дубликатов VIP-клиента (см. mainvip.dedup)"""
+    KIND_CHOICES = [
+        ('email', 'Email'),
+        ('phone', 'Телефон'),
+        ('name', 'ФИО'),
+    ]
+
+    vip_client = models.ForeignKey(VIPClient, on_delete=models.CASCADE, related_name='dedup_keys', verbose_name='VIP-клиент')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name='Вид ключа')
+    key = models.CharField(max_length=100, verbose_name='Ключ')
+
+    class Meta:
+        verbose_name = 'Ключ поиска дубликатов'
+        verbose_name_plural = 'Ключи поиска дубликатов'
+        db_table = 'client_dedup_keys'
+        indexes = [
+            # Блоки кандидатов: клиенты с одинаковым ключом читаются только из индекса
+            models.Index(fields=['kind', 'key', 'vip_client'], name='client_dedup_keys_block_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vip_client_id} - {self.kind}: {self.key}"
+
+
+class Interaction(LoadedValuesMixin, models.Model):
     """Взаимодействие с VIP-клиентом"""
     TYPE_CHOICES = [
         ('meeting', 'Встреча'),
@@ -112,6 +202,156 @@ class Interaction(models.Model):
         verbose_name_plural = 'Взаимодействия'
         db_table = 'interactions'
         ordering = ['-date']
+        indexes = [
+            # Лента взаимодействий клиента (keyset по дате и ключу)
+            models.Index(fields=['vip_client', '-date', '-interaction_id'], name='interactions_timeline_idx'),
+            # Последние взаимодействия на дашборде и отчеты по месяцам: все поля
+            # разрезов в индексе, агрегаты считаются без чтения строк таблицы
+            models.Index(fields=['date', 'type', 'channel', 'user', 'vip_client'], name='interactions_report_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vip_client.full_name} - {self.get_type_display()} ({self.date})"
+
+    def delete(self, *args, **kwargs):
+        """Удаляет взаимодействие и обновляет сводку клиента и кэш (вместо обработчиков post_delete)"""
+        from .signals import interactions_bulk_changed
+
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        interactions_bulk_changed.send(
+            sender=Interaction, pks=[pk], client_ids={self.vip_client_id}, dates={self.date},
+        )
+        return result
+
+
+class InteractionTypeCount(models.Model):
+    """Число взаимодействий клиента по типу"""
+    vip_client = models.ForeignKey(VIPClient, on_delete=models.CASCADE, related_name='type_counts', verbose_name='VIP-клиент')
+    type = models.CharField(max_length=50, choices=Interaction.TYPE_CHOICES, verbose_name='Тип взаимодействия')
+    count = models.PositiveIntegerField(default=0, verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Число взаимодействий по типу'
+        verbose_name_plural = 'Число взаимодействий по типам'
+        db_table = 'interaction_type_counts'
+        constraints = [
+            models.UniqueConstraint(fields=['vip_client', 'type'], name='unique_interaction_type_count')
+        ]
+
+    def __str__(self):
+        return f"{self.vip_client_id} - {self.type}: {self.count}"
+
+
+class Counter(models.Model):
+    """Предрассчитанный счетчик для дашборда"""
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='Название')
+    value = models.BigIntegerField(default=0, verbose_name='Значение')
+
+    class Meta:
+        verbose_name = 'Счетчик'
+        verbose_name_plural = 'Счетчики'
+        db_table = 'counters'
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class Job(models.Model):
+    """Фоновая задача (см. mainvip.jobs)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    job_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    params = models.JSONField(default=dict, blank=True, verbose_name='Параметры')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED, verbose_name='Статус')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс, %')
+    message = models.CharField(max_length=255, blank=True, verbose_name='Состояние')
+    result = models.JSONField(blank=True, null=True, verbose_name='Результат')
+    result_file = models.FileField(upload_to='jobs/', blank=True, verbose_name='Файл результата')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='Максимум попыток')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Пользователь')
+    worker = models.CharField(max_length=100, blank=True, verbose_name='Обработчик')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='Выполнить не раньше')
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name='Начата')
+    heartbeat_at = models.DateTimeField(blank=True, null=True, verbose_name='Последний отчет о ходе')
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name='Завершена')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        db_table = 'jobs'
+        ordering = ['-job_id']
+        indexes = [
+            # Выборка очередной задачи обработчиком
+            models.Index(fields=['status', 'run_after'], name='jobs_queue_idx'),
+            # Список задач пользователя
+            models.Index(fields=['user', '-job_id'], name='jobs_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+
+class ClientChange(models.Model):
+    """Запись журнала изменений VIP-клиента (только добавляется, см. mainvip.audit)"""
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    IMPORT = 'import'
+    ACTION_CHOICES = [
+        (CREATE, 'Создание'),
+        (UPDATE, 'Изменение'),
+        (DELETE, 'Удаление'),
+        (IMPORT, 'Импорт'),
+    ]
+
+    change_id = models.BigAutoField(primary_key=True)
+    # Не внешний ключ: история должна пережить удаление клиента
+    vip_client_id = models.IntegerField(verbose_name='Клиент')
+    client_name = models.CharField(max_length=200, verbose_name='ФИО клиента')
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name='Действие')
+    # {поле: [прежнее значение, новое значение]}
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder, verbose_name='Изменения')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                             verbose_name='Пользователь')
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name='Время изменения')
+
+    class Meta:
+        verbose_name = 'Изменение клиента'
+        verbose_name_plural = 'Журнал изменений клиентов'
+        db_table = 'client_changes'
+        ordering = ['-changed_at', '-change_id']
+        indexes = [
+            # История клиента за период
+            models.Index(fields=['vip_client_id', 'changed_at'], name='client_changes_client_idx'),
+            # Все изменения за период
+            models.Index(fields=['changed_at'], name='client_changes_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.client_name}: {self.get_action_display()} ({self.changed_at:%d.%m.%Y %H:%M})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Записи журнала изменений не редактируются')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Записи журнала изменений не удаляются')
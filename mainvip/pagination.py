@@ -0,0 +1,210 @@
+"""Keyset-пагинация (постраничный вывод по курсору).
+
+В отличие от OFFSET-пагинации следующая страница выбирается условием
+«строго после последней показанной строки», поэтому время загрузки
+не зависит от того, насколько далеко пользователь пролистал список.
+"""
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+class CursorSerializer:
+    """JSON-сериализатор курсора, умеющий сохранять даты и Decimal"""
+
+    def dumps(self, obj):
+        return DjangoJSONEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+    def loads(self, data):
+        return signing.JSONSerializer().loads(data)
+
+
+class KeysetPage:
+    """Страница результатов keyset-пагинации"""
+
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None, page_size=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.page_size = page_size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class KeysetPaginator:
+    """Пагинатор по курсору.
+
+    ``ordering`` — последовательность полей сортировки в нотации
+    ``order_by`` (``'-date'``). Последнее поле обязано быть уникальным
+    (как правило, первичный ключ), иначе порядок строк не будет стабильным.
+    NULL-значения считаются наименьшими: идут первыми при сортировке
+    по возрастанию и последними при сортировке по убыванию.
+    """
+
+    salt = 'mainvip.pagination'
+
+    def __init__(self, queryset, ordering, page_size, nullable=()):
+        self.queryset = queryset
+        self.page_size = page_size
+        self.nullable = set(nullable)
+        self.fields = []
+        for item in ordering:
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            self.fields.append((name, descending, self._is_nullable(name)))
+
+    def _is_nullable(self, name):
+        try:
+            return self.queryset.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return name in self.nullable
+
+    # Кодирование курсора
+
+    def encode_cursor(self, row, backwards=False):
+        values = [self._value(row, name) for name, _, _ in self.fields]
+        return signing.dumps(
+            {'v': values, 'b': backwards},
+            salt=self.salt,
+            serializer=CursorSerializer,
+            compress=True,
+        )
+
+    def decode_cursor(self, cursor):
+        """Возвращает (values, backwards) или (None, False) для невалидного курсора"""
+        if not cursor:
+            return None, False
+        try:
+            data = signing.loads(cursor, salt=self.salt, serializer=CursorSerializer)
+            values = data['v']
+            backwards = bool(data['b'])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None, False
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None, False
+        return values, backwards
+
+    @staticmethod
+    def _value(row, name):
+        if isinstance(row, dict):
+            return row[name]
+        return getattr(row, name)
+
+    # Построение запроса
+
+    def _order_by(self, backwards):
+        expressions = []
+        for name, descending, nullable in self.fields:
+            if backwards:
+                descending = not descending
+            if not nullable:
+                expressions.append(F(name).desc() if descending else F(name).asc())
+            elif descending:
+                expressions.append(F(name).desc(nulls_last=True))
+            else:
+                expressions.append(F(name).asc(nulls_first=True))
+        return expressions
+
+    @staticmethod
+    def _after(name, value, descending, nullable):
+        """Условие «значение поля строго после value» в порядке сортировки"""
+        if value is None:
+            # NULL — наименьшее значение
+            return None if descending else Q(**{f'{name}__isnull': False})
+        condition = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+        if descending and nullable:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    @staticmethod
+    def _equal(name, value):
+        if value is None:
+            return Q(**{f'{name}__isnull': True})
+        return Q(**{name: value})
+
+    def _filter(self, values, backwards):
+        condition = None
+        prefix = Q()
+        for (name, descending, nullable), value in zip(self.fields, values):
+            if backwards:
+                descending = not descending
+            after = self._after(name, value, descending, nullable)
+            if after is not None:
+                branch = prefix & after
+                condition = branch if condition is None else condition | branch
+            prefix &= self._equal(name, value)
+        if condition is None:
+            return Q(pk__in=[])
+
+        # Ограничение по первому полю позволяет СУБД начать чтение индекса
+        # с нужной позиции вместо перебора всех предыдущих строк.
+        name, descending, nullable = self.fields[0]
+        if backwards:
+            descending = not descending
+        if values[0] is not None and not nullable:
+            condition &= Q(**{f'{name}__lte' if descending else f'{name}__gte': values[0]})
+        return condition
+
+    def _page_queryset(self, cursor):
+        values, backwards = self.decode_cursor(cursor)
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._filter(values, backwards))
+        queryset = queryset.order_by(*self._order_by(backwards))
+        return queryset[:self.page_size + 1], values, backwards
+
+    def _make_page(self, rows, values, backwards):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        if backwards:
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        next_cursor = prev_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1])
+        if rows and has_previous:
+            prev_cursor = self.encode_cursor(rows[0], backwards=True)
+        return KeysetPage(rows, next_cursor, prev_cursor, self.page_size)
+
+    def get_page(self, cursor=None):
+        queryset, values, backwards = self._page_queryset(cursor)
+        return self._make_page(list(queryset), values, backwards)
+
+    async def aget_page(self, cursor=None):
+        """Асинхронный вариант get_page для async-представлений"""
+        queryset, values, backwards = self._page_queryset(cursor)
+        return self._make_page([row async for row in queryset], values, backwards)
+
+
+def get_page_size(request, default, maximum):
+    """Размер страницы из параметра ``per_page`` с ограничением сверху"""
+    try:
+        page_size = int(request.GET.get('per_page', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, maximum))
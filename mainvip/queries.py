@@ -0,0 +1,82 @@
+"""Выборки, общие для представлений и фоновых задач.
+
+Фильтры списка клиентов применяются и к странице, и к выгрузке в фоновой
+задаче (``mainvip.tasks``), поэтому живут здесь, а не в ``mainvip.views``:
+обработчик задач не загружает слой представлений.
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import VIPClient
+from .search import get_search_backend
+
+# Варианты сортировки списка клиентов: последний ключ обязан быть уникальным
+CLIENT_SORTS = {
+    'relevance': ('search_rank', 'vip_id'),
+    'name': ('full_name', 'vip_id'),
+    '-name': ('-full_name', '-vip_id'),
+    'new': ('-vip_id',),
+    'old': ('vip_id',),
+    'contact': ('-last_interaction_date', '-vip_id'),
+    '-contact': ('last_interaction_date', 'vip_id'),
+    'interactions': ('-interaction_count', '-vip_id'),
+}
+
+# Фильтр «нет контакта N дней»
+STALE_DAYS_CHOICES = (30, 90, 180, 365)
+
+# Сколько ошибок импорта показывать на странице
+IMPORT_ERRORS_SHOWN = 200
+
+# Разрезы отчета по взаимодействиям: на странице и в выгрузке XLSX
+REPORT_SECTIONS = (
+    ('type', 'По типу'),
+    ('channel', 'По каналу'),
+    ('user', 'По пользователям'),
+    ('organization', 'По организациям'),
+)
+
+
+def filter_clients(params):
+    """Клиенты с учетом параметров search/status/stale/sort (request.GET или QueryDict)"""
+    search_query = params.get('search', '')
+    status_filter = params.get('status', '')
+    stale_filter = params.get('stale', '')
+    sort = params.get('sort', '')
+    if sort not in CLIENT_SORTS or (sort == 'relevance' and not search_query):
+        # Результаты поиска по умолчанию упорядочены по релевантности
+        sort = 'relevance' if search_query else 'name'
+
+    clients = VIPClient.objects.all()
+
+    if status_filter:
+        clients = clients.filter(status=status_filter)
+
+    if stale_filter.isdigit() and int(stale_filter) in STALE_DAYS_CHOICES:
+        cutoff = timezone.localdate() - timedelta(days=int(stale_filter))
+        clients = clients.filter(Q(last_interaction_date__lt=cutoff) | Q(last_interaction_date__isnull=True))
+    else:
+        stale_filter = ''
+
+    if search_query:
+        clients = get_search_backend().search(clients, search_query)
+
+    return clients, search_query, status_filter, stale_filter, sort
+
+
+def pk_batches(rows, batch_size):
+    """Строки values_list('pk', ...) пакетами по batch_size в порядке pk.
+
+    Каждый пакет читается отдельным запросом от последнего ключа, поэтому
+    между пакетами можно писать в БД и фиксировать транзакции.
+    """
+    rows = rows.order_by('pk')
+    last = None
+    while True:
+        batch = list((rows if last is None else rows.filter(pk__gt=last))[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1][0]
@@ -0,0 +1,184 @@
+"""Отчеты по взаимодействиям: объем по месяцам в разрезе типа, канала,
+пользователя и организации.
+
+Агрегаты считаются в БД (группировка по месяцу и условный ``Count``). Данные
+закрытых месяцев кэшируются помесячно: ключ включает версию месяца,
+которую сигналы ``Interaction`` увеличивают при изменении взаимодействий
+этого месяца (см. ``mainvip.signals``). Текущий месяц всегда считается заново.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.db import connection
+from django.db.models import Count, Q
+from django.db.models.functions import Substr, TruncMonth
+from django.utils import timezone
+
+from . import cache
+from .models import Interaction, Organization, User
+
+DIMENSIONS = ('type', 'channel', 'user', 'organization')
+
+# Поле группировки для разрезов с неограниченным числом значений
+GROUP_FIELDS = {
+    'user': 'user_id',
+    'organization': 'vip_client__organization_id',
+}
+
+MONTH_DATA_KEY = 'mainvip:report:{month}:{version}'
+
+EMPTY_LABELS = {
+    'type': 'Не указан',
+    'channel': 'Не указан',
+    'user': 'Пользователь не указан',
+    'organization': 'Без организации',
+}
+
+
+def month_name(value):
+    """'YYYY-MM' для даты (или строки с датой в ISO-формате)"""
+    if isinstance(value, str):
+        return value[:7]
+    return f'{value.year:04d}-{value.month:02d}'
+
+
+def month_version_name(month):
+    return f'{cache.REPORTS}:{month}'
+
+
+def _next_month(month_start):
+    if month_start.month == 12:
+        return date(month_start.year + 1, 1, 1)
+    return date(month_start.year, month_start.month + 1, 1)
+
+
+def _month_expression():
+    # В SQLite TruncMonth вызывает Python-функцию для каждой строки; дата там
+    # хранится строкой ISO 8601, и месяц — это ее первые семь символов
+    if connection.vendor == 'sqlite':
+        return Substr('date', 1, 7)
+    return TruncMonth('date')
+
+
+def _empty_month():
+    return {'total': 0, **{dimension: {} for dimension in DIMENSIONS}}
+
+
+def _compute_months(starts):
+    """Агрегаты за месяцы starts (список первых чисел месяцев) — три запроса.
+
+    Все запросы читают только индекс interactions_report_idx, кроме разреза
+    по организациям, которому нужна организация клиента.
+    """
+    result = {month_name(start): _empty_month() for start in starts}
+    interactions = Interaction.objects.filter(
+        date__gte=min(starts), date__lt=_next_month(max(starts)),
+    ).order_by().annotate(month=_month_expression())
+
+    conditional = {}
+    for value, _ in Interaction.TYPE_CHOICES:
+        conditional[f'type:{value}'] = Count('pk', filter=Q(type=value))
+    for value, _ in Interaction.CHANNEL_CHOICES:
+        conditional[f'channel:{value}'] = Count('pk', filter=Q(channel=value))
+    conditional['channel:'] = Count('pk', filter=Q(channel__isnull=True) | Q(channel=''))
+
+    for row in interactions.values('month').annotate(total=Count('pk'), **conditional):
+        data = result.get(month_name(row.pop('month')))
+        if data is None:
+            continue
+        data['total'] = row.pop('total')
+        for name, value in row.items():
+            dimension, key = name.split(':', 1)
+            if value:
+                data[dimension][key] = value
+
+    for dimension, field in GROUP_FIELDS.items():
+        for month, key, total in interactions.values_list('month', field).annotate(total=Count('pk')):
+            data = result.get(month_name(month))
+            if data is not None:
+                data[dimension]['' if key is None else str(key)] = total
+    return result
+
+
+def get_months_data(starts):
+    """Агрегаты за месяцы: закрытые берутся из кэша, недостающие считаются одним проходом"""
+    current = month_name(timezone.localdate())
+    names = [month_name(start) for start in starts]
+    closed = [name for name in names if name < current]
+
+    versions = cache.get_version_map(cache.REPORTS, *(month_version_name(name) for name in closed))
+    keys = {
+        name: MONTH_DATA_KEY.format(month=name, version=f'{versions[month_version_name(name)]}.{versions[cache.REPORTS]}')
+        for name in closed
+    }
+    cached = default_cache.get_many(list(keys.values()))
+
+    result = {}
+    missing = []
+    for start, name in zip(starts, names):
+        if name > current:
+            result[name] = _empty_month()
+        elif name in keys and keys[name] in cached:
+            result[name] = cached[keys[name]]
+        else:
+            missing.append(start)
+
+    if missing:
+        computed = _compute_months(missing)
+        result.update(computed)
+        default_cache.set_many(
+            {keys[name]: data for name, data in computed.items() if name in keys},
+            timeout=settings.REPORTS_CACHE_TIMEOUT,
+        )
+    return result
+
+
+def _labels(dimension, keys):
+    if dimension == 'type':
+        return dict(Interaction.TYPE_CHOICES)
+    if dimension == 'channel':
+        return dict(Interaction.CHANNEL_CHOICES)
+    ids = [int(key) for key in keys if key]
+    if dimension == 'user':
+        return {
+            str(pk): full_name or username
+            for pk, full_name, username in User.objects.filter(pk__in=ids).values_list('pk', 'full_name', 'username')
+        }
+    return {str(pk): name for pk, name in Organization.objects.filter(pk__in=ids).values_list('pk', 'name')}
+
+
+def build_report(year):
+    """Отчет за год: итоги по месяцам и строки по каждому разрезу"""
+    starts = [date(year, month, 1) for month in range(1, 13)]
+    data = get_months_data(starts)
+    months = [month_name(start) for start in starts]
+
+    dimensions = {}
+    for dimension in DIMENSIONS:
+        rows = {}
+        for index, month in enumerate(months):
+            for key, value in data[month][dimension].items():
+                rows.setdefault(key, [0] * len(months))[index] = value
+        labels = _labels(dimension, rows)
+        dimensions[dimension] = sorted(
+            (
+                {
+                    'key': key,
+                    'label': labels.get(key, key) if key else EMPTY_LABELS[dimension],
+                    'months': values,
+                    'total': sum(values),
+                }
+                for key, values in rows.items()
+            ),
+            key=lambda row: (-row['total'], row['label']),
+        )
+
+    totals = [data[month]['total'] for month in months]
+    return {
+        'year': year,
+        'months': months,
+        'totals': totals,
+        'total': sum(totals),
+        'dimensions': dimensions,
+    }
@@ -0,0 +1,197 @@
+"""Полнотекстовый поиск VIP-клиентов.
+
+Поиск устроен как подключаемый бэкенд (настройка ``VIP_SEARCH_BACKEND``).
+По умолчанию используется виртуальная таблица SQLite FTS5, которая
+синхронизируется с ``VIPClient`` сигналами (см. ``mainvip.signals``).
+Бэкенд фильтрует queryset и аннотирует его полем ``search_rank``:
+чем меньше значение, тем релевантнее запись.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+FTS_TABLE = 'vip_clients_fts'
+
+# Минимальное число цифр, при котором запрос считается номером телефона
+PHONE_QUERY_MIN_DIGITS = 5
+
+_PHONE_QUERY_RE = re.compile(r'^[\d\s()+\-.]+$')
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_text(value):
+    """Приводит текст к виду, в котором он хранится в индексе"""
+    return (value or '').lower().replace('ё', 'е')
+
+
+def normalize_phone(value):
+    """Оставляет в номере телефона только цифры"""
+    return re.sub(r'\D', '', value or '')
+
+
+def phone_tokens(phone):
+    """Варианты записи номера, по которым его можно найти.
+
+    Для российских номеров индексируются формы с кодом 7 и 8,
+    номер без кода страны и последние семь цифр (городской номер).
+    """
+    digits = normalize_phone(phone)
+    if not digits:
+        return []
+    tokens = [digits]
+    if len(digits) == 11 and digits[0] in '78':
+        national = digits[1:]
+        tokens += ['7' + national, '8' + national, national]
+    if len(digits) > 7:
+        tokens.append(digits[-7:])
+    return list(dict.fromkeys(tokens))
+
+
+def build_document(full_name, email, position, phone):
+    """Значения колонок индекса для одного клиента"""
+    return (
+        normalize_text(full_name),
+        normalize_text(email),
+        normalize_text(position),
+        ' '.join(phone_tokens(phone)),
+    )
+
+
+class BaseSearchBackend:
+    """Интерфейс бэкенда поиска"""
+
+    def search(self, queryset, query):
+        """Отфильтровать queryset по запросу и добавить аннотацию search_rank"""
+        raise NotImplementedError
+
+    def index(self, client):
+        """Добавить или обновить клиента в индексе"""
+
+    def index_pks(self, pks):
+        """Добавить или обновить в индексе клиентов с указанными ключами"""
+        from .models import VIPClient
+
+        for client in VIPClient.objects.filter(pk__in=pks):
+            self.index(client)
+
+    def remove(self, pk):
+        """Удалить клиента из индекса"""
+
+    def rebuild(self, progress=None):
+        """Перестроить индекс целиком; progress(done, total) — после каждого пакета клиентов"""
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """Поиск подстрокой без индекса — для СУБД без полнотекстового поиска"""
+
+    def search(self, queryset, query):
+        condition = (
+            Q(full_name__icontains=query) |
+            Q(email__icontains=query) |
+            Q(phone__icontains=query) |
+            Q(position__icontains=query)
+        )
+        digits = normalize_phone(query)
+        if _PHONE_QUERY_RE.match(query) and len(digits) >= PHONE_QUERY_MIN_DIGITS:
+            condition |= Q(phone__icontains=digits)
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    """Поиск через виртуальную таблицу SQLite FTS5 с ранжированием bm25"""
+
+    # Веса колонок для bm25: full_name, email, position, phone
+    weights = (10.0, 5.0, 2.0, 5.0)
+    batch_size = 2000
+
+    def __init__(self):
+        if connection.vendor != 'sqlite':
+            raise ImproperlyConfigured('SQLiteFTS5SearchBackend работает только с SQLite')
+
+    @staticmethod
+    def build_match(query):
+        """Преобразует пользовательский запрос в выражение FTS5 MATCH.
+
+        Каждое слово ищется по префиксу, все слова должны встретиться.
+        Запрос, похожий на номер телефона, ищется по нормализованным цифрам;
+        короткий номер (меньше PHONE_QUERY_MIN_DIGITS цифр) — также и по словам.
+        """
+        digits = normalize_phone(query)
+        words = ' AND '.join(f'"{word}"*' for word in _WORD_RE.findall(normalize_text(query)))
+        if not _PHONE_QUERY_RE.match(query) or not digits:
+            return words
+        if len(digits) >= PHONE_QUERY_MIN_DIGITS:
+            return f'phone : "{digits}"*'
+        return f'phone : "{digits}"* OR ({words})'
+
+    def search(self, queryset, query):
+        match = self.build_match(query)
+        if not match:
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        # Индекс присоединяется к таблице клиентов: MATCH выполняется один раз,
+        # а bm25 вычисляется для найденной строки индекса, без подзапроса на каждого клиента
+        opts = queryset.model._meta
+        pk_column = f'{connection.ops.quote_name(opts.db_table)}.{connection.ops.quote_name(opts.pk.column)}'
+        weights = ', '.join(str(weight) for weight in self.weights)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {pk_column}', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        ).annotate(search_rank=RawSQL(f'bm25({FTS_TABLE}, {weights})', [], output_field=FloatField()))
+
+    def index(self, client):
+        self.index_rows([(client.pk, client.full_name, client.email, client.position, client.phone)])
+
+    def index_pks(self, pks):
+        from .models import VIPClient
+
+        rows = VIPClient.objects.filter(pk__in=pks).values_list('pk', 'full_name', 'email', 'position', 'phone')
+        self.index_rows(list(rows))
+
+    def index_rows(self, rows, replace=True):
+        """Индексирует кортежи (pk, full_name, email, position, phone)"""
+        params = [(pk, *build_document(*values)) for pk, *values in rows]
+        with transaction.atomic(), connection.cursor() as cursor:
+            if replace:
+                cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in params])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, full_name, email, position, phone) VALUES (%s, %s, %s, %s, %s)',
+                params,
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+    def rebuild(self, progress=None):
+        from .models import VIPClient
+        from .queries import pk_batches
+
+        # Пакеты заменяют строки индекса на месте, каждый в своей транзакции:
+        # поиск работает во время перестроения
+        total = VIPClient.objects.count() if progress is not None else None
+        done = 0
+        rows = VIPClient.objects.values_list('pk', 'full_name', 'email', 'position', 'phone')
+        for batch in pk_batches(rows, self.batch_size):
+            self.index_rows(batch)
+            done += len(batch)
+            if progress is not None:
+                progress(done, total)
+        quote = connection.ops.quote_name
+        table, pk_column = quote(VIPClient._meta.db_table), quote(VIPClient._meta.pk.column)
+        with connection.cursor() as cursor:
+            # Строки клиентов, удаленных в обход сигналов
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT {pk_column} FROM {table})')
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Экземпляр бэкенда поиска, заданного в настройках"""
+    return import_string(settings.VIP_SEARCH_BACKEND)()
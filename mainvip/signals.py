@@ -0,0 +1,232 @@
+"""Обработчики сигналов моделей mainvip"""
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import audit, cache, counters, dedup, metrics, reports, summary
+from .models import Interaction, Organization, Role, User, VIPClient
+from .search import get_search_backend
+
+# Отправляется после массовой записи клиентов в обход save() (bulk_create/bulk_update).
+# Аргументы: pks — идентификаторы созданных или измененных клиентов; необязательный
+# counter_deltas — изменения счетчиков mainvip.counters (без него счетчики пересчитываются).
+vip_clients_bulk_changed = Signal()
+# То же для организаций (pks) и взаимодействий (pks; client_ids и dates — клиенты
+# и даты взаимодействий до и после изменения). Удаление взаимодействий тоже
+# сообщается этим сигналом (см. Interaction.delete): обработчики post_delete
+# у Interaction отключили бы быстрое каскадное удаление вместе с клиентом.
+organizations_bulk_changed = Signal()
+interactions_bulk_changed = Signal()
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Ставит на новое соединение с БД обертку, учитывающую запросы в метриках запроса"""
+    if metrics.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.record_query)
+
+
+@receiver(post_save, sender=VIPClient)
+def index_vip_client(sender, instance, **kwargs):
+    """Обновляет клиента в поисковом индексе"""
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=VIPClient)
+def unindex_vip_client(sender, instance, **kwargs):
+    """Удаляет клиента из поискового индекса"""
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=VIPClient)
+def index_vip_client_duplicates(sender, instance, created, **kwargs):
+    """Обновляет ключи поиска дубликатов, если изменились ФИО, телефон или email"""
+    loaded = getattr(instance, '_loaded_values', {})
+    if not created and all(name in loaded and loaded[name] == getattr(instance, name) for name in dedup.KEY_FIELDS):
+        return
+    dedup.index(instance)
+
+
+@receiver(post_save, sender=VIPClient)
+def audit_vip_client(sender, instance, created, using, **kwargs):
+    """Пишет изменения полей клиента в журнал"""
+    audit.record_saved(instance, created, using)
+
+
+@receiver(post_delete, sender=VIPClient)
+def audit_deleted_vip_client(sender, instance, using, **kwargs):
+    audit.record_deleted(instance, using)
+
+
+@receiver(post_save, sender=VIPClient)
+def count_vip_client(sender, instance, created, **kwargs):
+    """Поддерживает счетчики клиентов при создании"""
+    if created:
+        counters.increment(counters.TOTAL_CLIENTS)
+        if instance.status == 'active':
+            counters.increment(counters.ACTIVE_CLIENTS)
+
+
+@receiver(pre_save, sender=VIPClient)
+def count_vip_client_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Учитывает смену статуса клиента в счетчике активных.
+
+    Если статус не менялся с загрузки из БД, запроса нет. Иначе прежний статус берется
+    условным UPDATE строки: из одновременных сохранений переход в активные
+    (или из активных) засчитывает только одно.
+    """
+    if instance._state.adding or raw or (update_fields is not None and 'status' not in update_fields):
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if 'status' in loaded and loaded['status'] == instance.status:
+        return
+    rows = VIPClient.objects.filter(pk=instance.pk)
+    if instance.status == 'active':
+        delta = rows.exclude(status='active').update(status='active')
+    else:
+        delta = -rows.filter(status='active').update(status=instance.status)
+    counters.increment(counters.ACTIVE_CLIENTS, delta)
+
+
+@receiver(post_delete, sender=VIPClient)
+def uncount_vip_client(sender, instance, **kwargs):
+    counters.increment(counters.TOTAL_CLIENTS, -1)
+    if instance.status == 'active':
+        counters.increment(counters.ACTIVE_CLIENTS, -1)
+
+
+@receiver(post_save, sender=Organization)
+def count_organization(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(counters.TOTAL_ORGANIZATIONS)
+
+
+@receiver(post_delete, sender=Organization)
+def uncount_organization(sender, instance, **kwargs):
+    counters.increment(counters.TOTAL_ORGANIZATIONS, -1)
+
+
+@receiver(post_save, sender=Interaction)
+def summarize_interaction(sender, instance, created, **kwargs):
+    """Обновляет сводку клиента по взаимодействиям"""
+    current = (instance.vip_client_id, instance.type, instance.date)
+    if created:
+        summary.record_added(*current)
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if not all(name in loaded for name in ('vip_client_id', 'type', 'date')):
+        # Прежние значения неизвестны — пересчитываем сводку клиента целиком
+        summary.rebuild([instance.vip_client_id])
+        return
+    previous = (loaded['vip_client_id'], loaded['type'], loaded['date'])
+    if previous != current:
+        summary.record_removed(*previous)
+        summary.record_added(*current)
+
+
+@receiver(post_save, sender=Interaction)
+def invalidate_interaction_reports(sender, instance, **kwargs):
+    """Сбрасывает кэш отчетов за месяц взаимодействия (и прежний месяц при смене даты)"""
+    months = {reports.month_name(instance.date)}
+    loaded = getattr(instance, '_loaded_values', {})
+    if loaded.get('date'):
+        months.add(reports.month_name(loaded['date']))
+    cache.bump(*(reports.month_version_name(month) for month in months))
+
+
+@receiver(post_save, sender=VIPClient)
+def invalidate_client_reports(sender, instance, created, **kwargs):
+    # Разрез по организациям строится по текущей организации клиента
+    loaded = getattr(instance, '_loaded_values', {})
+    if not created and loaded.get('organization_id', -1) != instance.organization_id:
+        cache.bump(cache.REPORTS)
+
+
+@receiver(post_delete, sender=Organization)
+@receiver(post_delete, sender=User)
+def invalidate_reports(sender, **kwargs):
+    # Удаление обнуляет ссылки (SET_NULL) запросом UPDATE без сигналов
+    cache.bump(cache.REPORTS)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organizations(sender, **kwargs):
+    cache.bump(cache.ORGANIZATION)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_users(sender, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login, который нигде не кэшируется
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    cache.bump(cache.USER)
+
+
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_roles(sender, **kwargs):
+    cache.bump(cache.ROLE)
+
+
+@receiver([post_save, post_delete], sender=VIPClient)
+def invalidate_vip_clients(sender, **kwargs):
+    cache.bump(cache.VIP_CLIENT)
+
+
+@receiver(post_save, sender=Interaction)
+def invalidate_interactions(sender, **kwargs):
+    cache.bump(cache.INTERACTION)
+
+
+@receiver(post_delete, sender=VIPClient)
+def invalidate_deleted_client_interactions(sender, **kwargs):
+    """Взаимодействия клиента удалены каскадом: сбрасывает кэш один раз на клиента.
+
+    Сводка interaction_count удаляемого экземпляра может быть устаревшей, поэтому кэш сбрасывается всегда.
+    """
+    cache.bump(cache.INTERACTION, cache.REPORTS)
+
+
+@receiver(vip_clients_bulk_changed)
+def reindex_vip_clients(sender, pks, **kwargs):
+    get_search_backend().index_pks(pks)
+
+
+@receiver(vip_clients_bulk_changed)
+def index_bulk_vip_client_duplicates(sender, pks, **kwargs):
+    dedup.index_pks(pks)
+
+
+@receiver(vip_clients_bulk_changed)
+def recount_vip_clients(sender, pks, counter_deltas=None, **kwargs):
+    if counter_deltas is None:
+        # Отправитель не знает прежних статусов — считаем заново
+        counters.rebuild([counters.TOTAL_CLIENTS, counters.ACTIVE_CLIENTS])
+        return
+    for name, delta in counter_deltas.items():
+        counters.increment(name, delta)
+
+
+@receiver(vip_clients_bulk_changed)
+def invalidate_bulk_vip_clients(sender, pks, **kwargs):
+    cache.bump(cache.VIP_CLIENT, cache.REPORTS)
+
+
+@receiver(organizations_bulk_changed)
+def recount_organizations(sender, pks, **kwargs):
+    counters.rebuild([counters.TOTAL_ORGANIZATIONS])
+
+
+@receiver(organizations_bulk_changed)
+def invalidate_bulk_organizations(sender, pks, **kwargs):
+    cache.bump(cache.ORGANIZATION)
+
+
+@receiver(interactions_bulk_changed)
+def resummarize_interactions(sender, pks, client_ids, **kwargs):
+    summary.rebuild(client_ids)
+
+
+@receiver(interactions_bulk_changed)
+def invalidate_bulk_interactions(sender, pks, dates, **kwargs):
+    months = {reports.month_name(value) for value in dates}
+    cache.bump(cache.INTERACTION, *(reports.month_version_name(month) for month in months))
@@ -0,0 +1,102 @@
+"""Сводка по взаимодействиям VIP-клиента.
+
+Поля ``VIPClient.last_interaction_date`` и ``VIPClient.interaction_count``
+и таблица ``InteractionTypeCount`` обновляются инкрементально обработчиками
+сигналов ``Interaction`` (см. ``mainvip.signals``), поэтому список клиентов
+сортирует и фильтрует по ним через индекс, без подзапросов к ``interactions``.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, DateField, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Interaction, InteractionTypeCount, VIPClient
+from .queries import pk_batches
+
+# Число клиентов в пакете (и транзакции) при пересчете сводки
+REBUILD_BATCH_SIZE = 5000
+
+
+def record_added(client_id, interaction_type, interaction_date):
+    """Учитывает новое взаимодействие клиента"""
+    interaction_date = Value(interaction_date, output_field=DateField())
+    VIPClient.objects.filter(pk=client_id).update(
+        interaction_count=F('interaction_count') + 1,
+        last_interaction_date=Case(
+            When(Q(last_interaction_date__isnull=True) | Q(last_interaction_date__lt=interaction_date),
+                 then=interaction_date),
+            default=F('last_interaction_date'),
+        ),
+    )
+    _add_type_count(client_id, interaction_type, 1)
+
+
+def record_removed(client_id, interaction_type, interaction_date):
+    """Учитывает удаление взаимодействия клиента"""
+    VIPClient.objects.filter(pk=client_id, interaction_count__gt=0).update(
+        interaction_count=F('interaction_count') - 1,
+    )
+    # Удалено последнее по дате взаимодействие — дату берем из индекса заново
+    VIPClient.objects.filter(
+        pk=client_id, last_interaction_date=Value(interaction_date, output_field=DateField()),
+    ).update(last_interaction_date=_last_date_subquery())
+    _add_type_count(client_id, interaction_type, -1)
+
+
+def _add_type_count(client_id, interaction_type, delta):
+    counts = InteractionTypeCount.objects.filter(vip_client_id=client_id, type=interaction_type)
+    if delta < 0:
+        counts.filter(count__gte=-delta).update(count=F('count') + delta)
+        return
+    if not counts.update(count=F('count') + delta):
+        _, created = InteractionTypeCount.objects.get_or_create(
+            vip_client_id=client_id, type=interaction_type, defaults={'count': delta},
+        )
+        if not created:
+            counts.update(count=F('count') + delta)
+
+
+def _last_date_subquery():
+    return Subquery(
+        Interaction.objects.filter(vip_client=OuterRef('pk')).order_by('-date').values('date')[:1]
+    )
+
+
+def rebuild(client_ids=None, progress=None):
+    """Пересчитывает сводку по таблице interactions (для всех клиентов или перечисленных).
+
+    Клиенты обрабатываются пакетами, каждый пакет — в своей транзакции;
+    progress(done, total) вызывается после каждого пакета.
+    """
+    clients = VIPClient.objects.all()
+    if client_ids is not None:
+        clients = clients.filter(pk__in=client_ids)
+    total = clients.count() if progress is not None else None
+    done = 0
+    for batch in pk_batches(clients.values_list('pk'), REBUILD_BATCH_SIZE):
+        _rebuild_clients([pk for pk, in batch])
+        done += len(batch)
+        if progress is not None:
+            progress(done, total)
+
+
+def _rebuild_clients(pks):
+    count_subquery = Subquery(
+        Interaction.objects.filter(vip_client=OuterRef('pk'))
+        .values('vip_client').annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField(),
+    )
+    rows = (
+        Interaction.objects.filter(vip_client_id__in=pks).order_by()
+        .values_list('vip_client_id', 'type').annotate(total=Count('pk'))
+    )
+    with transaction.atomic():
+        VIPClient.objects.filter(pk__in=pks).update(
+            interaction_count=Coalesce(count_subquery, 0),
+            last_interaction_date=_last_date_subquery(),
+        )
+        InteractionTypeCount.objects.filter(vip_client_id__in=pks).delete()
+        InteractionTypeCount.objects.bulk_create(
+            [InteractionTypeCount(vip_client_id=client_id, type=interaction_type, count=total)
+             for client_id, interaction_type, total in rows],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
@@ -0,0 +1,146 @@
+"""Обработчики фоновых задач (см. ``mainvip.jobs``).
+
+Все задачи можно безопасно повторить: выгрузки пересоздают файл,
+импорт обновляет клиентов по email, пересчеты строятся с нуля.
+"""
+import io
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import QueryDict
+
+from . import counters, dedup, exports, reports, summary
+from .imports import import_clients as run_import
+from .jobs import save_result_file, set_progress, task
+from .models import ClientDedupKey, Interaction
+from .queries import CLIENT_SORTS, IMPORT_ERRORS_SHOWN, REPORT_SECTIONS, filter_clients
+from .search import get_search_backend
+
+# Как часто сообщать о ходе выгрузки (в строках)
+PROGRESS_ROWS = 1000
+
+
+def _heartbeat(job, message):
+    """progress(done, total) для пересчетов: отчет о ходе после каждого пакета.
+
+    Без него обработчик долгого пересчета считается зависшим (jobs.requeue_stale),
+    и тот же пересчет запускается второй раз параллельно.
+    """
+    def progress(done, total):
+        set_progress(job, done, total, message.format(done=done, total=total))
+    return progress
+
+
+def _report_rows(job, rows, total):
+    for number, row in enumerate(rows, start=1):
+        yield row
+        if number % PROGRESS_ROWS == 0:
+            set_progress(job, number, total, f'Выгружено строк: {number} из {total}')
+
+
+@task('export_clients', 'Выгрузка VIP-клиентов')
+def export_clients(job, query='', format='csv'):
+    """Выгрузка списка VIP-клиентов с фильтрами из строки запроса query"""
+    clients, search_query, status_filter, stale_filter, sort = filter_clients(QueryDict(query))
+    clients = clients.order_by(*CLIENT_SORTS[sort])
+    total = clients.count()
+    chunks, extension, _ = exports.export_stream(
+        format, exports.CLIENT_HEADER, _report_rows(job, exports.client_rows(clients), total),
+        sheet_name='VIP-клиенты',
+    )
+    save_result_file(job, f'vip_clients.{extension}', chunks)
+    return {'rows': total}
+
+
+@task('export_interactions', 'Выгрузка взаимодействий клиента')
+def export_interactions(job, client_id, format='csv'):
+    """Выгрузка истории взаимодействий с VIP-клиентом"""
+    interactions = Interaction.objects.filter(vip_client_id=client_id).order_by('-date', '-interaction_id')
+    total = interactions.count()
+    chunks, extension, _ = exports.export_stream(
+        format, exports.INTERACTION_HEADER, _report_rows(job, exports.interaction_rows(interactions), total),
+        sheet_name='Взаимодействия',
+    )
+    save_result_file(job, f'interactions_{client_id}.{extension}', chunks)
+    return {'rows': total}
+
+
+@task('import_clients', 'Импорт VIP-клиентов')
+def import_clients(job, path):
+    """Импорт VIP-клиентов из загруженного CSV-файла (path — имя в default_storage)"""
+    finished = False
+    try:
+        size = default_storage.size(path)
+        with default_storage.open(path, 'rb') as f:
+            def progress(result):
+                set_progress(job, f.tell(), size, f'Обработано строк: {result.rows}, записано: {result.imported}')
+
+            result = run_import(f, batch_size=settings.IMPORT_BATCH_SIZE, progress=progress)
+
+        if result.error_count:
+            report = io.StringIO()
+            result.write_report(report)
+            save_result_file(job, 'import_errors.csv', [report.getvalue().encode('utf-8-sig')])
+        finished = True
+    finally:
+        # Файл нужен повторной попытке; после успеха или последней попытки он удаляется
+        if finished or job.attempts >= job.max_attempts:
+            default_storage.delete(path)
+    return {
+        'rows': result.rows,
+        'imported': result.imported,
+        'error_count': result.error_count,
+        'errors': result.errors[:IMPORT_ERRORS_SHOWN],
+    }
+
+
+@task('export_report', 'Отчет по взаимодействиям')
+def export_report(job, year):
+    """Отчет по взаимодействиям за год в XLSX"""
+    report = reports.build_report(year)
+    set_progress(job, 50, message='Отчет рассчитан')
+    header = ['Разрез', 'Значение', *report['months'], 'Итого']
+    rows = [['Всего', '', *report['totals'], report['total']]]
+    for dimension, title in REPORT_SECTIONS:
+        for row in report['dimensions'][dimension]:
+            rows.append([title, row['label'], *row['months'], row['total']])
+    chunks, extension, _ = exports.export_stream('xlsx', header, rows, sheet_name=f'Отчет {year}')
+    save_result_file(job, f'report_{year}.{extension}', chunks)
+    return {'year': year, 'total': report['total']}
+
+
+@task('rebuild_counters', 'Пересчет счетчиков дашборда')
+def rebuild_counters(job):
+    """Пересчет счетчиков дашборда"""
+    counters.rebuild(progress=_heartbeat(job, 'Пересчитано счетчиков: {done} из {total}'))
+    return counters.get_counters()
+
+
+@task('rebuild_interaction_summary', 'Пересчет сводки по взаимодействиям')
+def rebuild_interaction_summary(job, client_ids=None):
+    """Пересчет сводки по взаимодействиям клиентов"""
+    summary.rebuild(client_ids, progress=_heartbeat(job, 'Пересчитано клиентов: {done} из {total}'))
+    return {}
+
+
+@task('rebuild_search_index', 'Перестроение поискового индекса')
+def rebuild_search_index(job):
+    """Перестроение поискового индекса VIP-клиентов"""
+    get_search_backend().rebuild(progress=_heartbeat(job, 'Проиндексировано клиентов: {done} из {total}'))
+    return {}
+
+
+@task('find_duplicates', 'Поиск дубликатов VIP-клиентов')
+def find_duplicates(job):
+    """Поиск групп возможных дубликатов VIP-клиентов с выгрузкой в CSV"""
+    total = ClientDedupKey.objects.count()
+
+    def progress(result):
+        set_progress(job, result.keys, total, f'Просмотрено ключей: {result.keys} из {total}')
+
+    result = dedup.find_groups(progress=progress)
+    chunks, extension, _ = exports.export_stream(
+        'csv', exports.DUPLICATE_HEADER, exports.duplicate_rows(result.groups, dedup.KIND_LABELS),
+    )
+    save_result_file(job, f'duplicates.{extension}', chunks)
+    return {'groups': len(result.groups), 'clients': result.clients, 'skipped_blocks': result.skipped_blocks}
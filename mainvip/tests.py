@@ -1,3 +1,1477 @@
-from django.test import TestCase
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import audit, counters, dedup, exports, jobs, metrics, reports, summary, throttle
+from .imports import import_clients
+from .models import ClientChange, ClientDedupKey, Interaction, Job, Organization, Role, User, VIPClient
+from .pagination import KeysetPaginator, get_page_size
+from .queries import CLIENT_SORTS
+from .search import get_search_backend
+
+# Страницы в тестах рендерятся без collectstatic: манифест хешированных имен не нужен
+PLAIN_STATIC_STORAGES = {
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+# Свой кэш в памяти процесса: тесты не читают и не очищают кэш работающего приложения
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'mainvip-tests'},
+}
+_test_caches = override_settings(CACHES=TEST_CACHES)
+
+
+def setUpModule():
+    _test_caches.enable()
+
+
+def tearDownModule():
+    _test_caches.disable()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть только в SQLite')
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class QueryPlanTests(TestCase):
+    """Запросы основных страниц должны использовать индексы, а не полный просмотр таблиц"""
+
+    TABLES = ('vip_clients', 'interactions', 'organizations')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        organization = Organization.objects.create(name='ООО "Тест"', type='IT-компания')
+        cls.clients = []
+        for i in range(30):
+            client = VIPClient.objects.create(
+                full_name=f'Клиент {i}',
+                position='Директор',
+                phone=f'+7 (495) 000-00-{i:02d}',
+                email=f'client{i}@example.com',
+                organization=organization,
+                status='active' if i % 3 else 'potential',
+            )
+            cls.clients.append(client)
+            for j in range(5):
+                Interaction.objects.create(
+                    vip_client=client,
+                    user=cls.user,
+                    date=date.today() - timedelta(days=i + j),
+                    type='call',
+                    description='Звонок',
+                )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def assertUsesIndexes(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+
+        checked = 0
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or not any(f'"{table}"' in sql for table in self.TABLES):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            for step in plan:
+                self.assertIsNone(
+                    re.fullmatch(r'SCAN (\w+)', step),
+                    f'Полный просмотр таблицы в запросе {sql!r}: {plan}',
+                )
+            checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_dashboard(self):
+        self.assertUsesIndexes(reverse('dashboard'))
+
+    def test_clients_list(self):
+        self.assertUsesIndexes(reverse('vip_clients_list'))
+
+    def test_clients_list_by_status(self):
+        self.assertUsesIndexes(reverse('vip_clients_list'), {'status': 'active', 'sort': 'new'})
+
+    def test_clients_list_by_last_contact(self):
+        self.assertUsesIndexes(reverse('vip_clients_list'), {'sort': 'contact'})
+        self.assertUsesIndexes(reverse('vip_clients_list'), {'sort': '-contact'})
+        self.assertUsesIndexes(reverse('vip_clients_list'), {'sort': 'interactions'})
+
+    def test_clients_list_not_contacted(self):
+        self.assertUsesIndexes(reverse('vip_clients_list'), {'stale': '90', 'sort': '-contact'})
+
+    def test_client_detail(self):
+        self.assertUsesIndexes(reverse('vip_client_detail', args=[self.clients[0].pk]))
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class JobTests(TestCase):
+    """Фоновые задачи: постановка из представления, выполнение, повтор и результат"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name, JOBS_RETRY_DELAY=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        for i in range(3):
+            VIPClient.objects.create(full_name=f'Клиент {i}', position='Директор', phone=f'+7 900 000-00-0{i}',
+                                     email=f'client{i}@example.com', status='active' if i else 'inactive')
+        self.client.force_login(self.user)
+
+    def test_export_job(self):
+        response = self.client.post(reverse('vip_clients_export') + '?status=active&format=csv')
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertEqual(job.status, Job.QUEUED)
+
+        self.assertEqual(jobs.claim('test'), job.pk)
+        self.assertTrue(jobs.execute(job.pk))
+
+        status = self.client.get(reverse('job_status', args=[job.pk])).json()
+        self.assertEqual(status['status'], Job.DONE)
+        self.assertEqual(status['result'], {'rows': 2})
+        response = self.client.get(status['download_url'])
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertEqual(len(content.splitlines()), 3)
+        self.assertNotIn('Клиент 0', content)
+
+    def test_retry_then_fail(self):
+        job = jobs.enqueue('import_clients', user=self.user, max_attempts=2, path='jobs/uploads/missing.csv')
+
+        self.assertEqual(jobs.claim('test'), job.pk)
+        self.assertFalse(jobs.execute(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+
+        self.assertEqual(jobs.claim('test'), job.pk)
+        self.assertFalse(jobs.execute(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn('FileNotFoundError', job.error)
+        self.assertIsNone(jobs.claim('test'))
+
+    def test_import_upload_removed(self):
+        broken = default_storage.save('jobs/uploads/broken.csv', ContentFile(b'\xff\xfe'))
+        job = jobs.enqueue('import_clients', user=self.user, max_attempts=2, path=broken)
+        jobs.claim('test')
+        self.assertFalse(jobs.execute(job.pk))
+        self.assertTrue(default_storage.exists(broken))  # нужен повторной попытке
+        jobs.claim('test')
+        self.assertFalse(jobs.execute(job.pk))
+        self.assertFalse(default_storage.exists(broken))
+
+        upload = default_storage.save('jobs/uploads/clients.csv', ContentFile(
+            'ФИО,Должность,Телефон,Email\nНовый Клиент,Директор,+7 900 111-11-11,new@example.com\n'.encode()
+        ))
+        job = jobs.enqueue('import_clients', user=self.user, path=upload)
+        jobs.claim('test')
+        self.assertTrue(jobs.execute(job.pk))
+        self.assertTrue(VIPClient.objects.filter(email='new@example.com').exists())
+        self.assertFalse(default_storage.exists(upload))
+
+    def test_rebuild_heartbeat_per_batch(self):
+        job = jobs.enqueue('rebuild_interaction_summary', user=self.user)
+        jobs.claim('test')
+        with mock.patch.object(summary, 'REBUILD_BATCH_SIZE', 1), \
+                mock.patch('mainvip.tasks.set_progress', wraps=jobs.set_progress) as set_progress:
+            self.assertTrue(jobs.execute(job.pk))
+        self.assertEqual([call.args[1:3] for call in set_progress.call_args_list], [(1, 3), (2, 3), (3, 3)])
+        job.refresh_from_db()
+        self.assertEqual(job.message, 'Пересчитано клиентов: 3 из 3')
+
+    def test_other_users_job_hidden(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password', full_name='Другой')
+        job = jobs.enqueue('rebuild_counters', user=other)
+        self.assertEqual(self.client.get(reverse('job_detail', args=[job.pk])).status_code, 404)
+
+
+class ApiTests(TestCase):
+    """JSON API: выбираются только запрошенные столбцы, 304 без запросов к данным, массовая запись"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.organization = Organization.objects.create(name='ООО "Тест"', type='IT-компания')
+        cls.clients = [
+            VIPClient.objects.create(full_name=f'Клиент {i}', position='Директор', phone=f'+7 900 000-00-0{i}',
+                                     email=f'client{i}@example.com', organization=cls.organization if i % 2 else None)
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def data_queries(self, ctx):
+        return [query['sql'] for query in ctx.captured_queries if '"vip_clients"' in query['sql']]
+
+    def test_sparse_fields_and_include(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('api_clients'), {
+                'fields': 'full_name', 'include': 'organization', 'fields[organization]': 'name', 'per_page': 2,
+            })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['results'], [
+            {'id': self.clients[0].pk, 'full_name': 'Клиент 0', 'organization': None},
+            {'id': self.clients[1].pk, 'full_name': 'Клиент 1',
+             'organization': {'id': self.organization.pk, 'name': 'ООО "Тест"'}},
+        ])
+        [sql] = self.data_queries(ctx)
+        self.assertNotIn('"email"', sql)
+        self.assertIn('JOIN "organizations"', sql)
+
+        response = self.client.get(reverse('api_clients'), {'fields': 'email', 'cursor': data['next_cursor']})
+        self.assertEqual([item['id'] for item in response.json()['results']], [client.pk for client in self.clients[2:]])
+
+    def test_not_modified(self):
+        url = reverse('api_client', args=[self.clients[0].pk])
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.data_queries(ctx), [])
+
+        self.client.patch(url, json.dumps({'status': 'inactive'}), content_type='application/json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bulk_create_interactions(self):
+        client = self.clients[0]
+        items = [{'client': client.pk, 'date': f'2025-03-{day:02d}', 'type': 'call', 'description': 'Звонок'}
+                 for day in range(1, 11)]
+        response = self.client.post(reverse('api_interactions_bulk'), json.dumps(items), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['ids']), 10)
+        client.refresh_from_db()
+        self.assertEqual((client.interaction_count, client.last_interaction_date), (10, date(2025, 3, 10)))
+
+        items[0]['client'] = 0
+        response = self.client.post(reverse('api_interactions_bulk'), json.dumps(items), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('client', response.json()['errors']['0'])
+
+    def test_bulk_update_rejects_non_integer_ids(self):
+        url = reverse('api_clients_bulk')
+        for pk in ([self.clients[0].pk], {'pk': 1}, str(self.clients[0].pk), True, 10 ** 30):
+            items = [{'id': pk, 'status': 'inactive'}, {'id': self.clients[1].pk, 'status': 'inactive'}]
+            response = self.client.patch(url, json.dumps(items), content_type='application/json')
+            self.assertEqual(response.status_code, 400, pk)
+            self.assertEqual(list(response.json()['errors']), ['0'])
+        self.assertEqual(VIPClient.objects.filter(status='inactive').count(), 0)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class ConditionalGetTests(TestCase):
+    """Страницы клиентов отдают 304 по ETag без запросов к данным, пока данные не изменились"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.vip_client = VIPClient.objects.create(full_name='Клиент', position='Директор', phone='+7 900 000-00-00',
+                                                  email='client@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_client_detail(self):
+        url = reverse('vip_client_detail', args=[self.vip_client.pk])
+        self.client.get(reverse('vip_clients_list'))  # CSRF-cookie выдается первой страницей с формой
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([query for query in ctx.captured_queries if '"vip_clients"' in query['sql']])
+
+        Interaction.objects.create(vip_client=self.vip_client, user=self.user, date=date.today(),
+                                   type='call', description='Звонок')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pages_depend_on_user(self):
+        self.client.get(reverse('vip_clients_list'))  # CSRF-cookie
+        for name in ('vip_clients_list', 'organizations_list', 'vip_client_detail'):
+            url = reverse(name, args=[self.vip_client.pk] if name == 'vip_client_detail' else [])
+            with self.subTest(page=name):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+                # Имя пользователя выводится в шапке страницы
+                self.user.full_name = f'Менеджер {name}'
+                self.user.save()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, f'Менеджер {name}')
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class AuditTests(TestCase):
+    """Журнал изменений клиентов: только измененные поля, одна вставка на запрос, откат без записей"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.organization = Organization.objects.create(name='ООО "Тест"', type='IT-компания')
+        cls.vip_client = VIPClient.objects.create(full_name='Клиент', position='Директор', phone='+7 900 000-00-00',
+                                                  email='client@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_edit_records_changed_fields(self):
+        data = {
+            'full_name': 'Клиент', 'position': 'Председатель', 'phone': '+7 900 000-00-00',
+            'email': 'client@example.com', 'organization': str(self.organization.pk), 'status': 'active', 'notes': '',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('vip_client_edit', args=[self.vip_client.pk]), data)
+        change = ClientChange.objects.get()
+        self.assertEqual(change.action, ClientChange.UPDATE)
+        self.assertEqual(change.user, self.user)
+        self.assertEqual(change.changes, {
+            'position': ['Директор', 'Председатель'],
+            'organization_id': [None, self.organization.pk],
+        })
+
+        response = self.client.get(reverse('vip_client_history', args=[self.vip_client.pk]))
+        self.assertContains(response, 'Председатель')
+        self.assertContains(response, 'ООО &quot;Тест&quot;')
+
+    def test_one_insert_per_collect(self):
+        clients = [self.vip_client] + [
+            VIPClient.objects.create(full_name=f'Клиент {i}', position='Директор', phone=f'+7 900 000-00-0{i}',
+                                     email=f'client{i}@example.com')
+            for i in range(1, 4)
+        ]
+        with CaptureQueriesContext(connection) as queries, audit.collect():
+            # Две транзакции, как у запроса с несколькими сохранениями без ATOMIC_REQUESTS
+            for part in (clients[:2], clients[2:]):
+                with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                    for client in part:
+                        client.status = 'inactive'
+                        client.save()
+            self.assertEqual(ClientChange.objects.count(), 0)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "client_changes"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ClientChange.objects.count(), 4)
+
+    def test_rollback_discards_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.vip_client.position = 'Председатель'
+                self.vip_client.save()
+            try:
+                with transaction.atomic():
+                    self.vip_client.status = 'inactive'
+                    self.vip_client.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                self.vip_client.phone = '+7 900 000-00-99'
+                self.vip_client.save()
+        self.assertEqual(
+            sorted(change for entry in ClientChange.objects.all() for change in entry.changes),
+            ['phone', 'position'],
+        )
+
+    def test_history_kept_after_delete(self):
+        pk = self.vip_client.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('vip_client_delete', args=[pk]))
+        change = ClientChange.objects.get(vip_client_id=pk)
+        self.assertEqual(change.action, ClientChange.DELETE)
+        self.assertEqual(change.changes['email'], ['client@example.com', None])
+
+        response = self.client.get(reverse('vip_client_history', args=[pk]), {'date_from': timezone.localdate().isoformat()})
+        self.assertContains(response, 'Удаление')
+        response = self.client.get(reverse('vip_client_history', args=[pk]),
+                                   {'date_to': (timezone.localdate() - timedelta(days=1)).isoformat()})
+        self.assertContains(response, 'Изменений за период нет')
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, ORGANIZATIONS_PAGE_SIZE=10)
+class OrganizationRollupTests(TestCase):
+    """Сводка по организациям: один запрос на страницу независимо от числа организаций и клиентов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_organizations(self, count, start=0):
+        for i in range(start, start + count):
+            organization = Organization.objects.create(name=f'Организация {i:02}', type='IT-компания')
+            for j in range(i % 4):
+                VIPClient.objects.create(full_name=f'Клиент {i}-{j}', position='Директор', phone='+7 900 000-00-00',
+                                         email=f'client{i}-{j}@example.com', organization=organization,
+                                         status='active' if j % 2 else 'inactive',
+                                         last_interaction_date=date(2024, 1, 1) + timedelta(days=i + j))
+
+    def count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('organizations_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_constant_queries_per_page(self):
+        self.create_organizations(3)
+        self.count_queries()  # Пользователь попадает в кэш (mainvip.auth)
+        few, _ = self.count_queries()
+        self.create_organizations(30, start=3)
+        many, response = self.count_queries()
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['organizations']), 10)
+
+        # Следующая страница с сортировкой по сводному показателю — столько же запросов
+        _, response = self.count_queries({'sort': 'clients'})
+        next_queries, _ = self.count_queries({'sort': 'clients', 'cursor': response.context['page'].next_cursor})
+        self.assertEqual(next_queries, many)
+
+    def test_sort_by_rollups(self):
+        self.create_organizations(8)
+        _, response = self.count_queries({'sort': 'clients'})
+        organizations = list(response.context['organizations'])
+        self.assertEqual([org.client_count for org in organizations], [3, 3, 2, 2, 1, 1, 0, 0])
+        self.assertEqual(organizations[0].name, 'Организация 07')
+        self.assertEqual(organizations[0].active_client_count, 1)
+        self.assertEqual(organizations[0].last_interaction_date, date(2024, 1, 10))
+
+        _, response = self.count_queries({'sort': 'contact'})
+        dates = [org.last_interaction_date for org in response.context['organizations']]
+        self.assertEqual(dates[:2], [date(2024, 1, 10), date(2024, 1, 8)])
+        self.assertEqual(dates[-2:], [None, None])
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class CachedAuthTests(TestCase):
+    """Пользователь из сессии берется из кэша процесса, пока пользователи и роли не изменились"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(role_name='Менеджер')
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер',
+                                            role=cls.role)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_jobs_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('jobs_list'))
+        user_queries = [query for query in queries.captured_queries if 'FROM "users"' in query['sql']]
+        return response, user_queries
+
+    def test_user_cached_until_saved(self):
+        self.get_jobs_list()
+        response, user_queries = self.get_jobs_list()
+        self.assertEqual(user_queries, [])
+        self.assertEqual(response.wsgi_request.user.role.role_name, 'Менеджер')
+
+        User.objects.filter(pk=self.user.pk).update(full_name='Без сигнала')
+        self.user.full_name = 'Новое имя'
+        self.user.save()
+        response, user_queries = self.get_jobs_list()
+        self.assertEqual(len(user_queries), 1)
+        self.assertContains(response, 'Новое имя')
+
+        self.role.role_name = 'Руководитель'
+        self.role.save()
+        response, _ = self.get_jobs_list()
+        self.assertEqual(response.wsgi_request.user.role.role_name, 'Руководитель')
+
+    def test_inactive_user_logged_out(self):
+        self.get_jobs_list()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('jobs_list'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('jobs_list')}")
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, LOGIN_THROTTLE_IP_LIMIT=10, LOGIN_THROTTLE_USER_LIMIT=3)
+class LoginThrottleTests(TestCase):
+    """Попытки входа сверх лимита отклоняются до проверки пароля"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+
+    def setUp(self):
+        django_cache.clear()
+
+    def login(self, password, username='manager', ip='192.0.2.1'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'username': username, 'password': password},
+                                        REMOTE_ADDR=ip)
+        return response, len(queries)
+
+    def test_user_locked_after_limit(self):
+        for i in range(3):
+            response, _ = self.login(f'wrong{i}')
+            self.assertEqual(response.status_code, 200)
+        # Блокировка по имени пользователя действует и с другого адреса и с верным паролем
+        response, queries = self.login('password', ip='192.0.2.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(queries, 0)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(throttle.get_metrics()[throttle.LOCKOUTS], 1)
+
+    def test_ip_limit_across_usernames(self):
+        for i in range(10):
+            self.assertEqual(self.login('wrong', username=f'user{i}')[0].status_code, 200)
+        self.assertEqual(self.login('password')[0].status_code, 429)
+        self.assertEqual(self.login('password', ip='192.0.2.2')[0].status_code, 302)
+
+    def test_success_does_not_use_limit(self):
+        for _ in range(5):
+            response, _ = self.login('password')
+            self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+            self.client.logout()
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, DEDUP_MAX_BLOCK_SIZE=3)
+class DedupTests(TestCase):
+    """Поиск дубликатов: ключи блокировки, группы, предупреждение при сохранении"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.ivanov = VIPClient.objects.create(full_name='Иванов Иван Иванович', position='Директор',
+                                              phone='+7 (916) 123-45-67', email='ivanov@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create(self, full_name, phone, email):
+        return VIPClient.objects.create(full_name=full_name, position='Директор', phone=phone, email=email)
+
+    def test_keys(self):
+        self.assertEqual(dedup.phonetic_code('Иванов'), dedup.phonetic_code('Ivanoff'))
+        self.assertEqual(dedup.phonetic_code('Щербаков'), dedup.phonetic_code('Shcherbakov'))
+        self.assertEqual(dedup.phone_key('8 916 1234567'), dedup.phone_key('+7 (916) 123-45-67'))
+        self.assertEqual(dedup.email_key('I.Vanov+work@GMail.com'), 'ivanov@gmail.com')
+        # Пропущенное отчество и другой порядок слов дают общий ключ
+        self.assertTrue(dedup.name_keys('Иванов Иван Иванович') & dedup.name_keys('Ivan Ivanov'))
+        self.assertFalse(dedup.is_name_match('Иванов Иван', 'Иванов Петр'))
+
+    def test_keys_follow_client(self):
+        self.ivanov.phone = '+7 (495) 000-00-00'
+        self.ivanov.save()
+        self.assertIn('4950000000', self.ivanov.dedup_keys.filter(kind=dedup.PHONE).values_list('key', flat=True))
+        self.assertEqual(self.ivanov.dedup_keys.filter(kind=dedup.PHONE).count(), 1)
+        pk = self.ivanov.pk
+        self.ivanov.delete()
+        self.assertFalse(ClientDedupKey.objects.filter(vip_client_id=pk).exists())
+
+    def test_find_groups(self):
+        by_phone = self.create('Петров Петр', '8 916 1234567', 'petrov@example.com')
+        by_name = self.create('Ivanov Ivan', '+7 900 111-11-11', 'ivan@example.org')
+        other = self.create('Сидоров Сидор', '+7 900 222-22-22', 'sidorov@example.com')
+        # Блок больше DEDUP_MAX_BLOCK_SIZE не сравнивается
+        for i in range(4):
+            self.create('Смирнов Алексей', f'+7 901 000-00-0{i}', f'smirnov{i}@example.com')
+
+        result = dedup.find_groups()
+        self.assertEqual(result.groups, [
+            (sorted([self.ivanov.pk, by_phone.pk, by_name.pk]), [dedup.NAME, dedup.PHONE]),
+        ])
+        self.assertEqual(result.skipped_blocks, 1)
+        self.assertNotIn(other.pk, result.groups[0][0])
+
+    def test_warning_on_add(self):
+        data = {
+            'full_name': 'Иванов Иван', 'position': 'Директор', 'phone': '+7 900 333-33-33',
+            'email': 'IVANOV+vip@example.com', 'status': 'active', 'notes': '',
+        }
+        response = self.client.post(reverse('vip_client_add'), data, follow=True)
+        self.assertContains(response, 'Возможные дубликаты: Иванов Иван Иванович')
+        self.assertContains(response, 'совпадает: Email, ФИО')
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class TemplateRowsTests(TestCase):
+    """Строки таблиц рендерятся шаблонами строк с автоэкранированием"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.vip_client = VIPClient.objects.create(full_name='Клиент <b>', position='Директор & Co', phone='+7 900',
+                                                  email='client@example.com')
+        Interaction.objects.create(vip_client=cls.vip_client, user=cls.user, date=date(2026, 3, 8), type='call',
+                                   description='Звонок "по делу"')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_benchmark(self):
+        output = StringIO()
+        call_command('benchmark_templates', rows=[30], repeat=1, loads=1, stdout=output)
+        self.assertIn('✓', output.getvalue())
+
+    def test_pages(self):
+        response = self.client.get(reverse('vip_clients_list'))
+        self.assertContains(response, 'Клиент &lt;b&gt;')
+        self.assertContains(response, f'href="{reverse("vip_client_edit", args=[self.vip_client.pk])}"')
+        response = self.client.get(reverse('vip_client_detail', args=[self.vip_client.pk]))
+        self.assertContains(response, '<td>8 марта 2026 г.</td>')
+        self.assertContains(response, 'Звонок &quot;по делу&quot;')
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class ImportTests(TestCase):
+    """Импорт клиентов из CSV: обновление по email без учета регистра, ошибки в строках, границы пакетов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='ООО "Тест"', type='IT-компания')
+        cls.existing = VIPClient.objects.create(full_name='Старое имя', position='Директор', phone='+7 900 000-00-00',
+                                                email='client@example.com', status='inactive')
+
+    def run_import(self, rows, **kwargs):
+        header = 'ФИО,Должность,Телефон,Email,Организация,Статус\n'
+        return import_clients(StringIO(header + ''.join(rows)), **kwargs)
+
+    def test_upsert_by_email(self):
+        result = self.run_import([
+            'Новое имя,Председатель,+7 900 111-11-11,CLIENT@Example.com,"ООО ""Тест""",Активный\n',
+            'Новый клиент,Директор,+7 900 222-22-22,New@example.com,,\n',
+        ])
+        self.assertEqual((result.rows, result.imported, result.error_count), (2, 2, 0))
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.full_name, self.existing.position, self.existing.status, self.existing.organization),
+            ('Новое имя', 'Председатель', 'active', self.organization),
+        )
+        self.assertEqual(self.existing.email, 'client@example.com')
+        self.assertEqual(VIPClient.objects.get(email='new@example.com').status, 'active')
+        self.assertEqual(VIPClient.objects.count(), 2)
+
+    def test_audit_records_previous_values(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import([
+                'Новое имя,Директор,+7 900 000-00-00,CLIENT@Example.com,"ООО ""Тест""",\n',
+                'Новый клиент,Директор,+7 900 222-22-22,new@example.com,,\n',
+            ])
+        change = ClientChange.objects.get(vip_client_id=self.existing.pk)
+        self.assertEqual(change.action, ClientChange.IMPORT)
+        # Email в другом регистре и пустой статус изменениями не считаются
+        self.assertEqual(change.changes, {
+            'full_name': ['Старое имя', 'Новое имя'],
+            'organization_id': [None, self.organization.pk],
+        })
+        created = ClientChange.objects.exclude(vip_client_id=self.existing.pk).get()
+        self.assertEqual(created.changes['email'], [None, 'new@example.com'])
+
+    def test_case_insensitive_unique_email(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            VIPClient.objects.bulk_create([VIPClient(full_name='Копия', position='Директор', phone='+7 900',
+                                                     email='Client@Example.com')])
+
+    def test_bad_rows_reported(self):
+        result = self.run_import([
+            'Клиент 1,Директор,+7 900 111-11-11,not-an-email,,\n',
+            'Клиент 2,Директор,+7 900 222-22-22,two@example.com,Нет такой,\n',
+            'Клиент 3,Директор,+7 900 333-33-33,three@example.com,,Неизвестный\n',
+            'Клиент 4,Директор,+7 900 444-44-44,four@example.com,,\n',
+        ])
+        self.assertEqual((result.rows, result.imported, result.error_count), (4, 1, 3))
+        self.assertEqual([error['line'] for error in result.errors], [2, 3, 4])
+        self.assertIn('email', result.errors[0]['error'])
+        self.assertIn('Нет такой', result.errors[1]['error'])
+        self.assertEqual(list(VIPClient.objects.order_by('pk').values_list('email', flat=True)),
+                         ['client@example.com', 'four@example.com'])
+
+    def test_absent_columns_kept(self):
+        VIPClient.objects.filter(pk=self.existing.pk).update(organization=self.organization, notes='Важный клиент')
+        result = import_clients(StringIO(
+            'ФИО,Должность,Телефон,Email\n'
+            'Новое имя,Председатель,+7 900 111-11-11,client@example.com\n'
+        ))
+        self.assertEqual((result.imported, result.error_count), (1, 0))
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.full_name, self.existing.status, self.existing.organization, self.existing.notes),
+            ('Новое имя', 'inactive', self.organization, 'Важный клиент'),
+        )
+
+        # Пустые ячейки необязательных колонок тоже не сбрасывают значения
+        self.run_import(['Новое имя,Председатель,+7 900 111-11-11,client@example.com,,\n'])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.status, self.existing.organization), ('inactive', self.organization))
+        self.assertEqual(counters.get_counters()[counters.ACTIVE_CLIENTS], 0)
+
+    def test_missing_columns(self):
+        result = import_clients(StringIO('ФИО,Email\nКлиент,client@example.com\n'))
+        self.assertEqual((result.imported, result.error_count), (0, 1))
+        self.assertEqual(result.errors[0]['error'], 'Нет обязательных колонок: position, phone')
+
+    def test_batch_boundaries(self):
+        rows = [f'Клиент {i},Директор,+7 900 000-00-{i:02d},c{i}@example.com,,\n' for i in range(5)]
+        rows += [
+            # Тот же email в следующем пакете — обновление, в том же пакете — побеждает последняя строка
+            'Клиент 0 повтор,Директор,+7 900 000-00-99,C0@example.com,,\n',
+            'Клиент 5,Директор,+7 900 000-00-05,c5@example.com,,\n',
+            'Клиент 5 исправлен,Директор,+7 900 000-00-05,c5@example.com,,\n',
+        ]
+        progress = []
+        result = self.run_import(rows, batch_size=2, progress=lambda result: progress.append(result.imported))
+        self.assertEqual((result.rows, result.imported, result.error_count), (8, 7, 0))
+        self.assertEqual(progress, [2, 4, 6])
+        self.assertEqual(VIPClient.objects.count(), 7)
+        self.assertEqual(VIPClient.objects.get(email='c0@example.com').full_name, 'Клиент 0 повтор')
+        self.assertEqual(VIPClient.objects.get(email='c5@example.com').full_name, 'Клиент 5 исправлен')
+        self.assertEqual(counters.get_counters()[counters.TOTAL_CLIENTS], 7)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, REQUEST_METRICS_SERVER_TIMING=True)
+class AsyncViewTests(TestCase):
+    """Одновременные запросы к async-представлениям отвечают и учитываются независимо"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        organization = Organization.objects.create(name='ООО "Тест"', type='IT-компания')
+        VIPClient.objects.bulk_create([
+            VIPClient(full_name=f'Клиент {i}', position='Директор', phone=f'+7 900 000-00-{i:02d}',
+                      email=f'client{i}@example.com', organization=organization,
+                      status='active' if i % 2 else 'inactive')
+            for i in range(30)
+        ])
+
+    @staticmethod
+    def query_count(response):
+        return int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+
+    async def test_concurrent_requests(self):
+        await self.async_client.aforce_login(self.user)
+        client = await VIPClient.objects.afirst()
+        urls = [reverse('vip_clients_list'), f"{reverse('vip_clients_list')}?status=active",
+                reverse('organizations_list'), reverse('dashboard'), reverse('vip_client_detail', args=[client.pk])]
+        expected = {}
+        for url in urls:
+            await self.async_client.get(url)  # пользователь и версии кэша попадают в кэш
+            response = await self.async_client.get(url)
+            expected[url] = (self.query_count(response), response.content.count(b'<tr>'))
+        self.assertTrue(all(queries for queries, _ in expected.values()))
+
+        requests = urls * 4
+        responses = await asyncio.gather(*(self.async_client.get(url) for url in requests))
+        for url, response in zip(requests, responses):
+            self.assertEqual(response.status_code, 200)
+            # Запросы соседних ответов не попадают в метрики этого
+            self.assertEqual((self.query_count(response), response.content.count(b'<tr>')), expected[url])
+
+    async def test_query_metrics_isolated(self):
+        async def run(count):
+            request_metrics = metrics.RequestMetrics()
+            token = metrics.activate(request_metrics)
+            try:
+                for _ in range(count):
+                    await VIPClient.objects.acount()
+                    await asyncio.sleep(0)
+            finally:
+                metrics.deactivate(token)
+            return request_metrics.queries
+
+        # Запросы идут через одно соединение вперемешку, но каждый учитывается только в своих метриках
+        self.assertEqual(await asyncio.gather(run(1), run(2), run(3)), [1, 2, 3])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Индекс FTS5 есть только в SQLite')
+class SearchTests(TestCase):
+    """Поиск клиентов по индексу FTS5: префиксы слов, телефон, email, ранжирование, обновление индекса"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ivanov = VIPClient.objects.create(full_name='Иванов Иван Петрович', position='Директор',
+                                              phone='+7 (495) 123-45-67', email='ivanov@example.com')
+        cls.petrov = VIPClient.objects.create(full_name='Петров Сергей', position='Советник Иванова',
+                                              phone='+7 (812) 700-00-00', email='petrov@example.com')
+        cls.sidorova = VIPClient.objects.create(full_name='Сидорова Алёна', position='Учредитель',
+                                                phone='8 916 555-12-34', email='alena@corp.ru')
+
+    def search(self, query):
+        clients = get_search_backend().search(VIPClient.objects.all(), query)
+        return [client.full_name for client in clients.order_by(*CLIENT_SORTS['relevance'])]
+
+    def test_name_prefix(self):
+        self.assertEqual(self.search('сид ал'), ['Сидорова Алёна'])
+        self.assertEqual(self.search('Алена'), ['Сидорова Алёна'])
+        self.assertEqual(self.search('серг'), ['Петров Сергей'])
+        self.assertEqual(self.search('Иванов Сидоров'), [])
+
+    def test_phone(self):
+        for query in ('+7 495 123 45 67', '84951234567', '(495) 123-45', '123-45-67', '495', '49-5'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), ['Иванов Иван Петрович'])
+        self.assertEqual(self.search('+7 916 555'), ['Сидорова Алёна'])
+        self.assertEqual(self.search('555-99-99'), [])
+
+    def test_email(self):
+        self.assertEqual(self.search('ivanov@example.com'), ['Иванов Иван Петрович'])
+        self.assertEqual(self.search('corp'), ['Сидорова Алёна'])
+
+    def test_ranking(self):
+        # Совпадение в ФИО весит больше, чем в должности
+        self.assertEqual(self.search('иванов'), ['Иванов Иван Петрович', 'Петров Сергей'])
+
+        paginator = KeysetPaginator(get_search_backend().search(VIPClient.objects.all(), 'иванов'),
+                                    CLIENT_SORTS['relevance'], 1)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual([client.pk for client in [*first, *second]], [self.ivanov.pk, self.petrov.pk])
+        self.assertFalse(second.has_next)
+
+    def test_index_follows_save_and_delete(self):
+        client = VIPClient.objects.create(full_name='Новиков Олег', position='Директор', phone='+7 900 111-22-33',
+                                          email='novikov@example.com')
+        self.assertEqual(self.search('новик'), ['Новиков Олег'])
+
+        client.full_name = 'Смирнов Олег'
+        client.save()
+        self.assertEqual(self.search('новик'), [])
+        self.assertEqual(self.search('смирн'), ['Смирнов Олег'])
+
+        client.delete()
+        self.assertEqual(self.search('олег'), [])
+        self.assertEqual(self.search('9001112233'), [])
+
+    def test_list_page(self):
+        user = User.objects.create_user('manager', 'manager@example.com', 'password')
+        self.client.force_login(user)
+        with override_settings(STORAGES=PLAIN_STATIC_STORAGES):
+            response = self.client.get(reverse('vip_clients_list'), {'search': 'иванов'})
+        self.assertEqual([client.pk for client in response.context['clients']], [self.ivanov.pk, self.petrov.pk])
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class CacheInvalidationTests(TestCase):
+    """Кэшированные фрагменты страниц обновляются после изменения данных"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.vip_client = VIPClient.objects.create(full_name='Клиент', position='Директор', phone='+7 900 000-00-00',
+                                                  email='client@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_dashboard(self):
+        return self.client.get(reverse('dashboard')).content.decode()
+
+    def test_dashboard_interactions(self):
+        self.assertIn('Нет взаимодействий', self.get_dashboard())
+
+        interaction = Interaction.objects.create(vip_client=self.vip_client, user=self.user, date=date.today(),
+                                                 type='call', description='Первый звонок')
+        self.assertIn('Первый звонок', self.get_dashboard())
+
+        interaction.description = 'Исправленный звонок'
+        interaction.save()
+        page = self.get_dashboard()
+        self.assertIn('Исправленный звонок', page)
+        self.assertNotIn('Первый звонок', page)
+
+        interaction.delete()
+        self.assertIn('Нет взаимодействий', self.get_dashboard())
+
+    def test_client_cascade_delete(self):
+        Interaction.objects.bulk_create([
+            Interaction(vip_client=self.vip_client, user=self.user, date=date.today(), type='call',
+                        description=f'Звонок {i}')
+            for i in range(3)
+        ])
+        summary.rebuild([self.vip_client.pk])
+        self.assertIn('Звонок 0', self.get_dashboard())
+
+        client = VIPClient.objects.get(pk=self.vip_client.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            client.delete()
+        # Взаимодействия удаляются одним DELETE, без чтения строк ради сигналов
+        interaction_queries = [query['sql'] for query in ctx.captured_queries if '"interactions"' in query['sql']]
+        self.assertEqual(len(interaction_queries), 1)
+        self.assertTrue(interaction_queries[0].startswith('DELETE'))
+        self.assertIn('Нет взаимодействий', self.get_dashboard())
+
+    def test_users_list(self):
+        self.assertIn('Менеджер', self.client.get(reverse('users_list')).content.decode())
+
+        User.objects.create_user('assistant', 'assistant@example.com', 'password', full_name='Ассистент')
+        self.assertIn('Ассистент', self.client.get(reverse('users_list')).content.decode())
+
+        self.user.full_name = 'Руководитель'
+        self.user.save()
+        page = self.client.get(reverse('users_list')).content.decode()
+        self.assertIn('Руководитель', page)
+        self.assertNotIn('Менеджер', page)
+
+
+class CounterTests(TestCase):
+    """Счетчики дашборда совпадают с COUNT(*) после любых изменений клиентов"""
+
+    def assertCounters(self, total, active):
+        values = counters.get_counters()
+        self.assertEqual((values[counters.TOTAL_CLIENTS], values[counters.ACTIVE_CLIENTS]), (total, active))
+        self.assertEqual((VIPClient.objects.count(), VIPClient.objects.filter(status='active').count()),
+                         (total, active))
+
+    def create_client(self, number, status='active'):
+        return VIPClient.objects.create(full_name=f'Клиент {number}', position='Директор',
+                                        phone=f'+7 900 000-00-{number:02d}', email=f'client{number}@example.com',
+                                        status=status)
+
+    def test_create_and_delete(self):
+        self.create_client(1)
+        inactive = self.create_client(2, status='inactive')
+        self.assertCounters(2, 1)
+        inactive.delete()
+        self.assertCounters(1, 1)
+
+    def test_status_change(self):
+        client = self.create_client(1, status='potential')
+        client.status = 'active'
+        client.save()
+        self.assertCounters(1, 1)
+        client.full_name = 'Переименован'
+        with CaptureQueriesContext(connection) as ctx:
+            client.save()
+        # Статус не менялся: только UPDATE самого сохранения, без условного UPDATE для счетчика
+        updates = [query for query in ctx.captured_queries if query['sql'].startswith('UPDATE "vip_clients"')]
+        self.assertEqual(len(updates), 1)
+        self.assertCounters(1, 1)
+        client.status = 'inactive'
+        client.save()
+        self.assertCounters(1, 0)
+
+    def test_concurrent_status_change(self):
+        self.create_client(1, status='inactive')
+        # Два экземпляра, прочитанные до изменения: активным клиент становится один раз
+        first, second = VIPClient.objects.get(), VIPClient.objects.get()
+        first.status = second.status = 'active'
+        first.save()
+        second.save()
+        self.assertCounters(1, 1)
+
+        # Экземпляр без прежнего статуса в памяти
+        stale = VIPClient.objects.only('pk', 'full_name').get()
+        stale.status = 'inactive'
+        stale.save()
+        self.assertCounters(1, 0)
+
+    def test_bulk_import(self):
+        self.create_client(1, status='inactive')
+        rows = ''.join(f'Клиент {i},Директор,+7 900 000-00-{i:02d},client{i}@example.com,,Активный\n'
+                       for i in range(1, 6))
+        with CaptureQueriesContext(connection) as ctx:
+            result = import_clients(StringIO(f'ФИО,Должность,Телефон,Email,Организация,Статус\n{rows}'),
+                                    batch_size=2)
+        self.assertEqual(result.imported, 5)
+        # Счетчики меняются на разницу каждого пакета, без пересчета COUNT(*)
+        self.assertFalse([query for query in ctx.captured_queries if 'COUNT(' in query['sql']])
+        self.assertCounters(5, 5)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class RequestMetricsTests(TestCase):
+    """Метрики запроса: заголовок Server-Timing только по настройке, строка лога на каждый запрос"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        VIPClient.objects.create(full_name='Клиент', position='Директор', phone='+7 900 000-00-00',
+                                 email='client@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_server_timing_off_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('vip_client_add')))
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+    def test_server_timing(self):
+        response = self.client.get(reverse('vip_client_add'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl')
+
+    def test_request_logged_at_debug(self):
+        with self.assertLogs('mainvip.metrics', 'DEBUG') as logs:
+            self.client.get(reverse('vip_client_add'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'DEBUG')
+        self.assertEqual((record['path'], record['status']), (reverse('vip_client_add'), 200))
+
+    def test_streaming_response_measured_after_body(self):
+        with self.assertLogs('mainvip.metrics', 'DEBUG') as logs:
+            response = self.client.get(reverse('vip_clients_export'), {'format': 'csv'})
+            # Тело еще не отправлено — запрос не записан
+            self.assertEqual(logs.records, [])
+            self.assertIn('Клиент', b''.join(response.streaming_content).decode('utf-8-sig'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('vip_clients_export'))
+        # В метрики попали и запросы, выполненные при формировании тела
+        self.assertGreaterEqual(record['queries'], 1)
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class ExportTests(TestCase):
+    """Выгрузка клиентов в CSV и XLSX: кодировка, фильтры, экранирование формул"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        organization = Organization.objects.create(name='ООО "Ёлка"', type='IT-компания')
+        VIPClient.objects.create(full_name='Щукин Ёжик', position='Директор', phone='+7 900 000-00-01',
+                                 email='schukin@example.com', organization=organization, status='active',
+                                 notes='=HYPERLINK("http://example.com")')
+        VIPClient.objects.create(full_name='Неактивный клиент', position='Советник', phone='8 900 000-00-02',
+                                 email='inactive@example.com', status='inactive')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('vip_clients_export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.export(format='csv', status='active')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="vip_clients.csv"')
+        self.assertTrue(content.startswith(b'\xef\xbb\xbf'))
+        rows = list(csv.reader(StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows[0], exports.CLIENT_HEADER)
+        self.assertEqual(len(rows), 2)
+        _, full_name, position, organization, phone, email, status, notes = rows[1]
+        self.assertEqual((full_name, organization, status), ('Щукин Ёжик', 'ООО "Ёлка"', 'Активный'))
+        # Значения, которые табличный редактор принял бы за формулу
+        self.assertEqual((phone, notes), ("'+7 900 000-00-01", '\'=HYPERLINK("http://example.com")'))
+
+    def test_csv_import_round_trip(self):
+        _, content = self.export(format='csv')
+        fields = ('email', 'full_name', 'position', 'phone', 'organization_id', 'status', 'notes')
+        exported = list(VIPClient.objects.order_by('email').values_list(*fields))
+        VIPClient.objects.update(phone='+7 000', status='potential', organization=None)
+        VIPClient.objects.filter(notes__isnull=False).update(notes='Изменено')
+
+        result = import_clients(BytesIO(content))
+        self.assertEqual((result.imported, result.error_count), (2, 0))
+        self.assertEqual(list(VIPClient.objects.order_by('email').values_list(*fields)), exported)
+
+    def test_csv_search(self):
+        _, content = self.export(format='csv', search='неактив')
+        rows = list(csv.reader(StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual([row[1] for row in rows[1:]], ['Неактивный клиент'])
+
+    def test_xlsx(self):
+        response, content = self.export(format='xlsx', status='active')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="vip_clients.xlsx"')
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            self.assertIn('VIP-клиенты', archive.read('xl/workbook.xml').decode())
+            sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        namespace = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = [
+            [cell.findtext('x:is/x:t', '', namespace) or cell.findtext('x:v', '', namespace)
+             for cell in row.findall('x:c', namespace)]
+            for row in sheet.findall('x:sheetData/x:row', namespace)
+        ]
+        self.assertEqual(rows[0], exports.CLIENT_HEADER)
+        self.assertEqual(len(rows), 2)
+        # В XLSX текст хранится строкой и не вычисляется — апостроф не нужен
+        self.assertEqual(rows[1][1:], ['Щукин Ёжик', 'Директор', 'ООО "Ёлка"', '+7 900 000-00-01',
+                                       'schukin@example.com', 'Активный', '=HYPERLINK("http://example.com")'])
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class InteractionSummaryTests(TestCase):
+    """Сводка клиента (число, дата последнего взаимодействия, разбивка по типам) следует за взаимодействиями"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.first, cls.second = (
+            VIPClient.objects.create(full_name=f'Клиент {i}', position='Директор', phone=f'+7 900 000-00-0{i}',
+                                     email=f'client{i}@example.com')
+            for i in (1, 2)
+        )
+
+    def assertSummary(self, client, count, last_date, type_counts):
+        client.refresh_from_db()
+        self.assertEqual((client.interaction_count, client.last_interaction_date), (count, last_date))
+        self.assertEqual(dict(client.type_counts.filter(count__gt=0).values_list('type', 'count')), type_counts)
+
+    def add(self, client, days_ago, interaction_type='call'):
+        return Interaction.objects.create(vip_client=client, user=self.user, type=interaction_type,
+                                          date=date.today() - timedelta(days=days_ago), description='Звонок')
+
+    def test_add_through_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('interaction_add', args=[self.first.pk]), {
+            'date': date.today().isoformat(), 'type': 'meeting', 'description': 'Встреча',
+        })
+        self.assertRedirects(response, reverse('vip_client_detail', args=[self.first.pk]))
+        self.assertSummary(self.first, 1, date.today(), {'meeting': 1})
+
+        # Ошибка записи откатывает и взаимодействие, и сводку
+        response = self.client.post(reverse('interaction_add', args=[self.first.pk]), {'type': 'call'})
+        self.assertEqual(response.status_code, 200)
+        self.assertSummary(self.first, 1, date.today(), {'meeting': 1})
+
+    def test_edit_date_and_type(self):
+        latest = self.add(self.first, 1)
+        self.add(self.first, 10, 'email')
+        self.assertSummary(self.first, 2, date.today() - timedelta(days=1), {'call': 1, 'email': 1})
+
+        latest.date = date.today() - timedelta(days=20)
+        latest.type = 'meeting'
+        latest.save()
+        self.assertSummary(self.first, 2, date.today() - timedelta(days=10), {'email': 1, 'meeting': 1})
+
+    def test_move_to_other_client(self):
+        interaction = self.add(self.first, 1)
+        self.add(self.first, 5)
+        interaction.vip_client = self.second
+        interaction.save()
+        self.assertSummary(self.first, 1, date.today() - timedelta(days=5), {'call': 1})
+        self.assertSummary(self.second, 1, date.today() - timedelta(days=1), {'call': 1})
+
+    def test_delete(self):
+        latest = self.add(self.first, 1)
+        self.add(self.first, 5, 'email')
+        latest.delete()
+        self.assertSummary(self.first, 1, date.today() - timedelta(days=5), {'email': 1})
+
+    def test_cascade_delete(self):
+        self.add(self.first, 1)
+        self.add(self.second, 2)
+        self.first.delete()
+        self.assertFalse(Interaction.objects.filter(vip_client_id=self.first.pk).exists())
+        self.assertSummary(self.second, 1, date.today() - timedelta(days=2), {'call': 1})
+
+    def test_rebuild_interaction_summary(self):
+        self.add(self.first, 3, 'email')
+        self.add(self.first, 1)
+        # Изменения в обход сигналов: сводка расходится с таблицей, пока ее не пересчитают
+        Interaction.objects.filter(type='email').update(type='meeting')
+        VIPClient.objects.update(interaction_count=0, last_interaction_date=None)
+        call_command('rebuild_interaction_summary', stdout=StringIO())
+        self.assertSummary(self.first, 2, date.today() - timedelta(days=1), {'call': 1, 'meeting': 1})
+        self.assertSummary(self.second, 0, None, {})
+
+
+class KeysetPaginatorTests(TestCase):
+    """Keyset-пагинация: курсоры вперед и назад, поддельные курсоры, NULL в ключах сортировки, размер страницы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        VIPClient.objects.bulk_create([
+            VIPClient(full_name=f'Клиент {i}', position='Директор', phone=f'+7 900 000-00-{i:02d}',
+                      email=f'client{i}@example.com',
+                      # У каждого третьего клиента нет взаимодействий, у остальных даты повторяются
+                      last_interaction_date=None if i % 3 == 0 else today - timedelta(days=i % 4))
+            for i in range(10)
+        ])
+
+    def walk(self, ordering, page_size=3):
+        """Все страницы вперед, затем назад; возвращает ключи клиентов в порядке обхода"""
+        paginator = KeysetPaginator(VIPClient.objects.all(), ordering, page_size)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        forward = [client.pk for page in pages for client in page]
+
+        backward_pages = [pages[-1]]
+        while backward_pages[-1].has_previous:
+            backward_pages.append(paginator.get_page(backward_pages[-1].prev_cursor))
+        backward = [client.pk for page in reversed(backward_pages) for client in page]
+        self.assertEqual(backward, forward)
+        self.assertFalse(backward_pages[-1].has_previous)
+        return forward
+
+    def test_round_trip(self):
+        expected = list(VIPClient.objects.order_by('full_name', 'vip_id').values_list('pk', flat=True))
+        self.assertEqual(self.walk(('full_name', 'vip_id')), expected)
+        self.assertEqual(self.walk(('-vip_id',), page_size=4), sorted(expected, reverse=True))
+
+    def test_null_sort_keys(self):
+        clients = list(VIPClient.objects.values_list('pk', 'last_interaction_date'))
+        # NULL считается наименьшим значением: первым по возрастанию и последним по убыванию
+        ascending = [pk for pk, _ in sorted(clients, key=lambda row: (row[1] is not None, row[1] or date.min, row[0]))]
+        self.assertEqual(self.walk(('last_interaction_date', 'vip_id')), ascending)
+        self.assertEqual(self.walk(('-last_interaction_date', '-vip_id')), ascending[::-1])
+
+    def test_tampered_cursor(self):
+        paginator = KeysetPaginator(VIPClient.objects.all(), ('vip_id',), 3)
+        first = paginator.get_page()
+        cursor = first.next_cursor
+        # Поддельный или испорченный курсор дает первую страницу
+        for bad in (cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'), 'garbage', cursor.split(':')[0]):
+            with self.subTest(cursor=bad):
+                page = paginator.get_page(bad)
+                self.assertEqual([client.pk for client in page], [client.pk for client in first])
+                self.assertFalse(page.has_previous)
+        # Курсор другой сортировки (иное число полей) тоже не принимается
+        other = KeysetPaginator(VIPClient.objects.all(), ('full_name', 'vip_id'), 3)
+        self.assertEqual(other.decode_cursor(cursor), (None, False))
+
+    def test_page_size(self):
+        factory = RequestFactory()
+        for value, expected in (('5', 5), ('0', 1), ('-3', 1), ('1000', 100), ('abc', 20), ('', 20)):
+            with self.subTest(per_page=value):
+                self.assertEqual(get_page_size(factory.get('/', {'per_page': value}), 20, 100), expected)
+        self.assertEqual(get_page_size(factory.get('/'), 20, 100), 20)
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, INTERACTIONS_PAGE_SIZE=3)
+class InteractionFeedTests(TestCase):
+    """Лента взаимодействий клиента: порции в JSON по курсору, фильтры, ссылка «Показать еще» без JavaScript"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.vip_client = VIPClient.objects.create(full_name='Клиент', position='Директор', phone='+7 900 000-00-00',
+                                                  email='client@example.com')
+        Interaction.objects.bulk_create([
+            Interaction(vip_client=cls.vip_client, user=cls.user if i % 2 else None,
+                        date=date.today() - timedelta(days=i), type='call' if i % 3 else 'meeting',
+                        channel='phone' if i % 2 else None, description=f'Взаимодействие {i}')
+            for i in range(8)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def feed(self, **params):
+        """Все порции ленты в JSON; возвращает описания по порядку и число запросов"""
+        url = reverse('vip_client_interactions', args=[self.vip_client.pk])
+        descriptions, requests = [], 0
+        while True:
+            data = self.client.get(url, params).json()
+            requests += 1
+            descriptions += [item['description'] for item in data['results']]
+            if not data['next_cursor']:
+                return descriptions, requests
+            params['cursor'] = data['next_cursor']
+
+    def test_page_shape(self):
+        data = self.client.get(reverse('vip_client_interactions', args=[self.vip_client.pk])).json()
+        self.assertEqual(set(data), {'results', 'next_cursor'})
+        self.assertEqual(len(data['results']), 3)
+        first, second = data['results'][:2]
+        self.assertEqual(first, {
+            'id': first['id'], 'date': date.today().isoformat(), 'date_display': first['date_display'],
+            'type': 'meeting', 'type_display': 'Встреча', 'channel': None, 'channel_display': None,
+            'user': None, 'description': 'Взаимодействие 0', 'result': None,
+        })
+        self.assertEqual((second['channel_display'], second['user']), ('Телефон', 'Менеджер'))
+
+    def test_next_cursor(self):
+        descriptions, requests = self.feed()
+        self.assertEqual(descriptions, [f'Взаимодействие {i}' for i in range(8)])
+        self.assertEqual(requests, 3)
+        descriptions, requests = self.feed(per_page=5)
+        self.assertEqual((len(descriptions), requests), (8, 2))
+
+    def test_filters(self):
+        descriptions, _ = self.feed(type='call')
+        self.assertEqual(descriptions, [f'Взаимодействие {i}' for i in range(8) if i % 3])
+        descriptions, _ = self.feed(type='call', channel='phone')
+        self.assertEqual(descriptions, [f'Взаимодействие {i}' for i in range(8) if i % 3 and i % 2])
+
+    def test_show_more_link(self):
+        url = reverse('vip_client_detail', args=[self.vip_client.pk])
+        response = self.client.get(url, {'type': 'call'})
+        link = re.search(r'<a href="([^"]+)"\s+data-url="([^"]+)"\s+id="interactions-more"',
+                         response.content.decode())
+        # Ссылка ведет на эту же страницу (работает без JavaScript), JSON — только для подгрузки скриптом
+        self.assertTrue(link.group(1).startswith(f'{url}?type=call&amp;cursor='))
+        self.assertEqual(link.group(2), reverse('vip_client_interactions', args=[self.vip_client.pk]))
+
+        response = self.client.get(link.group(1).replace('&amp;', '&'))
+        self.assertEqual([interaction.description for interaction in response.context['interactions']],
+                         ['Взаимодействие 5', 'Взаимодействие 7'])
+
+
+class ReportTests(TestCase):
+    """Отчет по взаимодействиям: агрегаты по разрезам и сброс кэша закрытых месяцев"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = date.today().year - 1
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'password', full_name='Менеджер')
+        cls.assistant = User.objects.create_user('assistant', 'assistant@example.com', 'password')
+        cls.organization = Organization.objects.create(name='ООО "Тест"', type='IT-компания')
+        cls.first = VIPClient.objects.create(full_name='Клиент 1', position='Директор', phone='+7 900 000-00-01',
+                                             email='client1@example.com', organization=cls.organization)
+        cls.second = VIPClient.objects.create(full_name='Клиент 2', position='Директор', phone='+7 900 000-00-02',
+                                              email='client2@example.com')
+        for client, user, month, interaction_type, channel in (
+            (cls.first, cls.manager, 1, 'call', 'phone'),
+            (cls.first, cls.manager, 1, 'call', None),
+            (cls.second, cls.assistant, 1, 'meeting', 'in_person'),
+            (cls.second, None, 3, 'email', 'email'),
+        ):
+            Interaction.objects.create(vip_client=client, user=user, date=date(cls.year, month, 15),
+                                       type=interaction_type, channel=channel, description='Контакт')
+
+    @staticmethod
+    def rows(report, dimension):
+        return {row['label']: (row['total'], row['months'][0], row['months'][2])
+                for row in report['dimensions'][dimension]}
+
+    def test_aggregates(self):
+        report = reports.build_report(self.year)
+        self.assertEqual(report['months'][0], f'{self.year}-01')
+        self.assertEqual(report['totals'][:4], [3, 0, 1, 0])
+        self.assertEqual(report['total'], 4)
+        self.assertEqual(self.rows(report, 'type'),
+                         {'Звонок': (2, 2, 0), 'Встреча': (1, 1, 0), 'Письмо': (1, 0, 1)})
+        self.assertEqual(self.rows(report, 'channel'), {
+            'Телефон': (1, 1, 0), 'Не указан': (1, 1, 0), 'Личная встреча': (1, 1, 0), 'Email': (1, 0, 1),
+        })
+        self.assertEqual(self.rows(report, 'user'), {
+            'Менеджер': (2, 2, 0), 'assistant': (1, 1, 0), 'Пользователь не указан': (1, 0, 1),
+        })
+        self.assertEqual(self.rows(report, 'organization'), {'ООО "Тест"': (2, 2, 0), 'Без организации': (2, 1, 1)})
+        # Строки упорядочены по убыванию итога
+        self.assertEqual(report['dimensions']['type'][0]['label'], 'Звонок')
+
+    def test_closed_months_cached(self):
+        reports.build_report(self.year)
+        with CaptureQueriesContext(connection) as ctx:
+            reports.build_report(self.year)
+        self.assertFalse([query for query in ctx.captured_queries if '"interactions"' in query['sql']])
+
+    def test_cache_invalidated(self):
+        reports.build_report(self.year)
+        interaction = Interaction.objects.create(vip_client=self.first, user=self.manager, type='call',
+                                                 date=date(self.year, 3, 1), description='Звонок')
+        self.assertEqual(reports.build_report(self.year)['totals'][:4], [3, 0, 2, 0])
+
+        # Перенос в другой месяц обновляет оба месяца
+        interaction.date = date(self.year, 2, 1)
+        interaction.save()
+        self.assertEqual(reports.build_report(self.year)['totals'][:4], [3, 1, 1, 0])
+
+        interaction.delete()
+        self.assertEqual(reports.build_report(self.year)['totals'][:4], [3, 0, 1, 0])
+
+        # Разрез по организациям строится по текущей организации клиента
+        self.second.organization = self.organization
+        self.second.save()
+        self.assertEqual(self.rows(reports.build_report(self.year), 'organization'), {'ООО "Тест"': (4, 3, 1)})
+
+        self.first.delete()
+        self.assertEqual(reports.build_report(self.year)['total'], 2)
+
+
+class ManagementCommandTests(TestCase):
+    def test_populate_data_scale(self):
+        call_command('populate_data', scale=10, seed=1, stdout=StringIO())
+        self.assertEqual(VIPClient.objects.count(), 10)
+        self.assertEqual(Organization.objects.count(), 1)
+        self.assertTrue(User.objects.filter(username='test_user2').exists())
+        self.assertEqual(counters.get_counters()[counters.TOTAL_CLIENTS], 10)
+        self.assertEqual(
+            sum(VIPClient.objects.values_list('interaction_count', flat=True)), Interaction.objects.count(),
+        )
+        # bulk_create не вызывает сигналы: ключи поиска дубликатов строятся после загрузки
+        self.assertEqual(set(ClientDedupKey.objects.values_list('vip_client_id', flat=True)),
+                         set(VIPClient.objects.values_list('pk', flat=True)))
+
+    def test_benchmark_views_runs(self):
+        # Команда создает и удаляет собственную тестовую базу, поэтому запускается
+        # отдельным процессом на временной базе SQLite; DEBUG — статика без манифеста collectstatic
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'benchmark.json'
+            env = dict(os.environ, DEBUG='True', DB_ENGINE='sqlite', DB_NAME=str(Path(tmp) / 'db.sqlite3'),
+                       PYTHONPATH=os.pathsep.join(sys.path))
+            subprocess.run(
+                [sys.executable, '-m', 'django', 'benchmark_views', '--sizes', '50', '--requests', '1',
+                 '--warmup', '0', '--output', str(output)],
+                cwd=settings.BASE_DIR, env=env, check=True, capture_output=True, timeout=300,
+            )
+            report = json.loads(output.read_text(encoding='utf-8'))
+        self.assertEqual(list(report['results']), ['50'])
+        self.assertEqual(report['results']['50']['dashboard']['status'], 200)
+
+
+class StaticFilesTests(TestCase):
+    """collectstatic: хешированные имена, минифицированный и сжатый CSS"""
+
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        self.static_root = Path(static_root.name)
+        settings_override = override_settings(
+            STATIC_ROOT=static_root.name,
+            STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'mainvip.storage.MinifiedManifestStaticFilesStorage'},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def collect_css(self):
+        """Собирает статику и возвращает путь к хешированному CSS, на который ссылается страница"""
+        # Статика админки для проверки не нужна, а ее сбор занимает большую часть времени
+        call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin'])
+        response = self.client.get(reverse('login'))
+        match = re.search(r'href="/static/(css/style\.[0-9a-f]{12}\.css)"', response.content.decode())
+        self.assertIsNotNone(match)
+        return self.static_root / match.group(1)
+
+    def test_base_template_uses_hashed_css(self):
+        css = self.collect_css()
+        content = css.read_text(encoding='utf-8')
+        self.assertNotIn('/*', content)
+        self.assertNotIn('\n', content)
+        self.assertTrue(css.with_name(css.name + '.gz').exists())
+
+    @skipUnless(importlib.util.find_spec('brotli'), 'Пакет brotli не установлен')
+    def test_brotli_copy(self):
+        css = self.collect_css()
+        self.assertTrue(css.with_name(css.name + '.br').exists())
+
+    def test_minify_css_keeps_strings(self):
+        from .storage import minify_css
+        self.assertEqual(
+            minify_css('/* comment */\na > b ,\n  c {\n    content: "a  /* b */ ;";\n    color: red;\n}\n'),
+            'a>b,c{content:"a  /* b */ ;";color:red}',
+        )
@@ -0,0 +1,114 @@
+"""Ограничение частоты попыток входа.
+
+Попытки считаются в кэше по двум ключам — IP-адресу и имени пользователя —
+скользящим окном ``LOGIN_THROTTLE_WINDOW`` секунд (счетчики текущего
+и предыдущего окна, предыдущий учитывается пропорционально неистекшей
+части). Попытка учитывается до проверки пароля, поэтому при превышении
+лимита запрос отклоняется без хеширования и без обращения к БД, а ключ
+блокируется на ``LOGIN_THROTTLE_LOCKOUT`` секунд. Успешный вход не
+расходует лимит.
+
+Счетчики разрешенных, отклоненных и неудачных попыток и блокировок
+хранятся в кэше (``get_metrics``), блокировки пишутся в лог ``mainvip.security``.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('mainvip.security')
+
+COUNTER_KEY = 'mainvip:login:{}:{}:{}'
+LOCK_KEY = 'mainvip:login:lock:{}:{}'
+METRIC_KEY = 'mainvip:login:metrics:{}'
+
+ALLOWED = 'allowed'
+REJECTED = 'rejected'
+FAILED = 'failed'
+LOCKOUTS = 'lockouts'
+METRICS = (ALLOWED, REJECTED, FAILED, LOCKOUTS)
+
+
+def _scopes(request, username):
+    """(область, ключ, лимит) для IP-адреса и имени пользователя; лимит 0 — без ограничения"""
+    username = (username or '').strip().lower()
+    scopes = [
+        ('ip', request.META.get('REMOTE_ADDR', ''), settings.LOGIN_THROTTLE_IP_LIMIT),
+        ('user', hashlib.md5(username.encode()).hexdigest(), settings.LOGIN_THROTTLE_USER_LIMIT),
+    ]
+    return [(scope, ident, limit) for scope, ident, limit in scopes if limit > 0]
+
+
+def _increment(key, delta=1, timeout=None):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key, delta)
+
+
+def _count_metric(name):
+    _increment(METRIC_KEY.format(name))
+
+
+def _hit(scope, ident, window, now):
+    """Учитывает попытку и возвращает оценку числа попыток за последние window секунд"""
+    bucket = int(now // window)
+    current = _increment(COUNTER_KEY.format(scope, ident, bucket), timeout=2 * window)
+    previous = cache.get(COUNTER_KEY.format(scope, ident, bucket - 1), 0)
+    return previous * (1 - (now % window) / window) + current
+
+
+def check(request, username):
+    """Учитывает попытку входа. Возвращает None, если ее можно выполнить,
+    иначе — через сколько секунд повторить"""
+    scopes = _scopes(request, username)
+    if not scopes:
+        return None
+    now = time.time()
+    locks = cache.get_many([LOCK_KEY.format(scope, ident) for scope, ident, _ in scopes])
+    if locks:
+        _count_metric(REJECTED)
+        return max(1, int(max(locks.values()) - now))
+
+    window = settings.LOGIN_THROTTLE_WINDOW
+    for scope, ident, limit in scopes:
+        if _hit(scope, ident, window, now) > limit:
+            lockout = settings.LOGIN_THROTTLE_LOCKOUT
+            cache.set(LOCK_KEY.format(scope, ident), now + lockout, timeout=lockout)
+            _count_metric(REJECTED)
+            _count_metric(LOCKOUTS)
+            logger.warning('Блокировка входа (%s): IP %s, лимит %s попыток за %s с',
+                           scope, request.META.get('REMOTE_ADDR', ''), limit, window)
+            return lockout
+    _count_metric(ALLOWED)
+    return None
+
+
+def record_success(request, username):
+    """Успешный вход: попытка возвращается в лимит IP, счетчики пользователя сбрасываются"""
+    bucket = int(time.time() // settings.LOGIN_THROTTLE_WINDOW)
+    for scope, ident, _ in _scopes(request, username):
+        if scope == 'ip':
+            try:
+                cache.decr(COUNTER_KEY.format(scope, ident, bucket))
+            except ValueError:
+                pass
+        else:
+            cache.delete_many([COUNTER_KEY.format(scope, ident, bucket), COUNTER_KEY.format(scope, ident, bucket - 1)])
+
+
+def record_failure():
+    _count_metric(FAILED)
+
+
+def get_metrics():
+    """Счетчики попыток входа {имя: значение}"""
+    values = cache.get_many([METRIC_KEY.format(name) for name in METRICS])
+    return {name: values.get(METRIC_KEY.format(name), 0) for name in METRICS}
+
+
+def reset_metrics():
+    cache.delete_many([METRIC_KEY.format(name) for name in METRICS])
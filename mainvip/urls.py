@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Аутентификация
@@ -15,15 +15,43 @@ urlpatterns = [
     # VIP-клиенты
     path('clients/', views.vip_clients_list, name='vip_clients_list'),
     path('clients/add/', views.vip_client_add, name='vip_client_add'),
+    path('clients/export/', views.vip_clients_export, name='vip_clients_export'),
+    path('clients/import/', views.vip_clients_import, name='vip_clients_import'),
     path('clients/<int:pk>/', views.vip_client_detail, name='vip_client_detail'),
     path('clients/<int:pk>/edit/', views.vip_client_edit, name='vip_client_edit'),
     path('clients/<int:pk>/delete/', views.vip_client_delete, name='vip_client_delete'),
+    path('clients/<int:pk>/history/', views.vip_client_history, name='vip_client_history'),
+    path('clients/<int:pk>/interactions/', views.vip_client_interactions, name='vip_client_interactions'),
+    path('clients/<int:pk>/export/', views.vip_client_interactions_export, name='vip_client_interactions_export'),
     
     # Взаимодействия
     path('clients/<int:client_pk>/interaction/add/', views.interaction_add, name='interaction_add'),
     
     # Организации
     path('organizations/', views.organizations_list, name='organizations_list'),
+    
+    # Отчеты
+    path('reports/', views.reports_view, name='reports'),
+    path('reports/data/', views.reports_data, name='reports_data'),
+    path('reports/export/', views.reports_export, name='reports_export'),
+    
+    # Фоновые задачи
+    path('jobs/', views.jobs_list, name='jobs_list'),
+    path('jobs/start/', views.job_start, name='job_start'),
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/status/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
+    
+    # JSON API
+    path('api/clients/', api.collection, {'resource': api.CLIENTS}, name='api_clients'),
+    path('api/clients/bulk/', api.bulk, {'resource': api.CLIENTS}, name='api_clients_bulk'),
+    path('api/clients/<int:pk>/', api.detail, {'resource': api.CLIENTS}, name='api_client'),
+    path('api/organizations/', api.collection, {'resource': api.ORGANIZATIONS}, name='api_organizations'),
+    path('api/organizations/bulk/', api.bulk, {'resource': api.ORGANIZATIONS}, name='api_organizations_bulk'),
+    path('api/organizations/<int:pk>/', api.detail, {'resource': api.ORGANIZATIONS}, name='api_organization'),
+    path('api/interactions/', api.collection, {'resource': api.INTERACTIONS}, name='api_interactions'),
+    path('api/interactions/bulk/', api.bulk, {'resource': api.INTERACTIONS}, name='api_interactions_bulk'),
+    path('api/interactions/<int:pk>/', api.detail, {'resource': api.INTERACTIONS}, name='api_interaction'),
 ]
 
 
@@ -1,9 +1,54 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import asyncio
+import hashlib
+import os
+from datetime import date, datetime, time, timedelta
+from math import ceil
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate
 from django.contrib import messages
-from django.db.models import Q
-from .models import VIPClient, Organization, Interaction, User, Role
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.formats import date_format
+from . import audit, cache, counters, dedup, exports, jobs, reports, throttle
+from .imports import import_clients
+from .models import VIPClient, Organization, Interaction, User, Role, Job, ClientChange
+from .pagination import KeysetPaginator, get_page_size
+from .queries import CLIENT_SORTS, IMPORT_ERRORS_SHOWN, REPORT_SECTIONS, STALE_DAYS_CHOICES, filter_clients
+
+
+# Варианты сортировки списка организаций (по сводным показателям — из одного запроса с GROUP BY)
+ORGANIZATION_SORTS = {
+    'name': ('name', 'organization_id'),
+    '-name': ('-name', '-organization_id'),
+    'clients': ('-client_count', '-organization_id'),
+    'active': ('-active_client_count', '-organization_id'),
+    'contact': ('-last_interaction_date', '-organization_id'),
+    '-contact': ('last_interaction_date', 'organization_id'),
+}
+
+# Порядок ленты взаимодействий клиента: новые сверху
+INTERACTION_ORDERING = ('-date', '-interaction_id')
+
+# Сколько возможных дубликатов называть в предупреждении при сохранении клиента
+DUPLICATES_SHOWN = 5
+
+# Сколько строк разреза показывать на странице отчета (в JSON отдаются все)
+REPORT_ROWS_SHOWN = 20
+
+# Задачи, которые персонал может запустить со страницы фоновых задач
+JOB_ACTIONS = ('rebuild_counters', 'rebuild_interaction_summary', 'rebuild_search_index', 'find_duplicates')
+# Сколько последних задач показывать в списке
+JOBS_SHOWN = 50
 
 
 def login_view(request):
@@ -11,30 +56,98 @@ def login_view(request):
     if request.method == 'POST':
         username = request.POST.get('username')
         password = request.POST.get('password')
+        # Лимит проверяется до хеширования пароля: подбор не нагружает процессор и БД
+        retry_after = throttle.check(request, username)
+        if retry_after is not None:
+            messages.error(request, f'Слишком много попыток входа. Повторите через {ceil(retry_after / 60)} мин.')
+            response = render(request, 'accounts/login.html', status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
         user = authenticate(request, username=username, password=password)
         if user is not None:
+            throttle.record_success(request, username)
             login(request, user)
             return redirect('dashboard')
         else:
+            throttle.record_failure()
             messages.error(request, 'Неверное имя пользователя или пароль')
     return render(request, 'accounts/login.html')
 
 
+async def arender(request, template_name, context):
+    """render() для async-представлений.
+
+    Шаблон обращается к БД (текущий пользователь, сессия, кэшируемые фрагменты
+    при промахе кэша), поэтому рендерится в синхронном потоке.
+    """
+    # Пользователь уже загружен login_required через request.auser() — не загружаем его повторно
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def alist(queryset):
+    """list(queryset) для asyncio.gather в async-представлениях"""
+    return [row async for row in queryset]
+
+
+def page_etag(request, versions, user):
+    """ETag HTML-страницы без обращения к данным.
+
+    Страница зависит от версий моделей (mainvip.cache), пользователя
+    (имя в шапке), сессии и CSRF-cookie (токен в формах меняется после входа),
+    текущей даты (фильтры «давно не общались») и адреса с параметрами.
+    """
+    key = ':'.join(str(part) for part in (
+        versions, user.pk, request.session.session_key, request.META.get('CSRF_COOKIE'),
+        timezone.localdate(), request.get_full_path(),
+    ))
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+async def aget_page_etag(request, *names):
+    """ETag страницы, зависящей от версий моделей names.
+
+    Версия пользователей входит всегда: в шапке каждой страницы имя текущего пользователя.
+    """
+    versions, user = await asyncio.gather(cache.aget_versions(cache.USER, *names), request.auser())
+    return page_etag(request, versions, user)
+
+
+def not_modified(request, etag):
+    """Ответ 304, если у браузера актуальная версия страницы"""
+    # Непоказанные сообщения (messages) должны попасть в новую страницу
+    if len(messages.get_messages(request)):
+        return None
+    return get_conditional_response(request, etag=etag)
+
+
+def set_etag(response, etag):
+    """ETag и требование проверять актуальность страницы при каждом открытии"""
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """Главная страница (дашборд)"""
-    total_clients = VIPClient.objects.count()
-    active_clients = VIPClient.objects.filter(status='active').count()
-    total_organizations = Organization.objects.count()
+    # Счетчики и версии кэша не зависят друг от друга — запрашиваются одновременно
+    values, cache_version = await asyncio.gather(
+        counters.aget_counters(),
+        cache.aget_versions(cache.INTERACTION, cache.VIP_CLIENT, cache.USER),
+    )
+    # Читается в шаблоне, только если фрагмент не найден в кэше
     recent_interactions = Interaction.objects.select_related('vip_client', 'user').order_by('-date')[:10]
     
     context = {
-        'total_clients': total_clients,
-        'active_clients': active_clients,
-        'total_organizations': total_organizations,
+        'total_clients': values[counters.TOTAL_CLIENTS],
+        'active_clients': values[counters.ACTIVE_CLIENTS],
+        'total_organizations': values[counters.TOTAL_ORGANIZATIONS],
         'recent_interactions': recent_interactions,
+        'cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'cache_version': cache_version,
     }
-    return render(request, 'accounts/dashboard.html', context)
+    return await arender(request, 'accounts/dashboard.html', context)
 
 
 @login_required
@@ -43,49 +156,175 @@ def users_list(request):
     users = User.objects.select_related('role').all()
     context = {
         'users': users,
+        'cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'cache_version': cache.get_versions(cache.USER, cache.ROLE),
     }
     return render(request, 'accounts/users_list.html', context)
 
 
 @login_required
-def vip_clients_list(request):
+async def vip_clients_list(request):
     """Список VIP-клиентов"""
-    search_query = request.GET.get('search', '')
-    status_filter = request.GET.get('status', '')
-    
-    clients = VIPClient.objects.select_related('organization').all()
+    etag = await aget_page_etag(request, cache.VIP_CLIENT, cache.ORGANIZATION, cache.INTERACTION)
+    if (response := not_modified(request, etag)) is not None:
+        return response
     
-    if search_query:
-        clients = clients.filter(
-            Q(full_name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(position__icontains=search_query)
-        )
+    clients, search_query, status_filter, stale_filter, sort = filter_clients(request.GET)
+    clients = clients.select_related('organization')
     
-    if status_filter:
-        clients = clients.filter(status=status_filter)
+    page_size = get_page_size(request, settings.VIP_CLIENTS_PAGE_SIZE, settings.PAGINATION_MAX_PAGE_SIZE)
+    paginator = KeysetPaginator(clients, CLIENT_SORTS[sort], page_size)
+    page = await paginator.aget_page(request.GET.get('cursor'))
     
     context = {
-        'clients': clients,
+        'clients': page,
+        'page': page,
         'search_query': search_query,
         'status_filter': status_filter,
         'status_choices': VIPClient.STATUS_CHOICES,
+        'stale_filter': stale_filter,
+        'stale_choices': STALE_DAYS_CHOICES,
+        'sort': sort,
+    }
+    return set_etag(await arender(request, 'projects/vip_clients_list.html', context), etag)
+
+
+@login_required
+def vip_clients_export(request):
+    """Выгрузка списка VIP-клиентов (с учетом фильтров) в CSV или XLSX; POST — в фоновой задаче"""
+    if request.method == 'POST':
+        job = jobs.enqueue('export_clients', user=request.user, query=request.GET.urlencode(),
+                           format=request.GET.get('format', 'csv'))
+        return redirect('job_detail', pk=job.pk)
+    clients, search_query, status_filter, stale_filter, sort = filter_clients(request.GET)
+    clients = clients.order_by(*CLIENT_SORTS[sort])
+    return exports.export_response(
+        request.GET.get('format', 'csv'), 'vip_clients',
+        exports.CLIENT_HEADER, exports.client_rows(clients), sheet_name='VIP-клиенты',
+    )
+
+
+@login_required
+def vip_clients_import(request):
+    """Импорт VIP-клиентов из CSV-файла"""
+    result = None
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            messages.error(request, 'Выберите файл для импорта')
+        elif request.POST.get('background'):
+            path = default_storage.save(f'jobs/uploads/{upload.name}', upload)
+            job = jobs.enqueue('import_clients', user=request.user, path=path)
+            messages.success(request, 'Импорт поставлен в очередь')
+            return redirect('job_detail', pk=job.pk)
+        else:
+            try:
+                result = import_clients(upload.file, batch_size=settings.IMPORT_BATCH_SIZE)
+            except (UnicodeDecodeError, ValueError) as e:
+                messages.error(request, f'Не удалось прочитать файл: {str(e)}')
+            else:
+                messages.success(request, f'Импортировано клиентов: {result.imported}')
+    
+    context = {
+        'result': result,
+        'errors': result.errors[:IMPORT_ERRORS_SHOWN] if result else [],
     }
-    return render(request, 'projects/vip_clients_list.html', context)
+    return render(request, 'projects/vip_clients_import.html', context)
+
+
+def filter_interactions(request, client):
+    """Взаимодействия клиента с учетом фильтров type/channel из запроса"""
+    type_filter = request.GET.get('type', '')
+    channel_filter = request.GET.get('channel', '')
+    
+    interactions = Interaction.objects.filter(vip_client=client).select_related('user')
+    if type_filter:
+        interactions = interactions.filter(type=type_filter)
+    if channel_filter:
+        interactions = interactions.filter(channel=channel_filter)
+    return interactions, type_filter, channel_filter
 
 
 @login_required
-def vip_client_detail(request, pk):
+async def vip_client_detail(request, pk):
     """Детальная информация о VIP-клиенте"""
-    client = get_object_or_404(VIPClient.objects.select_related('organization'), pk=pk)
-    interactions = Interaction.objects.filter(vip_client=client).select_related('user').order_by('-date')
+    etag = await aget_page_etag(request, cache.VIP_CLIENT, cache.INTERACTION, cache.ORGANIZATION)
+    if (response := not_modified(request, etag)) is not None:
+        return response
+    
+    client = await aget_object_or_404(VIPClient.objects.select_related('organization'), pk=pk)
+    interactions, type_filter, channel_filter = filter_interactions(request, client)
+    paginator = KeysetPaginator(interactions, INTERACTION_ORDERING, settings.INTERACTIONS_PAGE_SIZE)
+    # Лента и сводка по типам не зависят друг от друга — запрашиваются одновременно
+    page, type_counts = await asyncio.gather(
+        paginator.aget_page(request.GET.get('cursor')),
+        alist(client.type_counts.filter(count__gt=0).order_by('-count')),
+    )
     
     context = {
         'client': client,
-        'interactions': interactions,
+        'type_counts': type_counts,
+        'interactions': page,
+        'page': page,
+        'type_filter': type_filter,
+        'channel_filter': channel_filter,
+        'type_choices': Interaction.TYPE_CHOICES,
+        'channel_choices': Interaction.CHANNEL_CHOICES,
     }
-    return render(request, 'projects/vip_client_detail.html', context)
+    return set_etag(await arender(request, 'projects/vip_client_detail.html', context), etag)
+
+
+@login_required
+def vip_client_interactions(request, pk):
+    """Порция ленты взаимодействий клиента в JSON (подгрузка при прокрутке)"""
+    client = get_object_or_404(VIPClient.objects.only('pk'), pk=pk)
+    interactions, type_filter, channel_filter = filter_interactions(request, client)
+    page_size = get_page_size(request, settings.INTERACTIONS_PAGE_SIZE, settings.PAGINATION_MAX_PAGE_SIZE)
+    paginator = KeysetPaginator(interactions, INTERACTION_ORDERING, page_size)
+    page = paginator.get_page(request.GET.get('cursor'))
+    
+    results = []
+    for interaction in page:
+        user = interaction.user
+        results.append({
+            'id': interaction.pk,
+            'date': interaction.date.isoformat(),
+            'date_display': date_format(interaction.date),
+            'type': interaction.type,
+            'type_display': interaction.get_type_display(),
+            'channel': interaction.channel,
+            'channel_display': interaction.get_channel_display() if interaction.channel else None,
+            'user': (user.full_name or user.username) if user else None,
+            'description': interaction.description,
+            'result': interaction.result,
+        })
+    return JsonResponse({'results': results, 'next_cursor': page.next_cursor})
+
+
+@login_required
+def vip_client_interactions_export(request, pk):
+    """Выгрузка истории взаимодействий с VIP-клиентом в CSV или XLSX; POST — в фоновой задаче"""
+    client = get_object_or_404(VIPClient, pk=pk)
+    if request.method == 'POST':
+        job = jobs.enqueue('export_interactions', user=request.user, client_id=client.pk,
+                           format=request.GET.get('format', 'csv'))
+        return redirect('job_detail', pk=job.pk)
+    interactions = Interaction.objects.filter(vip_client=client).order_by('-date', '-interaction_id')
+    return exports.export_response(
+        request.GET.get('format', 'csv'), f'interactions_{client.pk}',
+        exports.INTERACTION_HEADER, exports.interaction_rows(interactions), sheet_name='Взаимодействия',
+    )
+
+
+def warn_duplicates(request, client):
+    """Предупреждает о возможных дубликатах сохраненного клиента"""
+    candidates = dedup.find_candidates(client, limit=DUPLICATES_SHOWN)
+    if candidates:
+        described = '; '.join(
+            f"{other.full_name} (№{other.pk}, совпадает: {', '.join(dedup.KIND_LABELS[kind] for kind in kinds)})"
+            for other, kinds in candidates
+        )
+        messages.warning(request, f'Возможные дубликаты: {described}')
 
 
 @login_required
@@ -93,16 +332,18 @@ def vip_client_add(request):
     """Добавление нового VIP-клиента"""
     if request.method == 'POST':
         try:
-            client = VIPClient.objects.create(
-                full_name=request.POST.get('full_name'),
-                position=request.POST.get('position'),
-                phone=request.POST.get('phone'),
-                email=request.POST.get('email'),
-                organization_id=request.POST.get('organization') or None,
-                status=request.POST.get('status', 'active'),
-                notes=request.POST.get('notes', ''),
-            )
+            with transaction.atomic():
+                client = VIPClient.objects.create(
+                    full_name=request.POST.get('full_name'),
+                    position=request.POST.get('position'),
+                    phone=request.POST.get('phone'),
+                    email=request.POST.get('email'),
+                    organization_id=request.POST.get('organization') or None,
+                    status=request.POST.get('status', 'active'),
+                    notes=request.POST.get('notes', ''),
+                )
             messages.success(request, f'VIP-клиент {client.full_name} успешно добавлен')
+            warn_duplicates(request, client)
             return redirect('vip_client_detail', pk=client.pk)
         except Exception as e:
             messages.error(request, f'Ошибка при добавлении клиента: {str(e)}')
@@ -122,6 +363,7 @@ def vip_client_edit(request, pk):
     
     if request.method == 'POST':
         try:
+            previous_keys = [getattr(client, name) for name in dedup.KEY_FIELDS]
             client.full_name = request.POST.get('full_name')
             client.position = request.POST.get('position')
             client.phone = request.POST.get('phone')
@@ -129,8 +371,11 @@ def vip_client_edit(request, pk):
             client.organization_id = request.POST.get('organization') or None
             client.status = request.POST.get('status', 'active')
             client.notes = request.POST.get('notes', '')
-            client.save()
+            with transaction.atomic():
+                client.save()
             messages.success(request, f'VIP-клиент {client.full_name} успешно обновлен')
+            if previous_keys != [getattr(client, name) for name in dedup.KEY_FIELDS]:
+                warn_duplicates(request, client)
             return redirect('vip_client_detail', pk=client.pk)
         except Exception as e:
             messages.error(request, f'Ошибка при обновлении клиента: {str(e)}')
@@ -151,7 +396,8 @@ def vip_client_delete(request, pk):
     
     if request.method == 'POST':
         client_name = client.full_name
-        client.delete()
+        with transaction.atomic():
+            client.delete()
         messages.success(request, f'VIP-клиент {client_name} успешно удален')
         return redirect('vip_clients_list')
     
@@ -161,14 +407,84 @@ def vip_client_delete(request, pk):
     return render(request, 'projects/vip_client_delete.html', context)
 
 
+def _parse_date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
 @login_required
-def organizations_list(request):
+def vip_client_history(request, pk):
+    """Журнал изменений VIP-клиента (доступен и после удаления клиента)"""
+    changes = ClientChange.objects.filter(vip_client_id=pk).select_related('user')
+    date_from = _parse_date(request.GET.get('date_from'))
+    date_to = _parse_date(request.GET.get('date_to'))
+    # Границы периода — моменты времени, чтобы условие шло по индексу (vip_client_id, changed_at)
+    tz = timezone.get_current_timezone()
+    if date_from:
+        changes = changes.filter(changed_at__gte=datetime.combine(date_from, time.min, tzinfo=tz))
+    if date_to:
+        changes = changes.filter(changed_at__lt=datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz))
+
+    client = VIPClient.objects.filter(pk=pk).only('pk', 'full_name').first()
+    if client is not None:
+        client_name = client.full_name
+    else:
+        # Удаленный клиент: имя из последней записи журнала
+        client_name = ClientChange.objects.filter(vip_client_id=pk).values_list('client_name', flat=True).first()
+        if client_name is None:
+            raise Http404('Клиент не найден')
+
+    page_size = get_page_size(request, settings.CLIENT_CHANGES_PAGE_SIZE, settings.PAGINATION_MAX_PAGE_SIZE)
+    page = KeysetPaginator(changes, ('-changed_at', '-change_id'), page_size).get_page(request.GET.get('cursor'))
+
+    context = {
+        'client': client,
+        'client_id': pk,
+        'client_name': client_name,
+        'changes': audit.describe(page),
+        'page': page,
+        'date_from': date_from,
+        'date_to': date_to,
+    }
+    return render(request, 'projects/vip_client_history.html', context)
+
+
+def organizations_with_rollups():
+    """Организации со сводкой по клиентам: число клиентов, активных и дата последнего контакта.
+
+    Дата берется из сводки клиента (VIPClient.last_interaction_date), поэтому
+    все показатели считаются одним запросом по vip_clients без обращения к interactions.
+    """
+    return Organization.objects.annotate(
+        client_count=Count('vipclient'),
+        active_client_count=Count('vipclient', filter=Q(vipclient__status='active')),
+        last_interaction_date=Max('vipclient__last_interaction_date'),
+    )
+
+
+@login_required
+async def organizations_list(request):
     """Список организаций"""
-    organizations = Organization.objects.all()
+    etag = await aget_page_etag(request, cache.ORGANIZATION, cache.VIP_CLIENT, cache.INTERACTION)
+    if (response := not_modified(request, etag)) is not None:
+        return response
+    
+    sort = request.GET.get('sort', '')
+    if sort not in ORGANIZATION_SORTS:
+        sort = 'name'
+    page_size = get_page_size(request, settings.ORGANIZATIONS_PAGE_SIZE, settings.PAGINATION_MAX_PAGE_SIZE)
+    paginator = KeysetPaginator(organizations_with_rollups(), ORGANIZATION_SORTS[sort], page_size,
+                                nullable=('last_interaction_date',))
+    page = await paginator.aget_page(request.GET.get('cursor'))
+    
     context = {
-        'organizations': organizations,
+        'organizations': page,
+        'page': page,
+        'sort': sort,
     }
-    return render(request, 'projects/organizations_list.html', context)
+    return set_etag(await arender(request, 'projects/organizations_list.html', context), etag)
 
 
 @login_required
@@ -178,15 +494,17 @@ def interaction_add(request, client_pk):
     
     if request.method == 'POST':
         try:
-            interaction = Interaction.objects.create(
-                vip_client=client,
-                user=request.user,
-                date=request.POST.get('date'),
-                type=request.POST.get('type'),
-                channel=request.POST.get('channel') or None,
-                description=request.POST.get('description'),
-                result=request.POST.get('result', ''),
-            )
+            # Сводка клиента обновляется сигналами в той же транзакции, что и запись взаимодействия
+            with transaction.atomic():
+                Interaction.objects.create(
+                    vip_client=client,
+                    user=request.user,
+                    date=request.POST.get('date'),
+                    type=request.POST.get('type'),
+                    channel=request.POST.get('channel') or None,
+                    description=request.POST.get('description'),
+                    result=request.POST.get('result', ''),
+                )
             messages.success(request, 'Взаимодействие успешно добавлено')
             return redirect('vip_client_detail', pk=client.pk)
         except Exception as e:
@@ -198,3 +516,128 @@ def interaction_add(request, client_pk):
         'channel_choices': Interaction.CHANNEL_CHOICES,
     }
     return render(request, 'projects/interaction_add.html', context)
+
+
+def get_report_year(request):
+    """Год отчета из параметра year (по умолчанию текущий)"""
+    year = request.GET.get('year', '')
+    if year.isdigit() and 1900 <= int(year) <= 9999:
+        return int(year)
+    return timezone.localdate().year
+
+
+@login_required
+def reports_view(request):
+    """Отчет по взаимодействиям за год"""
+    report = reports.build_report(get_report_year(request))
+    context = {
+        'report': report,
+        'previous_year': report['year'] - 1,
+        'next_year': report['year'] + 1,
+        'month_labels': [date_format(date(report['year'], month, 1), 'M') for month in range(1, 13)],
+        'sections': [
+            (title, report['dimensions'][dimension][:REPORT_ROWS_SHOWN], len(report['dimensions'][dimension]))
+            for dimension, title in REPORT_SECTIONS
+        ],
+    }
+    return render(request, 'projects/reports.html', context)
+
+
+@login_required
+def reports_data(request):
+    """Отчет по взаимодействиям за год в JSON"""
+    return JsonResponse(reports.build_report(get_report_year(request)))
+
+
+@login_required
+def reports_export(request):
+    """Выгрузка отчета за год в XLSX фоновой задачей"""
+    if request.method != 'POST':
+        return redirect('reports')
+    job = jobs.enqueue('export_report', user=request.user, year=get_report_year(request))
+    return redirect('job_detail', pk=job.pk)
+
+
+def get_user_job(request, pk):
+    """Задача текущего пользователя (персоналу доступны все задачи)"""
+    user_jobs = Job.objects.all() if request.user.is_staff else Job.objects.filter(user=request.user)
+    job = get_object_or_404(user_jobs, pk=pk)
+    job.title = jobs.get_title(job.name)
+    return job
+
+
+def job_status_data(request, job):
+    """Состояние задачи для опроса со страницы задачи"""
+    error = job.error.strip()
+    if error and not request.user.is_staff:
+        # Трассировку видит только персонал
+        error = error.splitlines()[-1]
+    return {
+        'id': job.pk,
+        'name': job.name,
+        'title': job.title,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'message': job.message,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'finished': job.is_finished,
+        'result': job.result,
+        'error': error,
+        'download_url': reverse('job_download', args=[job.pk]) if job.result_file else None,
+    }
+
+
+@login_required
+def jobs_list(request):
+    """Фоновые задачи пользователя (персонал видит все)"""
+    user_jobs = Job.objects.select_related('user').defer('params', 'result', 'error')
+    if not request.user.is_staff:
+        user_jobs = user_jobs.filter(user=request.user)
+    job_list = list(user_jobs[:JOBS_SHOWN])
+    for job in job_list:
+        job.title = jobs.get_title(job.name)
+    
+    context = {
+        'jobs': job_list,
+        'job_actions': [(name, jobs.get_title(name)) for name in JOB_ACTIONS] if request.user.is_staff else [],
+    }
+    return render(request, 'projects/jobs_list.html', context)
+
+
+@login_required
+def job_start(request):
+    """Запуск служебной задачи (пересчеты) персоналом"""
+    name = request.POST.get('name')
+    if request.method != 'POST' or not request.user.is_staff or name not in JOB_ACTIONS:
+        messages.error(request, 'Задачу нельзя запустить')
+        return redirect('jobs_list')
+    job = jobs.enqueue(name, user=request.user)
+    return redirect('job_detail', pk=job.pk)
+
+
+@login_required
+def job_detail(request, pk):
+    """Страница фоновой задачи: ход выполнения и результат"""
+    job = get_user_job(request, pk)
+    context = {
+        'job': job,
+        'status': job_status_data(request, job),
+    }
+    return render(request, 'projects/job_detail.html', context)
+
+
+@login_required
+def job_status(request, pk):
+    """Состояние фоновой задачи в JSON"""
+    return JsonResponse(job_status_data(request, get_user_job(request, pk)))
+
+
+@login_required
+def job_download(request, pk):
+    """Файл результата фоновой задачи"""
+    job = get_user_job(request, pk)
+    if not job.result_file:
+        raise Http404('У задачи нет файла результата')
+    return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=os.path.basename(job.result_file.name))
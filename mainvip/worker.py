@@ -0,0 +1,27 @@
+"""Точки входа процессов пула команды runworker.
+
+Процессы запускаются через spawn и импортируют этот модуль до настройки
+Django, поэтому модели и ``mainvip.jobs`` импортируются внутри функций.
+"""
+import signal
+
+
+def init():
+    """Инициализация процесса пула"""
+    import django
+    django.setup()
+    # Ctrl+C получает вся группа процессов — пул останавливает родительский процесс
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run(job_id):
+    """Выполняет задачу: соединения с БД закрываются как после обычного запроса"""
+    from django.db import close_old_connections
+
+    from . import jobs
+
+    close_old_connections()
+    try:
+        return jobs.execute(job_id)
+    finally:
+        close_old_connections()
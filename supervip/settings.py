@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,25 +44,36 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mainvip.middleware.RequestMetricsMiddleware',  # Server-Timing и метрики SQL по каждому запросу
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Для статических файлов в продакшене
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'mainvip.middleware.AuditUserMiddleware',  # Автор изменений в журнале клиентов
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'supervip.urls'
 
+# Загрузчики шаблонов. В продакшене шаблоны компилируются один раз на процесс
+# (cached.Loader), при отладке перечитываются с диска при каждом рендеринге
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'mainvip.metrics.TimedDjangoTemplates',  # DjangoTemplates с замером времени рендеринга
         'DIRS': [BASE_DIR / 'templates']
         ,
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -76,19 +89,112 @@ WSGI_APPLICATION = 'supervip.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
+# СУБД выбирается переменной DB_ENGINE: sqlite (по умолчанию) или postgresql
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'supervip'),
+            'USER': os.environ.get('DB_USER', 'supervip'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Постоянные соединения: не открывать новое соединение на каждый запрос
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    # Пул соединений psycopg (нужен пакет psycopg[pool]); несовместим с CONN_MAX_AGE
+    if os.environ.get('DB_POOL', 'False') == 'True':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # WAL: чтение не блокируется записью; synchronous=NORMAL достаточно для WAL
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                # busy_timeout в секундах: ждать освобождения блокировки вместо ошибки
+                'timeout': int(os.environ.get('DB_TIMEOUT', 20)),
+                # Блокировка на запись берется в начале транзакции, без взаимоблокировок при ее повышении
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Неизвестное значение DB_ENGINE: {DB_ENGINE}')
+
+
+# Кэш: CACHE_BACKEND = redis или locmem. По умолчанию redis, при DEBUG — locmem.
+# В кэше лежат версии ключей (mainvip.cache) и счетчики попыток входа (mainvip.throttle),
+# которые меняются через incr, поэтому бэкенд должен увеличивать значения атомарно.
+# FileBasedCache этого не умеет (чтение и запись файла — отдельные шаги), и одновременные
+# воркеры теряют увеличения. locmem атомарен, но хранит данные в памяти одного процесса:
+# сброс кэша в одном воркере не виден остальным — подходит для разработки и одного процесса.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'redis')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'supervip'),
+    # Нужен пакет redis
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'Неизвестное значение CACHE_BACKEND: {CACHE_BACKEND}')
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'supervip',
     }
 }
 
+# Хранилище сессий: SESSION_ENGINE = db, cached_db, cache или signed_cookies.
+# cached_db читает сессию из кэша и обращается к БД только при промахе; signed_cookies
+# хранит сессию в подписанной cookie и не обращается ни к БД, ни к кэшу, но выход
+# из системы не отменяет скопированную cookie до истечения SESSION_COOKIE_AGE.
+# С locmem по умолчанию db: кэш сессии в памяти одного воркера не узнает о выходе в другом.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE_NAME = os.environ.get('SESSION_ENGINE', 'db' if CACHE_BACKEND == 'locmem' else 'cached_db')
+if SESSION_ENGINE_NAME not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f'Неизвестное значение SESSION_ENGINE: {SESSION_ENGINE_NAME}')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_ENGINE_NAME]
+
+# Пользователь (с ролью) вошедшего в систему кэшируется в памяти процесса и
+# сбрасывается при сохранении пользователей и ролей (версии mainvip.cache);
+# время жизни записи, секунды (0 — не кэшировать)
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
+# Время жизни кэшированных фрагментов шаблонов, секунды.
+# Актуальность обеспечивают версии ключей (mainvip.cache), срок нужен только для вытеснения старых версий.
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 3600))
+
+# Время жизни кэша отчетов за закрытые месяцы, секунды (по умолчанию 30 дней)
+REPORTS_CACHE_TIMEOUT = int(os.environ.get('REPORTS_CACHE_TIMEOUT', 30 * 24 * 3600))
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
 AUTH_USER_MODEL = 'mainvip.User'
 
+AUTHENTICATION_BACKENDS = [
+    'mainvip.auth.CachedModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -126,11 +232,115 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# WhiteNoise для статических файлов в продакшене
+# В продакшене collectstatic добавляет в имена файлов хеш содержимого, минифицирует CSS
+# и сохраняет сжатые копии (.gz и .br); WhiteNoise отдает хешированные файлы
+# с Cache-Control: immutable, а {% static %} подставляет имена из манифеста.
+# После изменения статики нужен collectstatic
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'mainvip.storage.MinifiedManifestStaticFilesStorage'
+        ),
+    },
+}
 if not DEBUG:
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
     WHITENOISE_ROOT = STATIC_ROOT
 
+# Загруженные файлы и результаты фоновых задач (отдаются только через представления)
+MEDIA_ROOT = Path(os.environ.get('MEDIA_ROOT', BASE_DIR / 'media'))
+MEDIA_URL = '/media/'
+
+# Фоновые задачи (mainvip.jobs, команда runworker)
+# Число процессов обработчика (по умолчанию — число ядер)
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 0)) or None
+# Пауза между проверками пустой очереди, с
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 1.0))
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 3))
+# Задержка перед повтором, с (удваивается с каждой попыткой)
+JOBS_RETRY_DELAY = int(os.environ.get('JOBS_RETRY_DELAY', 30))
+# Задача без отчета о ходе дольше этого времени считается брошенной, с
+JOBS_STALE_TIMEOUT = int(os.environ.get('JOBS_STALE_TIMEOUT', 3600))
+# Процесс пула перезапускается после стольких задач (освобождение памяти)
+JOBS_MAX_TASKS_PER_CHILD = int(os.environ.get('JOBS_MAX_TASKS_PER_CHILD', 100))
+# Выполнять задачи сразу в процессе веб-сервера (разработка без runworker)
+JOBS_IMMEDIATE = os.environ.get('JOBS_IMMEDIATE', 'False') == 'True'
+
+# Постраничный вывод (keyset-пагинация)
+VIP_CLIENTS_PAGE_SIZE = int(os.environ.get('VIP_CLIENTS_PAGE_SIZE', 50))
+INTERACTIONS_PAGE_SIZE = int(os.environ.get('INTERACTIONS_PAGE_SIZE', 20))
+ORGANIZATIONS_PAGE_SIZE = int(os.environ.get('ORGANIZATIONS_PAGE_SIZE', 50))
+CLIENT_CHANGES_PAGE_SIZE = int(os.environ.get('CLIENT_CHANGES_PAGE_SIZE', 50))
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 200))
+
+# JSON API (mainvip.api): размер страницы по умолчанию и максимум объектов в массовой операции
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+API_BULK_MAX_SIZE = int(os.environ.get('API_BULK_MAX_SIZE', 1000))
+
+# Размер порции строк, читаемых из БД при потоковой выгрузке
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Размер пакета записи при импорте клиентов из CSV
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+# Поиск VIP-клиентов
+VIP_SEARCH_BACKEND = os.environ.get(
+    'VIP_SEARCH_BACKEND',
+    'mainvip.search.SQLiteFTS5SearchBackend' if DB_ENGINE == 'sqlite' else 'mainvip.search.IcontainsSearchBackend',
+)
+
+# Поиск дубликатов VIP-клиентов (mainvip.dedup)
+# Блоки с одинаковым ключом больше этого размера (распространенные ФИО) не сравниваются
+DEDUP_MAX_BLOCK_SIZE = int(os.environ.get('DEDUP_MAX_BLOCK_SIZE', 50))
+# Порог сходства ФИО (0..1), начиная с которого клиенты считаются возможными дубликатами
+DEDUP_NAME_THRESHOLD = float(os.environ.get('DEDUP_NAME_THRESHOLD', 0.8))
+
+# Метрики запросов (mainvip.middleware.RequestMetricsMiddleware)
+# Порог повторов одинакового SQL-запроса для предупреждения N+1; 0 — отключить
+REQUEST_METRICS_NPLUSONE_THRESHOLD = int(os.environ.get('REQUEST_METRICS_NPLUSONE_THRESHOLD', 5))
+# Заголовок Server-Timing раскрывает время ответа и число SQL-запросов — по умолчанию только при DEBUG.
+# Строка лога на каждый запрос пишется с уровнем DEBUG (REQUEST_METRICS_LOG_LEVEL=DEBUG)
+REQUEST_METRICS_SERVER_TIMING = os.environ.get('REQUEST_METRICS_SERVER_TIMING', str(DEBUG)) == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'mainvip.jobs': {
+            'handlers': ['console'],
+            'level': os.environ.get('JOBS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'mainvip.metrics': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'mainvip.security': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Ограничение попыток входа (mainvip.throttle): не больше LIMIT попыток за WINDOW секунд
+# с одного IP-адреса и для одного имени пользователя, при превышении — блокировка
+# на LOCKOUT секунд. Лимит 0 отключает ограничение по этому ключу.
+# За обратным прокси REMOTE_ADDR должен содержать адрес клиента (настройка прокси/WSGI-сервера)
+LOGIN_THROTTLE_WINDOW = int(os.environ.get('LOGIN_THROTTLE_WINDOW', 300))
+LOGIN_THROTTLE_IP_LIMIT = int(os.environ.get('LOGIN_THROTTLE_IP_LIMIT', 30))
+LOGIN_THROTTLE_USER_LIMIT = int(os.environ.get('LOGIN_THROTTLE_USER_LIMIT', 5))
+LOGIN_THROTTLE_LOCKOUT = int(os.environ.get('LOGIN_THROTTLE_LOCKOUT', 900))
+
 # Login settings
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'